@@ -9,9 +9,15 @@ from unittest.mock import patch
 from opensearchpy.exceptions import ConnectionError
 
 from openmock.behaviour.server_failure import server_failure
+from openmock.engine import Engine
 from openmock.fake_asyncindices import FakeAsyncIndicesClient
 from openmock.fake_asyncopensearch import AsyncFakeOpenSearch
 from openmock.fake_cluster import FakeClusterClient
+from openmock.fake_helpers import (
+    ActionChunker,
+    async_process_bulk_chunk,
+    process_bulk_chunk,
+)
 from openmock.fake_indices import FakeIndicesClient
 from openmock.fake_opensearch import FakeOpenSearch
 from openmock.fake_server import FakeOpenSearchServer
@@ -23,34 +29,42 @@ __all__ = [
     "FakeOpenSearch",
     "FakeOpenSearchServer",
     "AsyncFakeOpenSearch",
+    "Engine",
     "FakeClusterClient",
     "FakeIndicesClient",
 ]
 
 OPEN_INSTANCES = {}
 OPEN_ASYNC_INSTANCES = {}
+# Sync and async clients of the same host share the indices of its engine
+OPEN_ENGINES: dict[str, Engine] = {}
 
 
-def _get_openmock(*args, hosts=None, **kwargs):
+def _open_key(hosts):
     host = _normalize_hosts(hosts)[0]
-    open_key = f'{host.get("host", "localhost")}:{host.get("port", 9200)}'
+    return f'{host.get("host", "localhost")}:{host.get("port", 9200)}'
+
+
+def _get_openmock(*args, hosts=None, **kwargs):
+    open_key = _open_key(hosts)
 
     if open_key in OPEN_INSTANCES:
         connection = OPEN_INSTANCES.get(open_key)
     else:
-        connection = FakeOpenSearch()
+        engine = OPEN_ENGINES.setdefault(open_key, Engine())
+        connection = FakeOpenSearch(engine=engine)
         OPEN_INSTANCES[open_key] = connection
     return connection
 
 
 def _get_async_openmock(*args, hosts=None, **kwargs):
-    host = _normalize_hosts(hosts)[0]
-    open_key = f'{host.get("host", "localhost")}:{host.get("port", 9200)}'
+    open_key = _open_key(hosts)
 
     if open_key in OPEN_ASYNC_INSTANCES:
         connection = OPEN_ASYNC_INSTANCES.get(open_key)
     else:
-        connection = AsyncFakeOpenSearch()
+        engine = OPEN_ENGINES.setdefault(open_key, Engine())
+        connection = AsyncFakeOpenSearch(engine=engine)
         OPEN_ASYNC_INSTANCES[open_key] = connection
     return connection
 
@@ -66,6 +80,7 @@ def openmock(f):
     def wrapper(*args, **kwargs):
         OPEN_INSTANCES.clear()
         OPEN_ASYNC_INSTANCES.clear()
+        OPEN_ENGINES.clear()
         with (
             patch("opensearchpy.OpenSearch", _get_openmock),
             patch("opensearchpy.AsyncOpenSearch", _get_async_openmock),
@@ -86,6 +101,15 @@ def openmock(f):
                 "opensearchpy._async.transport.AsyncTransport.perform_request",
                 _fail_on_real_connection,
             ),
+            patch("opensearchpy.helpers.actions._ActionChunker", ActionChunker),
+            patch(
+                "opensearchpy.helpers.actions._process_bulk_chunk", process_bulk_chunk
+            ),
+            patch("opensearchpy._async.helpers.actions._ActionChunker", ActionChunker),
+            patch(
+                "opensearchpy._async.helpers.actions._process_bulk_chunk",
+                async_process_bulk_chunk,
+            ),
         ):
             return f(*args, **kwargs)
 
@@ -93,6 +117,7 @@ def openmock(f):
     async def async_wrapper(*args, **kwargs):
         OPEN_INSTANCES.clear()
         OPEN_ASYNC_INSTANCES.clear()
+        OPEN_ENGINES.clear()
         with (
             patch("opensearchpy.OpenSearch", _get_openmock),
             patch("opensearchpy.AsyncOpenSearch", _get_async_openmock),
@@ -113,6 +138,15 @@ def openmock(f):
                 "opensearchpy._async.transport.AsyncTransport.perform_request",
                 _fail_on_real_connection,
             ),
+            patch("opensearchpy.helpers.actions._ActionChunker", ActionChunker),
+            patch(
+                "opensearchpy.helpers.actions._process_bulk_chunk", process_bulk_chunk
+            ),
+            patch("opensearchpy._async.helpers.actions._ActionChunker", ActionChunker),
+            patch(
+                "opensearchpy._async.helpers.actions._process_bulk_chunk",
+                async_process_bulk_chunk,
+            ),
         ):
             return await f(*args, **kwargs)
 
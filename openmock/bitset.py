@@ -0,0 +1,105 @@
+"""
+Doc-id bitsets as Python ints
+
+Bit ``n`` is set when slot ``n`` of an index matches. Boolean queries combine
+clauses with ``&``, ``|`` and ``~`` on whole bitsets instead of checking one
+document at a time. Bitsets are built through a bytearray so that setting a
+bit doesn't copy the whole int.
+"""
+
+from typing import Iterable, Iterator
+
+# Positions of the set bits of every byte value
+_BYTE_BITS = [
+    tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)
+]
+
+
+def full(size: int) -> int:
+    """Bitset with the first ``size`` bits set"""
+    return (1 << size) - 1
+
+
+def from_slots(slots: Iterable[int], size: int) -> int:
+    """Bitset of the given slots, all below ``size``"""
+    buffer = bytearray((size + 7) >> 3)
+    for slot in slots:
+        buffer[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def iter_slots(bits: int) -> Iterator[int]:
+    """Set bits of a bitset, in ascending order"""
+    if not bits:
+        return
+    data = bits.to_bytes((bits.bit_length() + 7) >> 3, "little")
+    for index, value in enumerate(data):
+        if value:
+            base = index << 3
+            for bit in _BYTE_BITS[value]:
+                yield base + bit
+
+
+def count(bits: int) -> int:
+    """Number of set bits"""
+    return bits.bit_count()
+
+
+def at_least(bitsets: list[int], minimum: int) -> int:
+    """
+    Bits set in at least ``minimum`` of ``bitsets``.
+
+    The per-slot counts are kept bit-sliced: ``digits[i]`` holds bit ``i`` of
+    every slot's count, so each bitset is added with a ripple carry and the
+    comparison with ``minimum`` runs over whole bitsets too.
+    """
+    if minimum <= 0:
+        raise ValueError("minimum must be positive")
+    if minimum == 1:
+        result = 0
+        for bits in bitsets:
+            result |= bits
+        return result
+    if minimum > len(bitsets):
+        return 0
+    digits: list[int] = []
+    for bits in bitsets:
+        carry = bits
+        for index, digit in enumerate(digits):
+            digits[index] = digit ^ carry
+            carry &= digit
+            if not carry:
+                break
+        if carry:
+            digits.append(carry)
+    # Compare every count with ``minimum``, most significant digit first
+    greater, equal = 0, -1
+    for index in reversed(range(max(len(digits), minimum.bit_length()))):
+        digit = digits[index] if index < len(digits) else 0
+        if minimum >> index & 1:
+            equal &= digit
+        else:
+            greater |= equal & digit
+            equal &= ~digit
+    # ``minimum`` has a set bit, so ``equal`` no longer has infinite ones
+    return greater | equal
+
+
+class SlotSet:
+    """Read-only set view of a bitset, with constant time membership tests"""
+
+    __slots__ = ("bits", "_data")
+
+    def __init__(self, bits: int):
+        self.bits = bits
+        self._data = bits.to_bytes((bits.bit_length() + 7) >> 3, "little")
+
+    def __contains__(self, slot: int) -> bool:
+        index = slot >> 3
+        return index < len(self._data) and self._data[index] >> (slot & 7) & 1 == 1
+
+    def __iter__(self) -> Iterator[int]:
+        return iter_slots(self.bits)
+
+    def __len__(self) -> int:
+        return count(self.bits)
@@ -0,0 +1,245 @@
+"""
+Bulk request bodies, decoded one line at a time
+"""
+
+import json
+from collections.abc import Generator, Iterable, Iterator
+from typing import Any, Optional, Union
+
+from opensearchpy.exceptions import RequestError
+
+from openmock.shards import ShardedIndex
+from openmock.steps import run_steps
+from openmock.utilities import get_random_id
+
+_ACTIONS = ("index", "create", "update", "delete")
+# Items applied under one hold of a shard's write lock, letting searches in
+# between batches of a long bulk
+_WRITE_BATCH = 1000
+
+# Bytes searched for a line break at a time in a memoryview
+_CHUNK_SIZE = 64 * 1024
+
+
+def _str_lines(body: str) -> Iterator[str]:
+    start = 0
+    while start < len(body):
+        end = body.find("\n", start)
+        if end == -1:
+            end = len(body)
+        yield body[start:end]
+        start = end + 1
+
+
+def _bytes_lines(body: Union[bytes, bytearray]) -> Iterator[Union[bytes, bytearray]]:
+    start = 0
+    while start < len(body):
+        end = body.find(b"\n", start)
+        if end == -1:
+            end = len(body)
+        yield body[start:end]
+        start = end + 1
+
+
+def _memoryview_lines(body: memoryview) -> Iterator[bytes]:
+    # A memoryview can't be searched; chunks are copied into a buffer that
+    # never holds more than the current line and one chunk
+    if body.format != "B" or body.ndim != 1:
+        body = body.cast("B")
+    buffer = bytearray()
+    for offset in range(0, len(body), _CHUNK_SIZE):
+        searched = len(buffer)
+        buffer += body[offset : offset + _CHUNK_SIZE]
+        start = 0
+        end = buffer.find(b"\n", searched)
+        while end != -1:
+            yield bytes(buffer[start:end])
+            start = end + 1
+            end = buffer.find(b"\n", start)
+        del buffer[:start]
+    if buffer:
+        yield bytes(buffer)
+
+
+def _lines(body: Union[str, bytes, bytearray, memoryview]) -> Iterator[Any]:
+    if isinstance(body, str):
+        return _str_lines(body)
+    if isinstance(body, (bytes, bytearray)):
+        return _bytes_lines(body)
+    return _memoryview_lines(body)
+
+
+def iter_bulk_items(body: Any) -> Iterator[dict[str, Any]]:
+    """
+    The decoded action and source lines of a bulk body, one at a time. The
+    body is NDJSON as ``str``, ``bytes``, ``bytearray`` or ``memoryview``, or
+    any iterable of lines, NDJSON chunks or already decoded dicts. Only one
+    line is decoded at a time, the body is never split as a whole.
+    """
+    if isinstance(body, (str, bytes, bytearray, memoryview)):
+        items: Iterable[Any] = [body]
+    elif isinstance(body, Iterable) and not isinstance(body, dict):
+        items = body
+    else:
+        raise TypeError(
+            "bulk body must be str, bytes, bytearray, memoryview or an iterable"
+        )
+    for item in items:
+        if isinstance(item, (str, bytes, bytearray, memoryview)):
+            for line in _lines(item):
+                if line.strip():
+                    yield json.loads(line)
+        elif isinstance(item, dict):
+            yield item
+        else:
+            raise TypeError(f"bulk body items must be str, bytes or dict, not {item!r}")
+
+
+def execute_bulk(
+    body: Any,
+    indices: dict[str, ShardedIndex],
+    index: Optional[str] = None,
+) -> dict[str, Any]:
+    """
+    Apply the actions of a bulk body to the shards of their indices, each
+    item to the shard its ``routing`` or ``_id`` hashes to. The document an
+    item targets is looked up once and a successful item makes a single
+    store write. The write lock of a shard is held across a run of items on
+    it, up to ``_WRITE_BATCH`` of them, and sequence numbers are assigned
+    under it.
+    """
+    return run_steps(execute_bulk_steps(body, indices, index))
+
+
+# pylint: disable=too-many-statements
+def execute_bulk_steps(
+    body: Any,
+    indices: dict[str, ShardedIndex],
+    index: Optional[str] = None,
+    step: Optional[int] = None,
+) -> Generator[None, None, dict[str, Any]]:
+    """
+    ``execute_bulk`` as a generator pausing every ``step`` items, with no
+    lock held, and returning the response
+    """
+    items: list[dict[str, Any]] = []
+    errors = False
+    held = None
+    batch = 0
+
+    def hold(store):
+        nonlocal held, batch
+        if store is not held or batch == _WRITE_BATCH:
+            release()
+            store.lock.acquire_write()
+            held, batch = store, 0
+        batch += 1
+
+    def release():
+        nonlocal held
+        if held is not None:
+            held.lock.release_write()
+            held = None
+
+    it = iter_bulk_items(body)
+    try:
+        for line in it:
+            action = next((action for action in _ACTIONS if action in line), None)
+            if action is None:
+                continue
+            if step is not None and items and len(items) % step == 0:
+                release()
+                yield
+            meta = line[action]
+            name = meta.get("_index") or index
+            doc_type = meta.get("_type", "_doc")
+
+            if name is None:
+                raise RequestError(
+                    400, "action_request_validation_exception", "index is missing"
+                )
+            if action in ("delete", "update") and not meta.get("_id"):
+                raise RequestError(
+                    400, "action_request_validation_exception", "missing id"
+                )
+            document_id = meta["_id"] if "_id" in meta else get_random_id()
+            routing = meta.get("routing", meta.get("_routing"))
+
+            item = {
+                "_type": doc_type,
+                "_id": document_id,
+                "_index": name,
+                "_version": 1,
+            }
+            items.append({action: item})
+
+            if action == "delete":
+                target = indices.get(name)
+                store = None
+                if target is not None:
+                    store = target.shard(document_id, routing)
+                    hold(store)
+                if store is None or store.remove(document_id) is None:
+                    errors = True
+                    item.update(status=404, error="not_found")
+                else:
+                    store.next_seq_no()
+                    item.update(status=200, result="deleted")
+                continue
+
+            # Every other action takes its source from the next line
+            try:
+                source = next(it)
+            except StopIteration as exc:
+                raise RequestError(
+                    400, "action_request_validation_exception", "missing source"
+                ) from exc
+            if action == "update" and "doc" in source:
+                source = source["doc"]
+
+            target = indices.get(name)
+            if target is None:
+                target = indices.setdefault(name, ShardedIndex())
+            store = target.shard(document_id, routing)
+            hold(store)
+            existing = store.get(document_id)
+            if existing is None:
+                if action == "update":
+                    errors = True
+                    item.update(status=404, error="document_missing_exception")
+                    continue
+                item.update(status=201, result="created")
+            elif action == "create":
+                errors = True
+                item.update(status=409, error="version_conflict_engine_exception")
+                continue
+            else:
+                item.update(status=200, result="updated")
+                if action == "update":
+                    merged = {**existing["_source"], **source}
+                    if merged == existing["_source"]:
+                        item.update(result="noop", _version=existing["_version"])
+                        continue
+                    source = merged
+                item["_version"] = existing["_version"] + 1
+
+            document = {
+                "_type": doc_type,
+                "_id": document_id,
+                "_source": source,
+                "_index": name,
+                "_version": item["_version"],
+                "_seq_no": store.next_seq_no(),
+                "_primary_term": 1,
+            }
+            if routing is not None:
+                document["_routing"] = str(routing)
+            if action == "update":
+                # Updated in place, as Engine.update does
+                store.replace(document)
+            else:
+                store.append(document)
+    finally:
+        release()
+
+    return {"errors": errors, "items": items}
@@ -0,0 +1,149 @@
+"""
+Per-index caches invalidated by index writes
+"""
+
+import copy
+import json
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+# OpenSearch caps the node query cache at 10000 entries
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+# pylint: disable=too-many-instance-attributes
+class GenerationCache:
+    """
+    LRU cache bound by entry count and memory, holding values computed for one
+    write generation of an index. The first lookup after a write drops every
+    entry at once, so writes themselves only bump the generation.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.generation: Optional[int] = None
+        self.memory_size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Entries ever stored, evicted or not
+        self.cached = 0
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        # Searches reading the same index share the cache
+        self._mutex = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, generation: int) -> Optional[Any]:
+        """The value cached for ``key`` at this generation, or None"""
+        with self._mutex:
+            self._sync(generation)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, generation: int, value: Any, size: int = 0) -> None:
+        """Cache ``value`` for ``key``, evicting least recently used entries"""
+        with self._mutex:
+            self._sync(generation)
+            if size > self.max_bytes:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.memory_size -= previous[1]
+            self._entries[key] = (value, size)
+            self.memory_size += size
+            self.cached += 1
+            while (
+                len(self._entries) > self.max_entries
+                or self.memory_size > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.memory_size -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the counters"""
+        self._entries.clear()
+        self.memory_size = 0
+
+    def _sync(self, generation):
+        if generation != self.generation:
+            self.clear()
+            self.generation = generation
+
+
+class FilterCache(GenerationCache):
+    """Doc-id bitsets of filter clauses, the fake's node query cache"""
+
+    def put_bits(self, key: Hashable, generation: int, bits: int) -> None:
+        """Cache the bitset of a filter clause"""
+        self.put(key, generation, bits, sys.getsizeof(bits))
+
+    def stats(self) -> dict[str, int]:
+        """The ``query_cache`` section of index stats"""
+        return {
+            "memory_size_in_bytes": self.memory_size,
+            "total_count": self.hits + self.misses,
+            "hit_count": self.hits,
+            "miss_count": self.misses,
+            "cache_size": len(self),
+            "cache_count": self.cached,
+            "evictions": self.evictions,
+        }
+
+
+class RequestCache(GenerationCache):
+    """Whole responses of ``size: 0`` searches, the fake's shard request cache"""
+
+    def get_response(self, key: Hashable, generation: int) -> Optional[dict]:
+        """A copy of the cached response, or None"""
+        response = self.get(key, generation)
+        return copy.deepcopy(response) if response is not None else None
+
+    def put_response(self, key: Hashable, generation: int, response: dict) -> None:
+        """Cache a copy of a search response"""
+        size = len(json.dumps(response, default=str))
+        self.put(key, generation, copy.deepcopy(response), size)
+
+    def stats(self) -> dict[str, int]:
+        """The ``request_cache`` section of index stats"""
+        return {
+            "memory_size_in_bytes": self.memory_size,
+            "evictions": self.evictions,
+            "hit_count": self.hits,
+            "miss_count": self.misses,
+        }
+
+
+def request_cache_key(body, params, enabled: bool) -> Optional[str]:
+    """
+    Request cache key of a search, the normalized body and parameters; None
+    when the search can't be cached. Like OpenSearch, only ``size: 0``
+    searches are cached, and the ``request_cache`` parameter overrides the
+    index setting.
+    """
+    requested = params.get("request_cache")
+    if requested is not None:
+        enabled = str(requested).lower() == "true"
+    if not enabled or "scroll" in params or (body and body.get("profile")):
+        return None
+    size = params.get("size", (body or {}).get("size"))
+    if size is None or int(size) != 0:
+        return None
+    # Parameters such as terminate_after change the response too
+    options = {name: value for name, value in params.items() if name != "request_cache"}
+    return json.dumps([body, options], sort_keys=True, default=str)
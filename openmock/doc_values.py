@@ -0,0 +1,409 @@
+"""
+Sorted doc-values columns for range queries and sorting
+"""
+
+import datetime
+import heapq
+import math
+import operator
+import threading
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from openmock.query_compiler import MISSING, resolve_path
+
+NUMBER = "number"
+STRING = "string"
+DATE = "date"
+DATETIME = "datetime"
+DATETIME_TZ = "datetime_tz"
+
+# Pending writes are merged into the sorted arrays once they pass this share
+MERGE_RATIO = 16
+MIN_MERGE = 64
+
+
+def value_domain(value) -> Optional[str]:
+    """
+    The group of mutually comparable values a stored value belongs to, or
+    None for values that can't be ordered (objects, lists, NaN)
+    """
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        return NUMBER
+    if isinstance(value, str):
+        return STRING
+    if isinstance(value, datetime.datetime):
+        return DATETIME if value.tzinfo is None else DATETIME_TZ
+    if isinstance(value, datetime.date):
+        return DATE
+    return None
+
+
+def bound_for_domain(domain, bound, parse_date):
+    """
+    The bound comparable with values of ``domain``, or MISSING when no value of
+    the domain can be compared with it
+    """
+    if domain == NUMBER:
+        return bound if isinstance(bound, (int, float)) else MISSING
+    if domain == STRING:
+        return bound if isinstance(bound, str) else MISSING
+    if domain in (DATETIME, DATETIME_TZ):
+        if isinstance(bound, str):
+            bound = parse_date(bound)
+        if not isinstance(bound, datetime.datetime):
+            return MISSING
+        aware = bound.tzinfo is not None
+        return bound if aware == (domain == DATETIME_TZ) else MISSING
+    if domain == DATE:
+        is_date = isinstance(bound, datetime.date)
+        return (
+            bound if is_date and not isinstance(bound, datetime.datetime) else MISSING
+        )
+    return MISSING
+
+
+class SortKey:
+    """
+    Sort key of a document over several fields, each ascending or descending,
+    documents without a value last in both directions
+    """
+
+    __slots__ = ("values", "descending")
+
+    def __init__(self, values: tuple, descending: tuple):
+        self.values = values
+        self.descending = descending
+
+    def __lt__(self, other: "SortKey") -> bool:
+        for value, other_value, descending in zip(
+            self.values, other.values, self.descending
+        ):
+            if value is MISSING or other_value is MISSING:
+                if value is other_value:
+                    continue
+                return other_value is MISSING
+            if value == other_value:
+                continue
+            return value > other_value if descending else value < other_value
+        return False
+
+    def __eq__(self, other: object) -> bool:
+        # Heaps compare ``(key, position)`` tuples, which check ``==`` first
+        if not isinstance(other, SortKey):
+            return NotImplemented
+        return not self < other and not other < self
+
+    __hash__ = None  # type: ignore[assignment]
+
+
+def sort_values(document, sort_keys: list[tuple[tuple, bool]]) -> list:
+    """The ``sort`` values of a hit, None where the document has no value"""
+    source = document["_source"]
+    values = []
+    for path, _ in sort_keys:
+        value = resolve_path(source, path)
+        values.append(None if value is MISSING else value)
+    return values
+
+
+def _sort_key(values, sort_keys) -> SortKey:
+    return SortKey(
+        tuple(MISSING if value is None else value for value in values),
+        tuple(descending for _, descending in sort_keys),
+    )
+
+
+def sort_documents(
+    documents, sort_keys: list[tuple[tuple, bool]], limit: Optional[int] = None
+) -> list[dict[str, Any]]:
+    """
+    Stable sort of documents by ``(path, descending)`` keys, primary key first.
+    With a ``limit`` smaller than the number of documents only the first
+    ``limit`` are selected, through a bounded heap.
+    """
+
+    def sort_key(document):
+        return _sort_key(sort_values(document, sort_keys), sort_keys)
+
+    if limit is not None and limit < len(documents):
+        return heapq.nsmallest(limit, documents, key=sort_key)
+    return sorted(documents, key=sort_key)
+
+
+def search_after_filter(
+    sort_keys: list[tuple[tuple, bool]],
+    search_after: list,
+    tiebreak: Optional[Callable[[dict[str, Any]], int]] = None,
+) -> Callable[[dict[str, Any]], bool]:
+    """
+    Predicate of the documents sorting after the ``search_after`` values.
+    When ``tiebreak`` numbers the documents, ``search_after`` may end with a
+    tiebreaker value past which documents with equal sort values are kept;
+    otherwise they are all skipped.
+    """
+    values = list(search_after)
+    tiebreaker = None
+    if tiebreak is not None and len(values) == len(sort_keys) + 1:
+        tiebreaker = values.pop()
+    if len(values) != len(sort_keys):
+        raise ValueError(
+            f"search_after has {len(values)} value(s) but sort has {len(sort_keys)}"
+        )
+    bound = _sort_key(values, sort_keys)
+
+    def follows(document):
+        key = _sort_key(sort_values(document, sort_keys), sort_keys)
+        if bound < key:
+            return True
+        if tiebreaker is None or key < bound:
+            return False
+        return tiebreak(document) > tiebreaker
+
+    return follows
+
+
+class _Column:
+    """Keys of one domain in ascending order, with the slot of each key"""
+
+    __slots__ = ("keys", "slots")
+
+    def __init__(self, entries: list[tuple[Any, int]]):
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.slots = [slot for _, slot in entries]
+
+
+# Columns by domain, buffered entries by slot, and the slots dropped since
+_State = tuple[dict[str, _Column], dict[int, tuple[str, Any]], set[int]]
+
+
+class DocValues:
+    """
+    Sorted column of one field. Scalar values are kept per comparable domain
+    (numbers, strings, dates...) in sorted arrays that ranges bisect into.
+    Writes are buffered and merged in batches; slots holding values that
+    can't be ordered (range objects, lists) are tracked apart.
+
+    Searches merge too, holding only the read lock of their index, so a
+    merge builds new columns and swaps them in with the emptied buffers as
+    one ``(columns, pending, dead)`` state, under its own mutex. Readers take
+    the state once and never see it change under them.
+    """
+
+    __slots__ = ("path", "_state", "_mutex", "unordered")
+
+    def __init__(self, path: tuple, documents: Iterable[tuple[int, Any]]):
+        self.path = path
+        self.unordered: set[int] = set()
+        entries: dict[str, list[tuple[Any, int]]] = {}
+        for slot, document in documents:
+            entry = self._entry(slot, document)
+            if entry is not None:
+                entries.setdefault(entry[0], []).append((entry[1], slot))
+        columns = {domain: _Column(items) for domain, items in entries.items()}
+        pending: dict[int, tuple[str, Any]] = {}
+        self._state: _State = (columns, pending, set())
+        self._mutex = threading.Lock()
+
+    def add(self, slot: int, document: dict[str, Any]) -> None:
+        """Record the field of a document stored at ``slot``"""
+        # Writers hold the write lock, no reader is looking at the buffers
+        entry = self._entry(slot, document)
+        if entry is not None:
+            self._state[1][slot] = entry
+
+    def discard(self, slot: int) -> None:
+        """Forget whatever value ``slot`` held"""
+        _, pending, dead = self._state
+        pending.pop(slot, None)
+        self.unordered.discard(slot)
+        dead.add(slot)
+
+    def range_slots(self, bounds, parse_date) -> set[int]:
+        """
+        Slots whose value satisfies every ``(operator, bound)`` pair. String
+        bounds of date columns are converted with ``parse_date``, once.
+        """
+        columns, pending, dead = self._maybe_merge()
+        domain_bounds = self._bounds_by_domain(columns, pending, bounds, parse_date)
+        result = set()
+        for column, low, high in self._spans(columns, domain_bounds):
+            result.update(column.slots[low:high])
+        if dead:
+            result -= dead
+        for slot, (domain, key) in pending.items():
+            if domain_bounds[domain] is not None and all(
+                compare(key, bound) for compare, bound in domain_bounds[domain]
+            ):
+                result.add(slot)
+        return result
+
+    def range_count(self, bounds, parse_date) -> int:
+        """Upper bound of the number of slots :meth:`range_slots` returns"""
+        columns, pending, _ = self._maybe_merge()
+        domain_bounds = self._bounds_by_domain(columns, pending, bounds, parse_date)
+        spans = self._spans(columns, domain_bounds)
+        return sum(high - low for _, low, high in spans) + len(pending)
+
+    def _bounds_by_domain(self, columns, pending, bounds, parse_date):
+        domains = set(columns)
+        domains.update(domain for domain, _ in pending.values())
+        return {
+            domain: self._domain_bounds(domain, bounds, parse_date)
+            for domain in domains
+        }
+
+    @staticmethod
+    def _spans(columns, domain_bounds):
+        spans = []
+        for domain, column in columns.items():
+            if domain_bounds[domain] is None:
+                continue
+            low, high = 0, len(column.keys)
+            for compare, bound in domain_bounds[domain]:
+                if compare is operator.gt:
+                    low = max(low, bisect_right(column.keys, bound))
+                elif compare is operator.ge:
+                    low = max(low, bisect_left(column.keys, bound))
+                elif compare is operator.lt:
+                    high = min(high, bisect_left(column.keys, bound))
+                else:
+                    high = min(high, bisect_right(column.keys, bound))
+            if low < high:
+                spans.append((column, low, high))
+        return spans
+
+    def order(
+        self,
+        slots,
+        descending: bool,
+        after: Optional[tuple[Any, Optional[int]]] = None,
+        limit: Optional[int] = None,
+    ) -> Optional[list[int]]:
+        """
+        ``slots`` ordered by the column, equal values by slot and documents
+        without a value last; None if their values can't be ordered together.
+
+        With ``after``, a ``(value, slot)`` position, the walk seeks straight
+        past it: past every slot holding ``value`` when its slot is None. It
+        stops once ``limit`` slots are found.
+        """
+        columns, _, _ = self._merge()
+        if len(columns) > 1 or any(slot in slots for slot in self.unordered):
+            return None
+        column = next(iter(columns.values()), None)
+        if after is not None and after[0] is not None and column is not None:
+            if value_domain(after[0]) != value_domain(column.keys[0]):
+                return None
+        ordered: list[int] = []
+        if column is not None and (after is None or after[0] is not None):
+            ordered = list(islice(self._walk(column, slots, descending, after), limit))
+        if (limit is None or len(ordered) < limit) and (
+            after is not None or len(ordered) < len(slots)
+        ):
+            # Documents without a value follow in slot order
+            valued = set(column.slots) if column is not None else set()
+            missing = (slot for slot in slots if slot not in valued)
+            if after is not None and after[0] is None:
+                after_slot = after[1]
+                missing = (
+                    slot
+                    for slot in missing
+                    if after_slot is not None and slot > after_slot
+                )
+            remaining = None if limit is None else limit - len(ordered)
+            ordered.extend(islice(sorted(missing), remaining))
+        return ordered
+
+    @staticmethod
+    def _walk(column: _Column, slots, descending: bool, after=None) -> Iterator[int]:
+        keys, column_slots = column.keys, column.slots
+        low = high = tied = 0
+        if after is not None:
+            value, after_slot = after
+            low = bisect_left(keys, value)
+            high = bisect_right(keys, value, low)
+            # Equal keys are stored by slot, past ``after_slot`` is a bisect too
+            tied = (
+                high
+                if after_slot is None
+                else bisect_right(column_slots, after_slot, low, high)
+            )
+        if not descending:
+            start = 0 if after is None else tied
+            for position in range(start, len(column_slots)):
+                slot = column_slots[position]
+                if slot in slots:
+                    yield slot
+            return
+        # Equal keys keep insertion order, as a stable sort would
+        end = len(keys)
+        if after is not None:
+            for slot in column_slots[tied:high]:
+                if slot in slots:
+                    yield slot
+            end = low
+        while end > 0:
+            start = bisect_left(keys, keys[end - 1], 0, end)
+            for slot in column_slots[start:end]:
+                if slot in slots:
+                    yield slot
+            end = start
+
+    def _entry(self, slot, document):
+        value = resolve_path(document["_source"], self.path)
+        if value is MISSING or value is None:
+            return None
+        domain = value_domain(value)
+        if domain is None:
+            self.unordered.add(slot)
+            return None
+        return domain, value
+
+    @staticmethod
+    def _domain_bounds(domain, bounds, parse_date):
+        domain_bounds = []
+        for compare, bound in bounds:
+            bound = bound_for_domain(domain, bound, parse_date)
+            if bound is MISSING:
+                return None
+            domain_bounds.append((compare, bound))
+        return domain_bounds
+
+    def _maybe_merge(self):
+        """The state to read, merged first once the buffers grew large enough"""
+        state = self._state
+        columns, pending, dead = state
+        size = sum(len(column.keys) for column in columns.values())
+        if len(pending) + len(dead) > max(MIN_MERGE, size // MERGE_RATIO):
+            return self._merge()
+        return state
+
+    def _merge(self):
+        """The state to read with every buffered write merged"""
+        state = self._state
+        if not state[1] and not state[2]:
+            return state
+        with self._mutex:
+            # Another reader may have merged while this one waited
+            columns, pending, dead = state = self._state
+            if not pending and not dead:
+                return state
+            entries: dict[str, list[tuple[Any, int]]] = {}
+            for domain, column in columns.items():
+                entries[domain] = [
+                    (key, slot)
+                    for key, slot in zip(column.keys, column.slots)
+                    if slot not in dead
+                ]
+            for slot, (domain, key) in pending.items():
+                entries.setdefault(domain, []).append((key, slot))
+            merged = {
+                domain: _Column(items) for domain, items in entries.items() if items
+            }
+            self._state = state = (merged, {}, set())
+        return state
@@ -0,0 +1,576 @@
+"""
+Per-index document storage
+"""
+
+import operator
+import sys
+import threading
+from collections.abc import Mapping
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, Optional, cast
+
+from openmock import bitset
+from openmock.caches import FilterCache, RequestCache
+from openmock.doc_values import DocValues, sort_documents
+from openmock.interning import StringInterner
+from openmock.locking import ReadWriteLock, locked
+from openmock.query_compiler import MISSING, QueryNode, resolve_path, term_key
+from openmock.utilities import get_index_setting
+
+# Same default as Lucene's TieredMergePolicy
+DEFAULT_DELETES_PCT_ALLOWED = 33.0
+
+
+class DocumentRecord(Mapping):
+    """
+    A stored document, read like the metadata dict it replaces. The fields
+    live in slots, ``_index`` and ``_type`` are interned, and
+    ``_primary_term``, always 1, isn't stored at all. ``_routing`` is only
+    set for documents indexed with a custom routing. Records can't be
+    changed; responses are built from them with ``{**record, ...}``.
+    """
+
+    __slots__ = ("_type", "_id", "_source", "_index", "_version", "_seq_no", "_routing")
+
+    # Keys of the mappings a record can stand for
+    _KEYS = frozenset(__slots__) | {"_primary_term"}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return _RECORD_GETTERS[key](self)
+        except (KeyError, AttributeError):
+            raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.__slots__:
+            if hasattr(self, key):
+                yield key
+        yield "_primary_term"
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    @classmethod
+    def of(cls, document: Mapping) -> Mapping:
+        """
+        The record of a document given as a mapping, or the mapping itself
+        when it holds more than a record can
+        """
+        if isinstance(document, DocumentRecord):
+            return document
+        if document.get("_primary_term", 1) != 1 or not document.keys() <= cls._KEYS:
+            return document
+        record = cls.__new__(cls)
+        for key, value in document.items():
+            setter = _RECORD_SETTERS.get(key)
+            if setter is None:
+                continue
+            if key in ("_index", "_type") and isinstance(value, str):
+                value = sys.intern(str.__str__(value))
+            setter(record, value)
+        return record
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+
+# Slot reads by key, in C, as document["_source"] is on every query's hot path
+_RECORD_GETTERS: dict[str, Callable[[DocumentRecord], Any]] = {
+    key: operator.attrgetter(key) for key in DocumentRecord.__slots__
+}
+# Slot writes that bypass the read-only __setattr__, for building records
+_RECORD_SETTERS: dict[str, Callable[[DocumentRecord, Any], None]] = {
+    key: vars(DocumentRecord)[key].__set__ for key in DocumentRecord.__slots__
+}
+_RECORD_GETTERS["_primary_term"] = lambda record: 1
+
+
+class TermIndex:
+    """Postings of one field: stored term -> slots, and the slots holding a value"""
+
+    __slots__ = ("path", "ignore_case", "postings", "present")
+
+    def __init__(self, path: tuple, ignore_case: bool):
+        self.path = path
+        self.ignore_case = ignore_case
+        self.postings: dict[Any, set[int]] = {}
+        self.present: set[int] = set()
+
+    def add(self, slot: int, document: dict[str, Any]) -> None:
+        """Index the field of a document stored at ``slot``"""
+        values = self._values(document)
+        for value in values:
+            key = term_key(value, self.ignore_case)
+            self.postings.setdefault(key, set()).add(slot)
+        if any(value is not None for value in values):
+            self.present.add(slot)
+
+    def discard(self, slot: int, document: dict[str, Any]) -> None:
+        """Forget the field of a document leaving ``slot``"""
+        for value in self._values(document):
+            key = term_key(value, self.ignore_case)
+            posting = self.postings.get(key)
+            if posting is not None:
+                posting.discard(slot)
+                if not posting:
+                    del self.postings[key]
+        self.present.discard(slot)
+
+    def _values(self, document):
+        value = resolve_path(document["_source"], self.path)
+        if value is MISSING:
+            return ()
+        if isinstance(value, list):
+            return value
+        return (value,)
+
+
+# pylint: disable=too-many-instance-attributes
+class DocumentStore:
+    """
+    Documents of one index, segment style.
+
+    Documents are kept as :class:`DocumentRecord` in a slot list, and an
+    ``_id`` -> slot table is kept alongside. Deletes and overwrites only leave a tombstone (``None``) in the
+    old slot; the slot list is compacted once tombstones exceed
+    ``deletes_pct_allowed`` percent of it, or on :meth:`compact`.
+
+    Term postings and sorted doc-values columns are built per field the first
+    time a query or sort asks for them and are kept up to date by every write
+    after that. Every write also bumps ``generation``, which invalidates the
+    filter and request caches.
+
+    :meth:`snapshot` freezes the index for point-in-time searches without
+    copying it: the snapshot shares the slot list, the ``_id`` table and the
+    built postings and columns, and the next write to the index copies the
+    first two and starts over with the others.
+    """
+
+    def __init__(self, deletes_pct_allowed: float = DEFAULT_DELETES_PCT_ALLOWED):
+        self.deletes_pct_allowed = float(deletes_pct_allowed)
+        self.deleted = 0
+        # Sequence numbers are handed out per shard, under its write lock
+        self.max_seq_no = -1
+        self._slots: list[Optional[dict[str, Any]]] = []
+        self._ids: dict[Any, int] = {}
+        self._term_indexes: dict[tuple, TermIndex] = {}
+        self._doc_values: dict[tuple, DocValues] = {}
+        self._live: Optional[int] = None
+        self.generation = 0
+        self.filter_cache = FilterCache()
+        self.filter_cache_enabled = True
+        self.request_cache = RequestCache()
+        self.request_cache_enabled = True
+        # Shares the strings of ingested sources, off unless the index asks
+        self.interner: Optional[StringInterner] = None
+        # Whether a snapshot shares the slot list and lookup structures
+        self._shared = False
+        # Writers hold it for writing, searches and gets for reading
+        self.lock = ReadWriteLock()
+        # Searches build postings, columns and the live bitset on first use
+        # holding only the read lock, or no lock at all on a snapshot; the
+        # builds take this mutex, shared with snapshots of the same storage
+        self._build_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings: Optional[dict[str, Any]]) -> "DocumentStore":
+        """Create a store configured from an index settings body"""
+        store = cls()
+        store.configure(settings)
+        return store
+
+    def configure(self, settings: Optional[dict[str, Any]]) -> None:
+        """Apply the index settings the store understands"""
+        deletes_pct_allowed = get_index_setting(
+            settings, "merge.policy.deletes_pct_allowed"
+        )
+        if deletes_pct_allowed is not None:
+            self.deletes_pct_allowed = float(deletes_pct_allowed)
+        cache_enabled = get_index_setting(settings, "queries.cache.enabled")
+        if cache_enabled is not None:
+            self.filter_cache_enabled = str(cache_enabled).lower() != "false"
+            if not self.filter_cache_enabled:
+                self.filter_cache.clear()
+        request_cache_enabled = get_index_setting(settings, "requests.cache.enable")
+        if request_cache_enabled is not None:
+            self.request_cache_enabled = str(request_cache_enabled).lower() != "false"
+        interning = get_index_setting(settings, "openmock.interning.enabled")
+        if interning is not None:
+            if str(interning).lower() == "false":
+                self.interner = None
+            elif self.interner is None:
+                self.interner = StringInterner()
+        if self.interner is not None:
+            max_entries = get_index_setting(settings, "openmock.interning.max_entries")
+            if max_entries is not None:
+                self.interner.max_entries = int(max_entries)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return (document for document in self._slots if document is not None)
+
+    def __len__(self) -> int:
+        return len(self._slots) - self.deleted
+
+    def get(self, doc_id: Any) -> Optional[dict[str, Any]]:
+        """Return the stored document with this id, or None"""
+        slot = self._ids.get(doc_id)
+        if slot is None:
+            return None
+        return self._slots[slot]
+
+    def next_seq_no(self) -> int:
+        """The sequence number of the next write to the store"""
+        self.max_seq_no += 1
+        return self.max_seq_no
+
+    def document(self, slot: int) -> Optional[dict[str, Any]]:
+        """Return the document at a slot, None for a tombstone"""
+        return self._slots[slot]
+
+    def slot(self, doc_id: Any) -> Optional[int]:
+        """Slot of the document with this id, or None"""
+        return self._ids.get(doc_id)
+
+    def snapshot(self) -> "DocumentStore":
+        """A frozen view of the index as it is now, sharing its storage"""
+        snapshot = DocumentStore(self.deletes_pct_allowed)
+        snapshot.deleted = self.deleted
+        snapshot.max_seq_no = self.max_seq_no
+        snapshot._slots = self._slots
+        snapshot._ids = self._ids
+        snapshot._term_indexes = self._term_indexes
+        snapshot._doc_values = self._doc_values
+        snapshot._live = self._live
+        snapshot.generation = self.generation
+        snapshot.filter_cache_enabled = self.filter_cache_enabled
+        snapshot.request_cache_enabled = self.request_cache_enabled
+        snapshot._build_lock = self._build_lock
+        snapshot._shared = self._shared = True
+        return snapshot
+
+    def append(self, document: dict[str, Any]) -> None:
+        """Store a document after all the others, replacing any with the same id"""
+        self._detach()
+        document = self._record(document)
+        doc_id = document["_id"]
+        if doc_id in self._ids:
+            self._tombstone(self._ids[doc_id])
+        slot = len(self._slots)
+        self._ids[doc_id] = slot
+        self._slots.append(document)
+        self._live = None
+        self.generation += 1
+        for term_index in self._term_indexes.values():
+            term_index.add(slot, document)
+        for doc_values in self._doc_values.values():
+            doc_values.add(slot, document)
+        self._maybe_compact()
+
+    def replace(self, document: dict[str, Any]) -> None:
+        """Swap in a new version of a stored document, keeping its position"""
+        self._detach()
+        document = self._record(document)
+        slot = self._ids[document["_id"]]
+        stored = cast(dict[str, Any], self._slots[slot])
+        for term_index in self._term_indexes.values():
+            term_index.discard(slot, stored)
+            term_index.add(slot, document)
+        for doc_values in self._doc_values.values():
+            doc_values.discard(slot)
+            doc_values.add(slot, document)
+        self._slots[slot] = document
+        self.generation += 1
+
+    def remove(self, doc_id: Any) -> Optional[dict[str, Any]]:
+        """Remove and return the document with this id, or None"""
+        if doc_id not in self._ids:
+            return None
+        self._detach()
+        slot = self._ids.pop(doc_id)
+        document = self._slots[slot]
+        self._tombstone(slot)
+        self._maybe_compact()
+        return document
+
+    def compact(self) -> None:
+        """Drop all tombstones, keeping live documents in order"""
+        if not self.deleted:
+            return
+        self._detach()
+        self._slots = [document for document in self._slots if document is not None]
+        live = cast(list[dict[str, Any]], self._slots)
+        self._ids = {document["_id"]: slot for slot, document in enumerate(live)}
+        self.deleted = 0
+        self._live = None
+        self.generation += 1
+        # Slots were renumbered, postings and columns get rebuilt on next use
+        self._term_indexes = {}
+        self._doc_values = {}
+
+    def term_index(self, path: tuple, ignore_case: bool) -> TermIndex:
+        """Postings of a field, built on first use"""
+        term_index = self._term_indexes.get((path, ignore_case))
+        if term_index is not None:
+            return term_index
+        with self._build_lock:
+            term_index = self._term_indexes.get((path, ignore_case))
+            if term_index is None:
+                term_index = TermIndex(path, ignore_case)
+                for slot, document in enumerate(self._slots):
+                    if document is not None:
+                        term_index.add(slot, document)
+                self._term_indexes[(path, ignore_case)] = term_index
+        return term_index
+
+    def doc_values(self, path: tuple) -> DocValues:
+        """Sorted column of a field, built on first use"""
+        doc_values = self._doc_values.get(path)
+        if doc_values is not None:
+            return doc_values
+        with self._build_lock:
+            doc_values = self._doc_values.get(path)
+            if doc_values is None:
+                doc_values = DocValues(
+                    path,
+                    (
+                        (slot, document)
+                        for slot, document in enumerate(self._slots)
+                        if document is not None
+                    ),
+                )
+                self._doc_values[path] = doc_values
+        return doc_values
+
+    def id_slots(self, doc_ids) -> set[int]:
+        """Slots of the given document ids that exist"""
+        return {self._ids[doc_id] for doc_id in doc_ids if doc_id in self._ids}
+
+    def live(self) -> int:
+        """Bitset of the slots holding a live document"""
+        live = self._live
+        if live is not None:
+            return live
+        with self._build_lock:
+            if self._live is None:
+                if self.deleted:
+                    self._live = self.bitset(
+                        slot
+                        for slot, document in enumerate(self._slots)
+                        if document is not None
+                    )
+                else:
+                    self._live = bitset.full(len(self._slots))
+            return self._live
+
+    def bitset(self, slots: Iterable[int]) -> int:
+        """Bitset of the given slots"""
+        return bitset.from_slots(slots, len(self._slots))
+
+    def scan(
+        self, predicates: list[Callable[[dict[str, Any]], bool]], candidates=None
+    ) -> list[int]:
+        """
+        Bitsets of the documents each predicate accepts, filled in a single
+        pass over the ``candidates`` bitset (every live document when None)
+        """
+        if candidates is None:
+            candidates = self.live()
+        size = (len(self._slots) + 7) >> 3
+        buffers = [bytearray(size) for _ in predicates]
+        # Candidates are live, their slots hold documents
+        documents = cast(list[dict[str, Any]], self._slots)
+        for slot in bitset.iter_slots(candidates):
+            document = documents[slot]
+            for buffer, predicate in zip(buffers, predicates):
+                if predicate(document):
+                    buffer[slot >> 3] |= 1 << (slot & 7)
+        return [int.from_bytes(buffer, "little") for buffer in buffers]
+
+    def filter_bits(self, key: str, query: QueryNode) -> int:
+        """
+        Bitset of a filter clause, through the filter cache under ``key``, the
+        normalized clause
+        """
+        if self.filter_cache_enabled:
+            bits = self.filter_cache.get(key, self.generation)
+            if bits is not None:
+                return bits
+        bits = query.docs(self)
+        if bits is None:
+            (bits,) = self.scan([query.matches])
+        if self.filter_cache_enabled:
+            self.filter_cache.put_bits(key, self.generation, bits)
+        return bits
+
+    def stats(self) -> dict[str, Any]:
+        """The ``docs``, cache and interning sections of index stats"""
+        stats = {
+            "docs": {"count": len(self), "deleted": self.deleted},
+            "query_cache": self.filter_cache.stats(),
+            "request_cache": self.request_cache.stats(),
+        }
+        if self.interner is not None:
+            stats["string_interning"] = self.interner.stats()
+        return stats
+
+    def matching(self, query: QueryNode) -> int:
+        """Bitset of the live documents matching a compiled query"""
+        bits = query.docs(self)
+        if bits is None:
+            (bits,) = self.scan([query.matches])
+        return bits
+
+    def count(self, query: QueryNode, limit: Optional[int] = None) -> int:
+        """
+        Number of live documents matching a compiled query, up to ``limit``,
+        from the indexes when they answer it, else from a scan that keeps
+        nothing per document and stops at ``limit``
+        """
+        total = query.count(self)
+        if total is None:
+            matching = (document for document in self if query.matches(document))
+            return sum(1 for _ in islice(matching, limit))
+        return total if limit is None else min(total, limit)
+
+    def select(
+        self,
+        query: QueryNode,
+        order_by: Optional[tuple[tuple, bool]] = None,
+        limit: Optional[int] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Live documents matching a compiled query, in insertion order or by
+        ``order_by``, a ``(path, descending)`` pair; documents missing the
+        field come last either way. In insertion order, collection stops
+        after ``limit`` documents.
+        """
+        if order_by is None and limit is not None and query.estimate(self) is None:
+            # A scan that stops early beats building the whole bitset
+            matching = (document for document in self if query.matches(document))
+            return list(islice(matching, limit))
+        bits = query.docs(self)
+        documents = cast(list[dict[str, Any]], self._slots)
+        if bits is None:
+            if order_by is None:
+                return [document for document in self if query.matches(document)]
+            (bits,) = self.scan([query.matches])
+        if order_by is None:
+            slots = islice(bitset.iter_slots(bits), limit)
+            return [documents[slot] for slot in slots]
+        path, descending = order_by
+        ordered = self.doc_values(path).order(bitset.SlotSet(bits), descending)
+        if ordered is None:
+            # Values the column can't order together follow Python's own rules
+            return sort_documents(
+                [documents[slot] for slot in bitset.iter_slots(bits)], [order_by]
+            )
+        return [documents[slot] for slot in ordered]
+
+    def top(
+        self,
+        query: QueryNode,
+        order_by: tuple[tuple, bool],
+        limit: Optional[int] = None,
+        after: Optional[tuple[Any, Optional[int]]] = None,
+    ) -> Optional[tuple[int, list[dict[str, Any]]]]:
+        """
+        Number of live documents matching a compiled query, and the first
+        ``limit`` of them by ``order_by`` that sort after ``after``, a
+        ``(value, slot)`` position as taken by :meth:`DocValues.order`. Only
+        those documents are visited. None when the column can't order them.
+        """
+        bits = self.matching(query)
+        path, descending = order_by
+        ordered = self.doc_values(path).order(
+            bitset.SlotSet(bits), descending, after, limit
+        )
+        if ordered is None:
+            return None
+        documents = cast(list[dict[str, Any]], self._slots)
+        return bitset.count(bits), [documents[slot] for slot in ordered]
+
+    def _tombstone(self, slot: int) -> None:
+        stored = cast(dict[str, Any], self._slots[slot])
+        for term_index in self._term_indexes.values():
+            term_index.discard(slot, stored)
+        for doc_values in self._doc_values.values():
+            doc_values.discard(slot)
+        self._slots[slot] = None
+        self.deleted += 1
+        self._live = None
+        self.generation += 1
+
+    def _record(self, document):
+        # The store keeps its own copy of the source, so the caller changing
+        # theirs afterwards can't leave the indexes built from it behind
+        if self.interner is not None:
+            source = self.interner.normalize(document["_source"])
+        else:
+            source = copy_source(document["_source"])
+        return DocumentRecord.of({**document, "_source": source})
+
+    def _detach(self) -> None:
+        # Leave the shared storage to the snapshots before the first write
+        if self._shared:
+            self._slots = list(self._slots)
+            self._ids = dict(self._ids)
+            self._term_indexes = {}
+            self._doc_values = {}
+            self._build_lock = threading.Lock()
+            self._shared = False
+
+    def _maybe_compact(self) -> None:
+        if self.deleted * 100 > len(self._slots) * self.deletes_pct_allowed:
+            self.compact()
+
+
+def copy_source(value: Any) -> Any:
+    """A copy of a document source sharing none of its dicts and lists"""
+    if isinstance(value, dict):
+        return {key: copy_source(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_source(item) for item in value]
+    return value
+
+
+def indices_stats(indices: dict[str, Any], names, metric=None):
+    """
+    An ``indices.stats`` response for the named indices, each a
+    :class:`~openmock.shards.ShardedIndex`. Shards have no replicas, so
+    ``primaries`` and ``total`` are the same.
+    """
+    if isinstance(metric, str):
+        metric = metric.split(",")
+    if metric and "_all" in metric:
+        metric = None
+
+    def sections(stats):
+        return {
+            name: section
+            for name, section in stats.items()
+            if not metric or name in metric
+        }
+
+    response = {}
+    totals: dict[str, dict[str, int]] = {}
+    shards = 0
+    for name in names:
+        index = indices.get(name)
+        stats = {}
+        if index is not None:
+            shards += len(index.shards)
+            with locked(index.shards):
+                stats = sections(index.stats())
+        response[name] = {"uuid": "uuid", "primaries": stats, "total": stats}
+        for section, values in stats.items():
+            section_totals = totals.setdefault(section, {})
+            for key, value in values.items():
+                section_totals[key] = section_totals.get(key, 0) + value
+    return {
+        "_shards": {"total": shards, "successful": shards, "failed": 0},
+        "_all": {"primaries": totals, "total": totals},
+        "indices": response,
+    }
@@ -0,0 +1,1316 @@
+"""
+The indices of a fake cluster and the operations on them. ``FakeOpenSearch``
+and ``AsyncFakeOpenSearch``, and their indices clients, only parse requests
+and hand them to an engine; clients sharing an engine see the same indices,
+caches and search contexts.
+"""
+
+import copy
+import datetime
+import fnmatch
+import json
+from collections import Counter, defaultdict
+from concurrent.futures import Executor
+from contextlib import nullcontext
+from typing import Any, Optional
+
+from opensearchpy.client.utils import SKIP_IN_PATH
+from opensearchpy.exceptions import (
+    ConflictError,
+    NotFoundError,
+    RequestError,
+    TransportError,
+)
+
+from openmock.bulk import execute_bulk, execute_bulk_steps
+from openmock.caches import request_cache_key
+from openmock.doc_values import search_after_filter, sort_documents, sort_values
+from openmock.document_store import indices_stats
+from openmock.locking import locked
+from openmock.query_compiler import (
+    MATCH_ALL,
+    compile_query,
+    compile_sort,
+    profile_query,
+)
+from openmock.search_contexts import (
+    DEFAULT_PIT_KEEP_ALIVE,
+    DEFAULT_SCROLL_SIZE,
+    PointInTime,
+    ScrollContext,
+    SearchContexts,
+    parse_time_value,
+    pit_ids,
+    scroll_ids,
+)
+from openmock.shards import ShardedIndex
+from openmock.steps import run_steps
+from openmock.utilities import (
+    decode_param,
+    extract_ignore_as_iterable,
+    get_random_id,
+    get_random_scroll_id,
+    get_search_option,
+    parse_track_total_hits,
+)
+
+_INVALID_INDEX_CHARS = [" ", '"', "*", "\\", "<", "|", ",", ">", "/", "?"]
+
+
+class MetricType:
+    CARDINALITY = "CARDINALITY"
+
+    @staticmethod
+    def get_metric_type(type_str):
+        if type_str == "cardinality":
+            return MetricType.CARDINALITY
+
+        raise NotImplementedError(f"type {type_str} is not implemented for MetricType")
+
+
+class Engine:
+    """
+    Documents, mappings, settings and aliases of every index, and the open
+    scrolls and points in time. Operations take the ``params`` already
+    parsed by the client and return response bodies.
+
+    The documents of an index are split in the ``number_of_shards`` it was
+    created with, one shard unless asked for more. Writes and gets go to the
+    shard the ``routing`` or ``_id`` of the document hashes to; searches read
+    every shard, or those their ``routing`` and ``preference`` pick.
+
+    Given a ``search_executor``, searches and counts of several shards run
+    on each shard in it, in parallel, and merge what each returns. It must
+    not be an executor that runs the searches themselves, whose workers
+    would then wait on their own queue.
+    """
+
+    def __init__(self, search_executor: Optional[Executor] = None):
+        self.search_executor = search_executor
+        self.documents: dict[str, ShardedIndex] = {}
+        self.mappings: dict[str, Any] = {}
+        self.settings: dict[str, Any] = {}
+        self.aliases: dict[str, Any] = {}
+        self.scrolls = SearchContexts(lambda: get_random_scroll_id().decode())
+        self.pits = SearchContexts(lambda: get_random_id(168))
+
+    def sharded(self, index):
+        """The shards of an index, a single empty one if the index is missing"""
+        # setdefault keeps threads creating the same index from racing
+        shards = self.documents.get(index)
+        if shards is None:
+            shards = self.documents.setdefault(index, ShardedIndex())
+        return shards
+
+    # Documents
+
+    def create(self, index, id, body, routing=None):
+        doc_type = "_doc"
+        if id is None:
+            id = get_random_id()
+        routing = decode_param(routing)
+        store = self.sharded(index).shard(id, routing)
+
+        with store.lock.write():
+            if store.get(id) is not None:
+                raise ConflictError(
+                    409,
+                    "action_request_validation_exception",
+                    "Validation Failed: 1: no documents to get;",
+                )
+            seq_no = store.next_seq_no()
+            store.append(
+                routed(
+                    {
+                        "_type": doc_type,
+                        "_id": id,
+                        "_source": body,
+                        "_index": index,
+                        "_version": 1,
+                        "_seq_no": seq_no,
+                        "_primary_term": 1,
+                    },
+                    routing,
+                )
+            )
+
+        return {
+            "_index": index,
+            "_id": id,
+            "_version": 1,
+            "result": "created",
+            "_shards": {"total": 2, "successful": 1, "failed": 0},
+            "_seq_no": seq_no,
+            "_primary_term": 1,
+        }
+
+    def index(self, index, body, id=None, routing=None):
+        doc_type = "_doc"
+        version = 1
+
+        result = "created"
+        if id is None:
+            id = get_random_id()
+        routing = decode_param(routing)
+        store = self.sharded(index).shard(id, routing)
+
+        with store.lock.write():
+            existing = store.get(id)
+            if existing is not None:
+                version = existing["_version"] + 1
+                result = "updated"
+
+            seq_no = store.next_seq_no()
+            store.append(
+                routed(
+                    {
+                        "_type": doc_type,
+                        "_id": id,
+                        "_source": body,
+                        "_index": index,
+                        "_version": version,
+                        "_seq_no": seq_no,
+                        "_primary_term": 1,
+                    },
+                    routing,
+                )
+            )
+
+        return {
+            "_index": index,
+            "_id": id,
+            "_version": version,
+            "result": result,
+            "_shards": {"total": 2, "successful": 1, "failed": 0},
+            "_seq_no": seq_no,
+            "_primary_term": 1,
+        }
+
+    def bulk(self, body, index=None):
+        return execute_bulk(body, self.documents, index)
+
+    def bulk_steps(self, body, index=None, step=None):
+        return execute_bulk_steps(body, self.documents, index, step)
+
+    def exists(self, index, id, routing=None):
+        doc_type = None
+        result = False
+        shards = self.documents.get(index)
+        if shards is not None:
+            store = shards.shard(id, decode_param(routing))
+            with store.lock.read():
+                document = store.get(id)
+            result = document is not None and (
+                document.get("_type") == doc_type or doc_type is None
+            )
+        return result
+
+    def get(self, index, id, params):
+        doc_type = "_all"
+        ignore = extract_ignore_as_iterable(params)
+        result = None
+
+        shards = self.documents.get(index)
+        if shards is not None:
+            store = shards.shard(id, decode_param(params.get("routing")))
+            with store.lock.read():
+                document = store.get(id)
+            if document is not None and doc_type in ("_all", document.get("_type")):
+                result = document
+
+        if result:
+            return {
+                **result,
+                "_source": response_value(result["_source"], dates_as_strings=False),
+                "found": True,
+            }
+        if params and 404 in ignore:
+            return {"found": False}
+        error_data = {"_index": index, "_type": doc_type, "_id": id, "found": False}
+        raise NotFoundError(404, json.dumps(error_data))
+
+    def update(self, index, id, body, routing=None):
+        if not body:
+            raise RequestError(
+                400,
+                "action_request_validation_exception",
+                "Validation Failed: 1: script or doc is missing;",
+            )
+        if "doc" not in body and "script" not in body:
+            field = list(body.keys())
+            raise RequestError(
+                400,
+                "x_content_parse_exception",
+                f"[1:2] [UpdateRequest] unknown field [{field[0]}]",
+            )
+        if "doc" in body and "script" in body:
+            raise RequestError(
+                400,
+                "action_request_validation_exception",
+                "Validation Failed: 1: can't provide both script and doc;",
+            )
+
+        result = None
+
+        shards = self.documents.get(index)
+        if shards is not None:
+            store = shards.shard(id, decode_param(routing))
+            with store.lock.write():
+                document = store.get(id)
+                if document is not None:
+                    if "doc" in body:
+                        merged = {**document["_source"], **body["doc"]}
+                        changed = merged != document["_source"]
+                        if changed:
+                            document = {
+                                **document,
+                                "_source": merged,
+                                "_version": document["_version"] + 1,
+                                "_seq_no": store.next_seq_no(),
+                                "_primary_term": 1,
+                            }
+                            store.replace(document)
+                            op_result = "updated"
+                        else:
+                            op_result = "noop"
+
+                        result = {
+                            "_index": index,
+                            "_id": id,
+                            "_version": document["_version"],
+                            "result": op_result,
+                            "_shards": {"total": 2, "successful": 1, "failed": 0},
+                            "_seq_no": document.get("_seq_no", 0),
+                            "_primary_term": document.get("_primary_term", 1),
+                        }
+                    elif "script" in body:
+                        # TODO: Add pain(ful)less language support
+                        raise NotImplementedError(
+                            "Using script is currently not supported."
+                        )
+
+        if result:
+            return result
+        raise NotFoundError(
+            404, "document_missing_exception", f"[{id}]: document missing"
+        )
+
+    def update_by_query(self, index, body, params):
+        return run_steps(self.update_by_query_steps(index, body, params))
+
+    def update_by_query_steps(self, index, body, params, step=None):
+        """
+        ``update_by_query`` pausing every ``step`` updates. Unstepped, nothing
+        changes the index between the search and the updates; stepped, other
+        writes may land between batches, as in OpenSearch
+        """
+        # Actually it only supports script equal operations
+        # TODO: Full support from painless language
+        total_updated = 0
+        if isinstance(index, list):
+            (index,) = index
+        new_values = {}
+        script_params = body["script"]["params"]
+        script_source = body["script"]["source"].replace("ctx._source.", "").split(";")
+        for sentence in script_source:
+            if sentence:
+                field, _, value = sentence.split()
+                if value.startswith("params."):
+                    _, key = value.split(".")
+                    value = script_params.get(key)
+                new_values[field] = value
+
+        stores = [
+            shard
+            for name in self.normalize_index_to_list(index)
+            for shard in self.documents[name].shards
+        ]
+        with locked(stores, write=True) if step is None else nullcontext():
+            matches = self.search(body, index, params)
+            if matches["hits"]["total"]:
+                for hit in matches["hits"]["hits"]:
+                    if step is not None and total_updated % step == 0:
+                        yield
+                    self.index(
+                        hit["_index"],
+                        {**hit["_source"], **new_values},
+                        hit["_id"],
+                        hit.get("_routing"),
+                    )
+                    total_updated += 1
+
+        return {
+            "took": 1,
+            "time_out": False,
+            "total": matches["hits"]["total"],
+            "updated": total_updated,
+            "deleted": 0,
+            "batches": 1,
+            "version_conflicts": 0,
+            "noops": 0,
+            "retries": 0,
+            "throttled_millis": 100,
+            "requests_per_second": 100,
+            "throttled_until_millis": 0,
+            "failures": [],
+        }
+
+    def delete_by_query(self, index, body, params):
+        return run_steps(self.delete_by_query_steps(index, body, params))
+
+    def delete_by_query_steps(self, index, body, params, step=None):
+        """``delete_by_query`` pausing every ``step`` deletes, as above"""
+        stores = [
+            shard
+            for name in self.normalize_index_to_list(index)
+            for shard in self.documents[name].shards
+        ]
+        total_deleted = 0
+        with locked(stores, write=True) if step is None else nullcontext():
+            matches = self.search(body, index, params)
+            for position, hit in enumerate(matches["hits"]["hits"]):
+                if step is not None and position % step == 0:
+                    yield
+                # Stepped, a document may be gone by its turn
+                found = self.delete(
+                    hit["_index"],
+                    hit["_id"],
+                    {"ignore": 404, "routing": hit.get("_routing")},
+                )["found"]
+                if found:
+                    total_deleted += 1
+        return {
+            "took": 1,
+            "timed_out": False,
+            "total": total_deleted,
+            "deleted": total_deleted,
+            "batches": 1,
+            "version_conflicts": 0,
+            "noops": 0,
+            "retries": {"bulk": 0, "search": 0},
+            "throttled_millis": 0,
+            "requests_per_second": -1,
+            "throttled_until_millis": 0,
+            "failures": [],
+        }
+
+    def mget(self, body, index, params):
+        doc_type = "_all"
+        docs = body.get("docs")
+        if docs:
+            items = [
+                (
+                    doc.get("_index") or index,
+                    doc["_id"],
+                    doc.get("routing", doc.get("_routing")),
+                )
+                for doc in docs
+            ]
+        else:
+            ids = body.get("ids")
+            if ids:
+                items = [(index, doc_id, None) for doc_id in ids]
+            else:
+                items = []
+
+        results = []
+        for doc_index, doc_id, routing in items:
+            doc_params = params
+            if routing is not None:
+                doc_params = {**params, "routing": routing}
+            # pylint: disable=bare-except
+            try:
+                results.append(self.get(doc_index, doc_id, doc_params))
+            except:  # noqa
+                results.append(
+                    {
+                        "_index": doc_index,
+                        "_type": doc_type,
+                        "_id": doc_id,
+                        "found": False,
+                    }
+                )
+
+        if not results:
+            raise RequestError(
+                400,
+                "action_request_validation_exception",
+                "Validation Failed: 1: no documents to get;",
+            )
+        return {"docs": results}
+
+    def get_source(self, index, id, params):
+        return self.get(index, id, params).get("_source")
+
+    def delete(self, index, id, params):
+        doc_type = None
+        found = False
+        existing_version = 1
+        seq_no = 0
+        ignore = extract_ignore_as_iterable(params)
+
+        shards = self.documents.get(index)
+        if shards is not None:
+            store = shards.shard(id, decode_param(params.get("routing")))
+            with store.lock.write():
+                document = store.get(id)
+                if document is not None and (
+                    not doc_type or document.get("_type") == doc_type
+                ):
+                    found = True
+                    existing_version = document.get("_version", 1)
+                    store.remove(id)
+                    seq_no = store.next_seq_no()
+
+        if found:
+            return {
+                "_index": index,
+                "_id": id,
+                "_version": existing_version + 1,
+                "result": "deleted",
+                "_shards": {"total": 2, "successful": 1, "failed": 0},
+                "_seq_no": seq_no,
+                "_primary_term": 1,
+                "found": True,
+            }
+        if params and 404 in ignore:
+            return {
+                "_index": index,
+                "_id": id,
+                "_version": 1,
+                "result": "not_found",
+                "_shards": {"total": 2, "successful": 1, "failed": 0},
+                "_seq_no": 0,
+                "_primary_term": 1,
+                "found": False,
+            }
+        raise NotFoundError(
+            404,
+            json.dumps(
+                {"_index": index, "_id": id, "found": False, "result": "not_found"}
+            ),
+        )
+
+    # Searches
+
+    def count(self, body, index, params):
+        searchable_indexes = self.normalize_index_to_list(index)
+        query = MATCH_ALL
+        if body and "query" in body:
+            query = compile_query(body["query"])
+        terminate_after = int(get_search_option(body, params, "terminate_after", 0))
+        indices = {name: self.documents[name] for name in searchable_indexes}
+        stores = self._shard_stores(indices, params)
+        with locked(stores.values()):
+            shards, counts = self._each_store(
+                lambda store: store.count(query, terminate_after or None), stores
+            )
+        result = {"count": sum(counts), "_shards": shards}
+        if terminate_after:
+            result["terminated_early"] = any(
+                found >= terminate_after for found in counts
+            )
+        return result
+
+    def msearch(self, body):
+        def grouped(iterable):
+            if len(iterable) % 2 != 0:
+                # pylint: disable=broad-exception-raised
+                raise Exception("Malformed body")
+            iterator = iter(iterable)
+            while True:
+                try:
+                    yield (next(iterator), next(iterator))
+                except StopIteration:
+                    break
+
+        responses = []
+        took = 0
+        for header, query in grouped(body):
+            params = {
+                key: header[key] for key in ("routing", "preference") if key in header
+            }
+            response = self.search(query, header["index"], params)
+            took += response["took"]
+            responses.append(response)
+        result = {"took": took, "responses": responses}
+        return result
+
+    def search(self, body, index, params):
+        pit = None
+        if body and "pit" in body:
+            # A point in time names its indices and reads their snapshots
+            pit = self.pits.get(body["pit"]["id"])
+            pit.touch(body["pit"].get("keep_alive"))
+            indices = pit.stores
+            return self._search_stores(
+                indices, self._shard_stores(indices, params), pit, body, params
+            )
+        indices = {
+            searchable_index: self.documents[searchable_index]
+            for searchable_index in self.normalize_index_to_list(index)
+        }
+        stores = self._shard_stores(indices, params)
+        # Writes wait until the search is done with the live shards
+        with locked(stores.values()):
+            return self._search_stores(indices, stores, pit, body, params)
+
+    def _shard_stores(self, indices, params):
+        """
+        The shards of ``indices`` that a search with the ``routing`` and
+        ``preference`` of ``params`` reads, by index name and shard number
+        """
+        routing = get_search_option(None, params, "routing")
+        preference = get_search_option(None, params, "preference")
+        return {
+            (name, number): index.shards[number]
+            for name, index in indices.items()
+            for number in index.searched_shards(routing, preference)
+        }
+
+    # pylint: disable=too-many-statements
+    def _search_stores(self, indices, stores, pit, body, params):
+        """
+        Search the shard stores of ``indices``; the caller holds the locks of
+        live ones
+        """
+        # Aggregation-only searches of one index go through its request cache
+        cache_key = None
+        if len(stores) == 1:
+            (store,) = stores.values()
+            cache_key = request_cache_key(body, params, store.request_cache_enabled)
+            if cache_key is not None:
+                cached = store.request_cache.get_response(cache_key, store.generation)
+                if cached is not None:
+                    return cached
+
+        query = MATCH_ALL
+        if body and "query" in body:
+            query = compile_query(body["query"])
+        sort_keys = compile_sort(body.get("sort")) if body else []
+        search_after = body.get("search_after") if body else None
+        if search_after is not None:
+            if not sort_keys:
+                raise RequestError(
+                    400,
+                    "illegal_argument_exception",
+                    "Sort must contain at least one field.",
+                )
+            # Searches of a point in time may add its tiebreaker value
+            if len(search_after) not in (
+                len(sort_keys),
+                len(sort_keys) + (pit is not None),
+            ):
+                raise RequestError(
+                    400,
+                    "illegal_argument_exception",
+                    f"search_after has {len(search_after)} value(s) but sort "
+                    f"has {len(sort_keys)}.",
+                )
+        aggregating = body is not None and "aggs" in body
+        terminate_after = int(get_search_option(body, params, "terminate_after", 0))
+        # Total hits are counted exactly up to this bound, 0 for not at all
+        bound = parse_track_total_hits(
+            get_search_option(body, params, "track_total_hits", True)
+        )
+        # Only the documents up to the end of the page need to be ranked
+        start = int(body.get("from", 0)) if body else 0
+        window = None
+        if "scroll" not in params:
+            sizes = [
+                int(size)
+                for size in ((body or {}).get("size"), params.get("size"))
+                if size is not None
+            ]
+            if sizes:
+                window = start + min(sizes)
+        # Documents of a point in time are numbered for search_after ties,
+        # shard by shard in slot order, as OpenSearch's ``_shard_doc``
+        tiebreak = None
+        if pit is not None:
+            ordinals = {
+                (name, number): ordinal
+                for ordinal, (name, number) in enumerate(
+                    (name, number)
+                    for name, index in indices.items()
+                    for number in range(index.number_of_shards)
+                )
+            }
+
+            def shard_doc(document):
+                name = document["_index"]
+                number = indices[name].shard_id(
+                    document["_id"], document.get("_routing")
+                )
+                slot = indices[name].shards[number].slot(document["_id"])
+                return ordinals[name, number] << 32 | slot
+
+            tiebreak = shard_doc
+
+        top = None
+        terminated_early = False
+        partials = []
+        single_key = len(stores) == 1 and len(sort_keys) == 1 and not terminate_after
+        if single_key and not aggregating:
+            # A single sort key of a single index walks its column, seeking
+            # straight to search_after and stopping at the end of the page
+            after = None
+            if search_after is not None:
+                after = (search_after[0], None)
+                if tiebreak is not None and len(search_after) == 2:
+                    after = (search_after[0], search_after[1] & 0xFFFFFFFF)
+            top = store.top(query, sort_keys[0], window, after)
+        if top is not None:
+            total, ranked = top
+            shards = {"total": 1, "successful": 1, "skipped": 0, "failed": 0}
+        else:
+            if not sort_keys and not aggregating and window is not None:
+                # Unsorted pages only need the first matches and a count, which
+                # stops at terminate_after, so a shard reports stopping there,
+                # or else once the total hits bound is passed. The bound only
+                # caps the reported total, never the page.
+                count_limit = terminate_after or None
+                if count_limit is None and bound is not None:
+                    count_limit = bound + 1
+                select_limit = (
+                    min(window, terminate_after) if terminate_after else window
+                )
+
+                def search_store(searchable_store):
+                    found = searchable_store.count(query, count_limit)
+                    selected = []
+                    if found:
+                        selected = searchable_store.select(query, limit=select_limit)
+                    return found, selected, None
+
+            else:
+                order_by = sort_keys[0] if single_key else None
+                keep = None
+                if search_after is not None:
+                    keep = search_after_filter(sort_keys, search_after, tiebreak)
+
+                def search_store(searchable_store):
+                    # terminate_after collects in index order, before sorting
+                    selected = searchable_store.select(
+                        query, order_by, terminate_after or None
+                    )
+                    partial = None
+                    if aggregating:
+                        partial = {
+                            name: aggregation_partial(definition, selected)
+                            for name, definition in body["aggs"].items()
+                        }
+                    ranked = selected
+                    if keep is not None:
+                        ranked = list(filter(keep, ranked))
+                    # Each shard ranks its own top hits, merged below
+                    if sort_keys and order_by is None:
+                        ranked = sort_documents(ranked, sort_keys, window)
+                    elif window is not None:
+                        ranked = ranked[:window]
+                    return len(selected), ranked, partial
+
+            shards, outcomes = self._each_store(search_store, stores)
+            total = 0
+            ranked = []
+            for found, selected, partial in outcomes:
+                total += found
+                terminated_early |= bool(terminate_after) and found >= terminate_after
+                ranked.extend(selected)
+                partials.append(partial)
+            if sort_keys and len(outcomes) > 1:
+                ranked = sort_documents(ranked, sort_keys, window)
+            elif window is not None:
+                ranked = ranked[:window]
+
+        result = {
+            "hits": {"max_score": 1.0},
+            "_shards": shards,
+            "took": 1,
+            "timed_out": False,
+        }
+        if bound != 0:
+            relation = "eq"
+            if bound is not None and total > bound:
+                total, relation = bound, "gte"
+            result["hits"] = {
+                "total": {"value": total, "relation": relation},
+                **result["hits"],
+            }
+        if terminate_after:
+            result["terminated_early"] = terminated_early
+        if pit is not None:
+            result["pit_id"] = body["pit"]["id"]
+        if body and body.get("profile"):
+            result["profile"] = profile_query(query, stores)
+
+        # build aggregations
+        if body is not None and "aggs" in body:
+            aggregations = {}
+
+            for aggregation, definition in body["aggs"].items():
+                merged = merge_aggregation_partials(
+                    definition, [partial[aggregation] for partial in partials]
+                )
+                aggregations[aggregation] = {
+                    "doc_count_error_upper_bound": 0,
+                    "sum_other_doc_count": 0,
+                    "buckets": aggregation_buckets(definition, merged),
+                }
+
+            if aggregations:
+                result["aggregations"] = aggregations
+
+        if "scroll" in params:
+            size = params.get("size", (body or {}).get("size", DEFAULT_SCROLL_SIZE))
+            context = ScrollContext(
+                ranked,
+                int(size),
+                parse_time_value(params["scroll"]),
+                copy.deepcopy(result),
+                position=start,
+                sort_keys=sort_keys,
+            )
+            result["_scroll_id"] = self.scrolls.open(context)
+            hits = context.next_page()
+        else:
+            hits = ranked[start:window]
+
+        result["hits"]["hits"] = prepare_hits(hits, sort_keys, tiebreak)
+
+        if cache_key is not None:
+            store.request_cache.put_response(cache_key, store.generation, result)
+        return result
+
+    def scroll(self, body, scroll_id, params):
+        if scroll_id is None and body:
+            scroll_id = body.get("scroll_id")
+        context = self.scrolls.get(scroll_id)
+        context.touch(params.get("scroll") or (body or {}).get("scroll"))
+        # Every page gets its own copy, which the caller may change freely
+        result = copy.deepcopy(context.response)
+        result["hits"]["hits"] = prepare_hits(context.next_page(), context.sort_keys)
+        result["_scroll_id"] = scroll_id
+        return result
+
+    def clear_scroll(self, body, scroll_id):
+        freed = self.scrolls.close(scroll_ids(body, scroll_id))
+        return {"succeeded": True, "num_freed": freed}
+
+    def suggest(self, body, index):
+        if index is not None and index not in self.documents:
+            raise NotFoundError(404, f"IndexMissingException[[{index}] missing]")
+
+        result_dict = {}
+        for key, value in body.items():
+            text = value.get("text")
+            suggestion = (
+                int(text) + 1 if isinstance(text, int) else f"{text}_suggestion"
+            )
+            result_dict[key] = [
+                {
+                    "text": text,
+                    "length": 1,
+                    "options": [{"text": suggestion, "freq": 1, "score": 1.0}],
+                    "offset": 0,
+                }
+            ]
+        return result_dict
+
+    def create_pit(self, index, params):
+        if index in SKIP_IN_PATH:
+            raise ValueError("Empty value passed for a required argument 'index'.")
+        names = index.split(",") if isinstance(index, str) else list(index)
+        # Indices that don't exist yet are frozen empty
+        live = {name: self.documents.get(name, ShardedIndex()) for name in names}
+        with locked(shard for index in live.values() for shard in index.shards):
+            indices = {name: index.snapshot() for name, index in live.items()}
+        pit = PointInTime(
+            indices,
+            parse_time_value(params.get("keep_alive", DEFAULT_PIT_KEEP_ALIVE)),
+        )
+        shards = sum(index.number_of_shards for index in indices.values())
+        return {
+            "pit_id": self.pits.open(pit),
+            "_shards": {
+                "total": shards,
+                "successful": shards,
+                "skipped": 0,
+                "failed": 0,
+            },
+            "creation_time": pit.creation_time,
+        }
+
+    def delete_pit(self, body):
+        return {
+            "pits": [
+                {"pit_id": pit_id, "successful": bool(self.pits.close([pit_id]))}
+                for pit_id in pit_ids(body)
+            ]
+        }
+
+    def delete_all_pits(self):
+        pits = [
+            {"pit_id": pit_id, "successful": True} for pit_id, _ in self.pits.items()
+        ]
+        self.pits.close()
+        return {"pits": pits}
+
+    def get_all_pits(self):
+        return {
+            "pits": [
+                {
+                    "pit_id": pit_id,
+                    "creation_time": pit.creation_time,
+                    "keep_alive": int(pit.keep_alive * 1000),
+                }
+                for pit_id, pit in self.pits.items()
+            ]
+        }
+
+    def _each_store(self, function, stores):
+        """
+        Run ``function`` on each of the shard stores, in the search executor
+        when there is one and several stores, and return the ``_shards``
+        section of the response with the results of the stores that
+        succeeded, in order. A shard raising an OpenSearch error is reported
+        as a shard failure, unless all of them do; any other error propagates.
+        """
+        if self.search_executor is not None and len(stores) > 1:
+            futures = [
+                self.search_executor.submit(function, store)
+                for store in stores.values()
+            ]
+            outcomes = []
+            for future in futures:
+                error = future.exception()
+                if error is not None and not isinstance(error, TransportError):
+                    raise error
+                outcomes.append((error, None if error else future.result()))
+        else:
+            outcomes = []
+            for store in stores.values():
+                try:
+                    outcomes.append((None, function(store)))
+                except TransportError as error:
+                    outcomes.append((error, None))
+
+        results = [result for error, result in outcomes if error is None]
+        failures = [
+            {
+                "shard": number,
+                "index": name,
+                "reason": {
+                    "type": error.error,
+                    "reason": error.info if isinstance(error.info, str) else str(error),
+                },
+            }
+            for (name, number), (error, _) in zip(stores, outcomes)
+            if error is not None
+        ]
+        if failures and not results:
+            raise outcomes[0][0]
+        shards = {
+            "total": len(stores),
+            "successful": len(results),
+            "skipped": 0,
+            "failed": len(failures),
+        }
+        if failures:
+            shards["failures"] = failures
+        return shards, results
+
+    def normalize_index_to_list(self, index):
+        """Indices searched for ``index``, raising if one doesn't exist"""
+        # Ensure to have a list of index
+        if index is None or index == "*" or index == "_all":
+            searchable_indexes = list(self.documents.keys())
+        elif isinstance(index, str):
+            searchable_indexes = [index]
+        elif isinstance(index, list):
+            searchable_indexes = index
+        else:
+            # Is it the correct exception to use ?
+            raise ValueError("Invalid param 'index'")
+
+        searchable_indexes = self._resolve_aliases(searchable_indexes)
+
+        # Check index(es) exists
+        for searchable_index in searchable_indexes:
+            if searchable_index not in self.documents:
+                raise NotFoundError(
+                    404, f"IndexMissingException[[{searchable_index}] missing]"
+                )
+
+        return searchable_indexes
+
+    # Indices
+
+    def create_index(self, index, body):
+        for char in _INVALID_INDEX_CHARS:
+            if char in index:
+                raise RequestError(
+                    400,
+                    "invalid_index_name_exception",
+                    f'Invalid index name [{index}], must not contain the following characters [ , ", *, \\, <, |, ,, >, /, ?]',
+                )
+
+        if index not in self.documents:
+            # A bulk of another thread may be creating it at the same time
+            self.documents.setdefault(
+                index, ShardedIndex.from_settings((body or {}).get("settings"))
+            )
+
+        if body:
+            if "mappings" in body:
+                self.mappings[index] = {"mappings": body["mappings"]}
+            if "settings" in body:
+                # Store them as they are, but ensure we can access them in get_settings
+                self.settings[index] = {"settings": body["settings"]}
+
+        return {"acknowledged": True, "shards_acknowledged": True, "index": index}
+
+    def index_exists(self, index):
+        return index in self.documents
+
+    def delete_index(self, index):
+        if index in self.documents:
+            del self.documents[index]
+        return {"acknowledged": True}
+
+    def put_alias(self, index, name):
+        for idx in self.index_names(index):
+            if idx not in self.aliases:
+                self.aliases[idx] = {"aliases": {}}
+            self.aliases[idx]["aliases"][name] = {}
+        return {"acknowledged": True}
+
+    def get_alias(self, index, name):
+        if index is None:
+            candidate_indices = list(self.aliases.keys())
+        else:
+            candidate_indices = self.index_names(index)
+
+        res = {}
+        for idx in candidate_indices:
+            entry = self.aliases.get(idx, {"aliases": {}})
+            if name is not None:
+                filtered = {
+                    k: v for k, v in entry["aliases"].items() if name in ("*", k)
+                }
+                if filtered or index is not None:
+                    res[idx] = {"aliases": filtered}
+            else:
+                res[idx] = entry
+        return res
+
+    def delete_alias(self, index, name):
+        for idx in self.index_names(index):
+            if idx in self.aliases and name in self.aliases[idx]["aliases"]:
+                del self.aliases[idx]["aliases"][name]
+        return {"acknowledged": True}
+
+    def exists_alias(self, name, index):
+        indices_to_check = (
+            self.index_names(index) if index else list(self.aliases.keys())
+        )
+        for idx in indices_to_check:
+            if idx in self.aliases:
+                if isinstance(name, str):
+                    names = [n.strip() for n in name.split(",")]
+                else:
+                    names = [name]
+                for n in names:
+                    if n in self.aliases[idx]["aliases"]:
+                        return True
+        return False
+
+    def update_aliases(self, body):
+        for action in body.get("actions", []):
+            if "add" in action:
+                add = action["add"]
+                idx = add["index"]
+                name = add["alias"]
+                if idx not in self.aliases:
+                    self.aliases[idx] = {"aliases": {}}
+                self.aliases[idx]["aliases"][name] = {}
+            elif "remove" in action:
+                rem = action["remove"]
+                idx = rem["index"]
+                name = rem["alias"]
+                if idx in self.aliases and name in self.aliases[idx]["aliases"]:
+                    del self.aliases[idx]["aliases"][name]
+        return {"acknowledged": True}
+
+    def get_mapping(self, index):
+        if index is None or index == "_all" or index == "*":
+            return self.mappings
+
+        res = {}
+        for idx in self.index_names(index):
+            res[idx] = self.mappings.get(idx, {"mappings": {}})
+        return res
+
+    def put_mapping(self, body, index):
+        for idx in self.index_names(index):
+            if idx not in self.mappings:
+                self.mappings[idx] = {"mappings": {"properties": {}}}
+            if "mappings" not in self.mappings[idx]:
+                self.mappings[idx]["mappings"] = {"properties": {}}
+            if "properties" not in self.mappings[idx]["mappings"]:
+                self.mappings[idx]["mappings"]["properties"] = {}
+
+            new_props = body.get("properties", body)
+            self.mappings[idx]["mappings"]["properties"].update(new_props)
+        return {"acknowledged": True}
+
+    def get_settings(self, index):
+        if index is None or index == "_all" or index == "*":
+            return self.settings
+
+        res = {}
+        for idx in self.index_names(index):
+            entry = self.settings.get(
+                idx,
+                {
+                    "settings": {
+                        "index": {"number_of_shards": "1", "number_of_replicas": "1"}
+                    }
+                },
+            )
+            settings = entry.get("settings", {})
+
+            # Real OpenSearch nests these under "index" if not already
+            if "index" not in settings:
+                settings = {"index": dict(settings)}
+
+            # Convert all values to strings for number_of_shards/replicas to match real behavior
+            if "index" in settings:
+                for k in ["number_of_shards", "number_of_replicas"]:
+                    if k in settings["index"]:
+                        settings["index"][k] = str(settings["index"][k])
+
+            res[idx] = {"settings": settings}
+        return res
+
+    def put_settings(self, body, index):
+        for idx in self.index_names(index):
+            if idx not in self.settings:
+                self.settings[idx] = {"settings": {"index": {}}}
+            if "settings" not in self.settings[idx]:
+                self.settings[idx]["settings"] = {"index": {}}
+            if "index" not in self.settings[idx]["settings"]:
+                self.settings[idx]["settings"]["index"] = {}
+
+            new_settings = body.get("index", body)
+            for k, v in new_settings.items():
+                self.settings[idx]["settings"]["index"][k] = str(v)
+
+            # Documents stay in the shards the index was created with
+            shards = self.documents.get(idx)
+            if shards is not None:
+                with locked(shards.shards, write=True):
+                    shards.configure(body)
+        return {"acknowledged": True}
+
+    def stats(self, index, metric):
+        return indices_stats(self.documents, self.index_names(index), metric)
+
+    def forcemerge(self, index):
+        shards = [
+            shard
+            for idx in self.index_names(index)
+            if idx in self.documents
+            for shard in self.documents[idx].shards
+        ]
+        for shard in shards:
+            with shard.lock.write():
+                shard.compact()
+        return {
+            "_shards": {"total": len(shards), "successful": len(shards), "failed": 0}
+        }
+
+    def index_names(self, index):
+        """Normalize index to a list of indexes, resolving aliases to their backing indices."""
+        if index is None or index == "*" or index == "_all":
+            return list(self.documents.keys())
+        if isinstance(index, str):
+            raw = [idx.strip() for idx in index.split(",")]
+        elif isinstance(index, list):
+            raw = index
+        else:
+            raw = [index]
+        return self._resolve_aliases(raw)
+
+    def _resolve_aliases(self, names):
+        resolved = []
+        for name in names:
+            if isinstance(name, str) and "*" in name:
+                # Wildcard patterns expand to the existing indices they match
+                resolved.extend(
+                    (idx for idx in self.documents if fnmatch.fnmatchcase(idx, name))
+                )
+                continue
+            backing = [
+                idx
+                for idx, entry in self.aliases.items()
+                if name in entry.get("aliases", {})
+            ]
+            if backing:
+                resolved.extend(backing)
+            else:
+                resolved.append(name)
+        return resolved
+
+
+def routed(document, routing):
+    """A document to store, with its custom routing when it has one"""
+    if routing is not None:
+        document["_routing"] = str(routing)
+    return document
+
+
+def prepare_hits(documents, sort_keys=(), tiebreak=None):
+    # Hits are built per response, stored documents are never written
+    hits = []
+    for document in documents:
+        hit = {
+            **document,
+            "_source": response_value(document["_source"]),
+            "_score": 1.0,
+        }
+        if sort_keys:
+            # Values as stored, so they go back into search_after as is
+            hit["sort"] = sort_values(document, sort_keys)
+            if tiebreak is not None:
+                hit["sort"].append(tiebreak(document))
+        hits.append(hit)
+    return hits
+
+
+def response_value(value, dates_as_strings=True):
+    """
+    A copy of a stored value for a response, which callers may change
+    freely; datetimes become ISO 8601 strings as they would over the wire
+    """
+    if isinstance(value, dict):
+        return {
+            key: response_value(item, dates_as_strings) for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [response_value(item, dates_as_strings) for item in value]
+    if dates_as_strings and isinstance(value, datetime.datetime):
+        return value.isoformat()
+    return value
+
+
+def make_aggregation_buckets(aggregation, documents):
+    return aggregation_buckets(aggregation, aggregation_partial(aggregation, documents))
+
+
+def aggregation_partial(aggregation, documents):
+    """
+    What the documents of one index contribute to an aggregation: counts of
+    the terms, or the sources of each composite key
+    """
+    if "composite" in aggregation:
+        return composite_aggregation_groups(aggregation, documents)
+    if "terms" in aggregation:
+        field = aggregation["terms"]["field"]
+        counts = Counter()
+        for doc in documents:
+            val = response_value(doc["_source"].get(field))
+            if val is not None:
+                counts[val] += 1
+        return counts
+    return None
+
+
+def merge_aggregation_partials(aggregation, partials):
+    """Merge the partials of several indices, in index order"""
+    if "composite" in aggregation:
+        merged = defaultdict(list)
+        for groups in partials:
+            for key, sources in groups.items():
+                merged[key].extend(sources)
+        return merged
+    if "terms" in aggregation:
+        merged = Counter()
+        for counts in partials:
+            merged.update(counts)
+        return merged
+    return None
+
+
+def aggregation_buckets(aggregation, partial):
+    if "composite" in aggregation:
+        return composite_aggregation_buckets(aggregation, partial)
+    if "terms" in aggregation:
+        return [
+            {"key": k, "doc_count": v}
+            for k, v in sorted(partial.items(), key=lambda x: x[1], reverse=True)
+        ]
+    return []
+
+
+def make_composite_aggregation_buckets(aggregation, documents):
+    return composite_aggregation_buckets(
+        aggregation, composite_aggregation_groups(aggregation, documents)
+    )
+
+
+def composite_aggregation_groups(aggregation, documents):
+    """The sources of the documents under each composite key"""
+
+    def make_key(doc_source, agg_source):
+        attr = list(agg_source.values())[0]["terms"]["field"]
+        value = doc_source[attr]
+        # List values are split into several key parts as they are
+        return value if isinstance(value, list) else response_value(value)
+
+    groups = defaultdict(list)
+    for document in documents:
+        doc_src = document["_source"]
+        key = ()
+        for agg_src in aggregation["composite"]["sources"]:
+            k = make_key(doc_src, agg_src)
+            if isinstance(k, list):
+                key += tuple(k)
+            else:
+                key += tuple([k])
+        groups[key].append(doc_src)
+    return groups
+
+
+def composite_aggregation_buckets(aggregation, groups):
+    def make_bucket(bucket_key, bucket):
+        out = {
+            "key": dict(zip(bucket_key_fields, bucket_key)),
+            "doc_count": len(bucket),
+        }
+        if "aggs" in aggregation:
+            for metric_key, metric_definition in aggregation["aggs"].items():
+                metric_type_str = list(metric_definition)[0]
+                metric_type = MetricType.get_metric_type(metric_type_str)
+                attr = metric_definition[metric_type_str]["field"]
+                # Strip .keyword multifield suffix; the fake is schema-light
+                # and stores only the base field value.
+                if attr.endswith(".keyword"):
+                    attr = attr[: -len(".keyword")]
+                data = [doc[attr] for doc in bucket]
+
+                if metric_type == MetricType.CARDINALITY:
+                    value = len(set(data))
+                else:
+                    raise NotImplementedError(
+                        f"Metric type '{metric_type}' not implemented"
+                    )
+
+                out[metric_key] = {"value": value}
+        return out
+
+    agg_sources = aggregation["composite"]["sources"]
+    bucket_key_fields = [list(src)[0] for src in agg_sources]
+    buckets = sorted(((k, v) for k, v in groups.items()), key=lambda x: x[0])
+    buckets = [make_bucket(bucket_key, bucket) for bucket_key, bucket in buckets]
+    return buckets
@@ -0,0 +1,138 @@
+"""
+Bulk helpers of opensearchpy without the JSON round trip: under ``openmock``
+``bulk``, ``streaming_bulk``, ``parallel_bulk`` and their async versions hand
+their actions to the fake's bulk as Python objects
+"""
+
+from typing import Any
+
+from opensearchpy.exceptions import TransportError
+from opensearchpy.helpers.actions import (
+    _ActionChunker,
+    _process_bulk_chunk_error,
+    _process_bulk_chunk_success,
+)
+
+# max_chunk_bytes of the helpers when not given
+DEFAULT_MAX_CHUNK_BYTES = 100 * 1024 * 1024
+
+
+class ActionChunker(_ActionChunker):
+    """
+    Chunks actions like the helpers do, by count and size, but hands them on
+    as objects instead of NDJSON lines. Sources still go through the client
+    serializer and back, so dates, UUIDs and decimals are converted as over
+    the wire and the fake never keeps a dict the caller may reuse or change.
+    Sizes are only measured when ``max_chunk_bytes`` is lowered from the
+    default; otherwise chunks are cut by count alone.
+    """
+
+    def __init__(self, chunk_size: int, max_chunk_bytes: int, serializer: Any):
+        super().__init__(chunk_size, max_chunk_bytes, serializer)
+        self.measured = max_chunk_bytes < DEFAULT_MAX_CHUNK_BYTES
+
+    def feed(self, action: Any, data: Any) -> Any:
+        ret = None
+        cur_size = 0
+        if self.measured:
+            cur_size = self._size(action)
+        if data is not None:
+            serialized = self.serializer.dumps(data)
+            if self.measured:
+                # +1 to account for the trailing new line character
+                cur_size += len(serialized.encode("utf-8")) + 1
+            data = self.serializer.loads(serialized)
+
+        # full chunk, send it and start a new one
+        if self.bulk_actions and (
+            self.size + cur_size > self.max_chunk_bytes
+            or self.action_count == self.chunk_size
+        ):
+            ret = (self.bulk_data, self.bulk_actions)
+            self.bulk_actions, self.bulk_data = [], []
+            self.size, self.action_count = 0, 0
+
+        self.bulk_actions.append(action)
+        if data is not None:
+            self.bulk_actions.append(data)
+            self.bulk_data.append((action, data))
+        else:
+            self.bulk_data.append((action,))
+
+        self.size += cur_size
+        self.action_count += 1
+        return ret
+
+    def _size(self, value: Any) -> int:
+        # +1 to account for the trailing new line character
+        return len(self.serializer.dumps(value).encode("utf-8")) + 1
+
+
+def _outcomes(resp, error, bulk_data, raise_on_exception, raise_on_error, ignore):
+    if error is not None:
+        return _process_bulk_chunk_error(
+            error=error,
+            bulk_data=bulk_data,
+            ignore_status=ignore,
+            raise_on_exception=raise_on_exception,
+            raise_on_error=raise_on_error,
+        )
+    return _process_bulk_chunk_success(
+        resp=resp,
+        bulk_data=bulk_data,
+        ignore_status=ignore,
+        raise_on_error=raise_on_error,
+    )
+
+
+def process_bulk_chunk(
+    client: Any,
+    bulk_actions: Any,
+    bulk_data: Any,
+    raise_on_exception: bool,
+    raise_on_error: bool,
+    ignore_status: Any,
+    *args: Any,
+    **kwargs: Any,
+) -> Any:
+    """
+    Send a chunk of actions, objects or serialized lines, as a list body and
+    yield the outcome of every action. opensearch-py passes every argument
+    positionally, its defaults included.
+    """
+    if not isinstance(ignore_status, (list, tuple)):
+        ignore_status = (ignore_status,)
+
+    resp, error = None, None
+    try:
+        resp = client.bulk(body=bulk_actions, *args, **kwargs)
+    except TransportError as e:
+        error = e
+    yield from _outcomes(
+        resp, error, bulk_data, raise_on_exception, raise_on_error, ignore_status
+    )
+
+
+async def async_process_bulk_chunk(
+    client: Any,
+    bulk_actions: Any,
+    bulk_data: Any,
+    raise_on_exception: bool,
+    raise_on_error: bool,
+    ignore_status: Any,
+    *args: Any,
+    **kwargs: Any,
+) -> Any:
+    """The async version of ``process_bulk_chunk``"""
+    if not isinstance(ignore_status, (list, tuple)):
+        ignore_status = (ignore_status,)
+
+    resp, error = None, None
+    try:
+        resp = await client.bulk(body=bulk_actions, *args, **kwargs)
+    except TransportError as e:
+        error = e
+    for item in _outcomes(
+        resp, error, bulk_data, raise_on_exception, raise_on_error, ignore_status
+    ):
+        yield item
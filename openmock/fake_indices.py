@@ -4,7 +4,6 @@ Fake Index state
 
 from opensearchpy.client.indices import IndicesClient
 from opensearchpy.client.utils import query_params
-from opensearchpy.exceptions import RequestError
 
 from openmock.behaviour.server_failure import server_failure
 from openmock.utilities.decorator import for_all_methods
@@ -17,37 +16,14 @@ class FakeIndicesClient(IndicesClient):
         """
         Fake index creation
         """
-        invalid_chars = [" ", '"', "*", "\\", "<", "|", ",", ">", "/", "?"]
-        for char in invalid_chars:
-            if char in index:
-                raise RequestError(
-                    400,
-                    "invalid_index_name_exception",
-                    f'Invalid index name [{index}], must not contain the following characters [ , ", *, \\, <, |, ,, >, /, ?]',
-                )
-
-        documents_dict = self.__get_documents_dict()
-        if index not in documents_dict:
-            documents_dict[index] = []
-
-        if body:
-            if "mappings" in body:
-                mappings_dict = self.__get_mappings_dict()
-                mappings_dict[index] = {"mappings": body["mappings"]}
-            if "settings" in body:
-                settings_dict = self.__get_settings_dict()
-                settings = body["settings"]
-                # Store them as they are, but ensure we can access them in get_settings
-                settings_dict[index] = {"settings": settings}
-
-        return {"acknowledged": True, "shards_acknowledged": True, "index": index}
+        return self.client.engine.create_index(index, body)
 
     @query_params("allow_no_indices", "expand_wildcards", "ignore_unavailable", "local")
     def exists(self, index, params=None, headers=None, **kwargs):
         """
         Fake index exists
         """
-        return index in self.__get_documents_dict()
+        return self.client.engine.index_exists(index)
 
     @query_params(
         "allow_no_indices",
@@ -65,131 +41,46 @@ class FakeIndicesClient(IndicesClient):
     @query_params("master_timeout", "timeout")
     def delete(self, index, params=None, headers=None, **kwargs):
         """Fake index deletion"""
-        documents_dict = self.__get_documents_dict()
-        if index in documents_dict:
-            del documents_dict[index]
-        return {"acknowledged": True}
+        return self.client.engine.delete_index(index)
 
     @query_params("master_timeout", "timeout")
     def put_alias(self, index, name, body=None, params=None, headers=None, **kwargs):
         """Fake put alias"""
-        aliases_dict = self.__get_aliases_dict()
-        for idx in self._normalize_index_to_list(index):
-            if idx not in aliases_dict:
-                aliases_dict[idx] = {"aliases": {}}
-            aliases_dict[idx]["aliases"][name] = {}
-        return {"acknowledged": True}
+        return self.client.engine.put_alias(index, name)
 
     @query_params("allow_no_indices", "expand_wildcards", "ignore_unavailable", "local")
     def get_alias(self, index=None, name=None, params=None, headers=None, **kwargs):
         """Fake get alias"""
-        aliases_dict = self.__get_aliases_dict()
-        if index is None:
-            candidate_indices = list(aliases_dict.keys())
-        else:
-            candidate_indices = self._normalize_index_to_list(index)
-
-        res = {}
-        for idx in candidate_indices:
-            entry = aliases_dict.get(idx, {"aliases": {}})
-            if name is not None:
-                filtered = {
-                    k: v for k, v in entry["aliases"].items() if name in ("*", k)
-                }
-                if filtered or index is not None:
-                    res[idx] = {"aliases": filtered}
-            else:
-                res[idx] = entry
-        return res
+        return self.client.engine.get_alias(index, name)
 
     @query_params("master_timeout", "timeout")
     def delete_alias(self, index, name, params=None, headers=None, **kwargs):
         """Fake delete alias"""
-        aliases_dict = self.__get_aliases_dict()
-        for idx in self._normalize_index_to_list(index):
-            if idx in aliases_dict and name in aliases_dict[idx]["aliases"]:
-                del aliases_dict[idx]["aliases"][name]
-        return {"acknowledged": True}
+        return self.client.engine.delete_alias(index, name)
 
     @query_params("allow_no_indices", "expand_wildcards", "ignore_unavailable", "local")
     def exists_alias(self, name, index=None, params=None, headers=None, **kwargs):
         """Fake exists alias"""
-        aliases_dict = self.__get_aliases_dict()
-        indices_to_check = (
-            self._normalize_index_to_list(index) if index else list(aliases_dict.keys())
-        )
-        for idx in indices_to_check:
-            if idx in aliases_dict:
-                if isinstance(name, str):
-                    names = [n.strip() for n in name.split(",")]
-                else:
-                    names = [name]
-                for n in names:
-                    if n in aliases_dict[idx]["aliases"]:
-                        return True
-        return False
+        return self.client.engine.exists_alias(name, index)
 
     @query_params("master_timeout", "timeout")
     def update_aliases(self, body, params=None, headers=None, **kwargs):
         """Fake update_aliases — atomic add/remove actions"""
-        aliases_dict = self.__get_aliases_dict()
-        for action in body.get("actions", []):
-            if "add" in action:
-                add = action["add"]
-                idx = add["index"]
-                name = add["alias"]
-                if idx not in aliases_dict:
-                    aliases_dict[idx] = {"aliases": {}}
-                aliases_dict[idx]["aliases"][name] = {}
-            elif "remove" in action:
-                rem = action["remove"]
-                idx = rem["index"]
-                name = rem["alias"]
-                if idx in aliases_dict and name in aliases_dict[idx]["aliases"]:
-                    del aliases_dict[idx]["aliases"][name]
-        return {"acknowledged": True}
+        return self.client.engine.update_aliases(body)
 
     def stats(self, index=None, metric=None, params=None, headers=None, **kwargs):
-        """Fake stats"""
-        return {
-            "_shards": {"total": 1, "successful": 1, "failed": 0},
-            "indices": {
-                idx: {"uuid": "uuid", "primaries": {}, "total": {}}
-                for idx in self._normalize_index_to_list(index)
-            },
-        }
-
-    def __get_aliases_dict(self):
-        """Get the aliases dictionary"""
-        return self.client.__aliases_dict
+        """Fake stats, with the document counts and filter cache of each index"""
+        return self.client.engine.stats(index, metric)
 
     @query_params("master_timeout", "timeout")
     def get_mapping(self, index=None, params=None, headers=None, **kwargs):
         """Fake get mapping"""
-        mappings_dict = self.__get_mappings_dict()
-        if index is None or index == "_all" or index == "*":
-            return mappings_dict
-
-        res = {}
-        for idx in self._normalize_index_to_list(index):
-            res[idx] = mappings_dict.get(idx, {"mappings": {}})
-        return res
+        return self.client.engine.get_mapping(index)
 
     @query_params("master_timeout", "timeout")
     def put_mapping(self, body, index=None, params=None, headers=None, **kwargs):
         """Fake put mapping"""
-        mappings_dict = self.__get_mappings_dict()
-        for idx in self._normalize_index_to_list(index):
-            if idx not in mappings_dict:
-                mappings_dict[idx] = {"mappings": {"properties": {}}}
-            if "mappings" not in mappings_dict[idx]:
-                mappings_dict[idx]["mappings"] = {"properties": {}}
-            if "properties" not in mappings_dict[idx]["mappings"]:
-                mappings_dict[idx]["mappings"]["properties"] = {}
-
-            new_props = body.get("properties", body)
-            mappings_dict[idx]["mappings"]["properties"].update(new_props)
-        return {"acknowledged": True}
+        return self.client.engine.put_mapping(body, index)
 
     @query_params(
         "allow_no_indices",
@@ -201,50 +92,7 @@ class FakeIndicesClient(IndicesClient):
     )
     def get_settings(self, index=None, name=None, params=None, headers=None, **kwargs):
         """Fake get settings"""
-        settings_dict = self.__get_settings_dict()
-        if index is None or index == "_all" or index == "*":
-            return settings_dict
-
-        res = {}
-        for idx in self._normalize_index_to_list(index):
-            entry = settings_dict.get(
-                idx,
-                {
-                    "settings": {
-                        "index": {"number_of_shards": "1", "number_of_replicas": "1"}
-                    }
-                },
-            )
-            settings = entry.get("settings", {})
-
-            # Real OpenSearch often nests these under "index" if not already
-            if "index" not in settings:
-                # If it's a flat dict of settings, or has other top level keys
-                # for now let's just ensure we return it in a way that includes "index"
-                new_settings = {"index": {}}
-                for k, v in settings.items():
-                    if k in [
-                        "number_of_shards",
-                        "number_of_replicas",
-                        "analysis",
-                        "provided_name",
-                        "creation_date",
-                        "uuid",
-                        "version",
-                    ]:
-                        new_settings["index"][k] = v
-                    else:
-                        new_settings["index"][k] = v
-                settings = new_settings
-
-            # Convert all values to strings for number_of_shards/replicas to match real behavior
-            if "index" in settings:
-                for k in ["number_of_shards", "number_of_replicas"]:
-                    if k in settings["index"]:
-                        settings["index"][k] = str(settings["index"][k])
-
-            res[idx] = {"settings": settings}
-        return res
+        return self.client.engine.get_settings(index)
 
     @query_params(
         "allow_no_indices",
@@ -257,56 +105,20 @@ class FakeIndicesClient(IndicesClient):
     )
     def put_settings(self, body, index=None, params=None, headers=None, **kwargs):
         """Fake put settings"""
-        settings_dict = self.__get_settings_dict()
-        for idx in self._normalize_index_to_list(index):
-            if idx not in settings_dict:
-                settings_dict[idx] = {"settings": {"index": {}}}
-            if "settings" not in settings_dict[idx]:
-                settings_dict[idx]["settings"] = {"index": {}}
-            if "index" not in settings_dict[idx]["settings"]:
-                settings_dict[idx]["settings"]["index"] = {}
+        return self.client.engine.put_settings(body, index)
 
-            new_settings = body.get("index", body)
-            for k, v in new_settings.items():
-                settings_dict[idx]["settings"]["index"][k] = str(v)
-        return {"acknowledged": True}
+    @query_params(
+        "allow_no_indices",
+        "expand_wildcards",
+        "flush",
+        "ignore_unavailable",
+        "max_num_segments",
+        "only_expunge_deletes",
+    )
+    def forcemerge(self, index=None, params=None, headers=None, **kwargs):
+        """Fake force merge, drops the deleted documents of the indices"""
+        return self.client.engine.forcemerge(index)
 
     def analyze(self, body=None, index=None, params=None, headers=None, **kwargs):
         """Fake index analyze"""
         return {"tokens": []}
-
-    def __get_documents_dict(self):
-        """Get the documents dictionary"""
-        return self.client._FakeIndicesClient__documents_dict
-
-    def __get_mappings_dict(self):
-        """Get the mappings dictionary"""
-        return self.client._FakeIndicesClient__mappings_dict
-
-    def __get_settings_dict(self):
-        """Get the settings dictionary"""
-        return self.client._FakeIndicesClient__settings_dict
-
-    def _normalize_index_to_list(self, index):
-        """Normalize index to a list of indexes, resolving aliases to their backing indices."""
-        if index is None or index == "*" or index == "_all":
-            return list(self.__get_documents_dict().keys())
-        if isinstance(index, str):
-            raw = [idx.strip() for idx in index.split(",")]
-        elif isinstance(index, list):
-            raw = index
-        else:
-            raw = [index]
-        aliases_dict = self.__get_aliases_dict()
-        resolved = []
-        for name in raw:
-            backing = [
-                idx
-                for idx, entry in aliases_dict.items()
-                if name in entry.get("aliases", {})
-            ]
-            if backing:
-                resolved.extend(backing)
-            else:
-                resolved.append(name)
-        return resolved
@@ -310,7 +310,7 @@ class FakeOpenSearchServer:
                     "status": "open",
                     "index": index_name,
                     "docs.count": str(len(docs)),
-                    "docs.deleted": "0",
+                    "docs.deleted": str(docs.deleted),
                 }
             )
         selected_headers = headers or [
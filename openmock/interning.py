@@ -0,0 +1,72 @@
+"""
+Ingest-time interning of the field names and string values of documents
+"""
+
+import sys
+from typing import Any
+
+DEFAULT_MAX_ENTRIES = 10_000
+# Longer strings are seldom repeated
+DEFAULT_MAX_LENGTH = 256
+
+
+class StringInterner:
+    """
+    Bounded table of the strings seen in the documents of one index. Every
+    field name and short string value is replaced by the copy already in the
+    table, so documents with the same keys and low-cardinality values share
+    them. Once the table is full, strings not in it are kept as they are.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_length: int = DEFAULT_MAX_LENGTH,
+    ):
+        self.max_entries = max_entries
+        self.max_length = max_length
+        self.interned = 0
+        self.saved_bytes = 0
+        self._table: dict[str, str] = {}
+        # Size of the strings held by the table, apart from the table itself
+        self._strings_size = 0
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def intern(self, value: str) -> str:
+        """The shared copy of a string"""
+        shared = self._table.get(value)
+        if shared is not None:
+            if shared is not value:
+                self.interned += 1
+                self.saved_bytes += sys.getsizeof(value)
+            return shared
+        if len(self._table) < self.max_entries and len(value) <= self.max_length:
+            # The table holds plain strings, never a subclass like a str enum
+            value = str.__str__(value)
+            self._table[value] = value
+            self._strings_size += sys.getsizeof(value)
+        return value
+
+    def normalize(self, value: Any) -> Any:
+        """A copy of a document source made of shared strings"""
+        if isinstance(value, dict):
+            return {
+                self.intern(key) if isinstance(key, str) else key: self.normalize(item)
+                for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [self.normalize(item) for item in value]
+        if isinstance(value, str):
+            return self.intern(value)
+        return value
+
+    def stats(self) -> dict[str, int]:
+        """The ``string_interning`` section of index stats"""
+        return {
+            "entries": len(self._table),
+            "memory_size_in_bytes": sys.getsizeof(self._table) + self._strings_size,
+            "interned_count": self.interned,
+            "saved_in_bytes": self.saved_bytes,
+        }
@@ -0,0 +1,120 @@
+"""
+Reader/writer locks guarding the documents of an index across threads
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+
+
+class ReadWriteLock:
+    """
+    Many readers or a single writer. Readers arriving while a writer waits
+    queue behind it, so a steady flow of searches can't starve writes.
+
+    A thread holding the lock can take it again for reading, and the writer
+    again for writing, so an operation can call others on the same index.
+    A read lock can't be upgraded to a write lock.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._waiting_writers = 0
+        self._writer = None
+        self._write_depth = 0
+        # Read holds of the current thread, including those taken as writer
+        self._local = threading.local()
+
+    def acquire_read(self) -> None:
+        """Wait until no writer holds or waits for the lock, then share it"""
+        local = self._local
+        reads = getattr(local, "reads", 0)
+        if reads or self._writer == threading.get_ident():
+            local.reads = reads + 1
+            return
+        with self._condition:
+            while self._writer is not None or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        local.reads = 1
+
+    def release_read(self) -> None:
+        """Release a read hold of the current thread"""
+        local = self._local
+        local.reads -= 1
+        if local.reads or self._writer == threading.get_ident():
+            return
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self) -> None:
+        """Wait until the readers and the writer are gone, then take the lock"""
+        me = threading.get_ident()
+        if self._writer == me:
+            self._write_depth += 1
+            return
+        if getattr(self._local, "reads", 0):
+            raise RuntimeError("A read lock can't be upgraded to a write lock")
+        with self._condition:
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+        self._write_depth = 1
+
+    def release_write(self) -> None:
+        """Release a write hold, waking everyone waiting once it was the last"""
+        self._write_depth -= 1
+        if self._write_depth:
+            return
+        with self._condition:
+            self._writer = None
+            self._condition.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Hold the lock for reading"""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Hold the lock for writing"""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+@contextmanager
+def locked(stores: Iterable, write: bool = False) -> Iterator[None]:
+    """
+    Hold the locks of several stores, for reading or writing. Locks are
+    always taken in the same order, so two threads locking overlapping
+    indices can't wait on each other.
+    """
+    held = []
+    try:
+        for store in sorted(set(stores), key=id):
+            if write:
+                store.lock.acquire_write()
+            else:
+                store.lock.acquire_read()
+            held.append(store.lock)
+        yield
+    finally:
+        for lock in reversed(held):
+            if write:
+                lock.release_write()
+            else:
+                lock.release_read()
@@ -0,0 +1,973 @@
+"""
+Compile the query DSL into a tree of matcher nodes
+
+A search compiles ``body["query"]`` once; the per-document loop then only calls
+``matches`` on the prebuilt nodes, without parsing the DSL or dispatching on
+query type strings. Nodes that an index's term postings or sorted doc-values
+columns can answer also implement ``docs``, which returns the matching slots
+as a bitset (see :mod:`openmock.bitset`) without a scan. ``bool`` nodes
+combine the bitsets of their clauses, and fill the ones of clauses that need
+a scan in a single pass over the index.
+
+Within ``must`` / ``filter``, clauses are planned from index statistics
+(postings sizes, doc-values ranges, scan costs): the most selective ones are
+intersected first and the rest only check the candidates left. ``explain``
+shows the chosen plan, and a search with ``"profile": true`` returns it.
+"""
+
+import datetime
+import json
+import operator
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Final, Optional
+
+import dateutil.parser
+import ranges
+
+from openmock.bitset import at_least, count
+
+LT_KEYS = {"lt", "lte"}
+GT_KEYS = {"gt", "gte"}
+
+RANGE_OPERATORS = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+RANGE_OPTIONS = {"relation", "format", "time_zone", "boost"}
+
+BOOL_OPTIONS = {"boost", "_name", "adjust_pure_negative"}
+
+MISSING = object()
+
+# Checking a document with ``matches`` costs about this many bitset inserts
+# per unit of ``scan_cost``
+CHECK_COST = 4
+
+# What ``docs``, ``estimate`` and ``count`` answer for a clause its indexes
+# can't, which a scan has to check document by document
+NEEDS_SCAN: Final = None
+
+
+def _create_range(field):
+    if not any(x in field.keys() for x in LT_KEYS) or not any(
+        x in field.keys() for x in GT_KEYS
+    ):
+        raise ValueError(
+            f"Range queries on maps must contain one of {LT_KEYS} and one of {GT_KEYS}"
+        )
+    interval_notation = ""
+    if "gte" in field:
+        interval_notation += f"[{field['gte']}"
+    elif "gt" in field:
+        interval_notation += f"({field['gt']}"
+
+    if "lte" in field:
+        interval_notation += f",{field['lte']}]"
+    elif "lt" in field:
+        interval_notation += f",{field['lt']})"
+
+    return ranges.Range(interval_notation)
+
+
+def parse_field(field):
+    """Split a field reference into its path and whether it asks for an exact match"""
+    # Remove boosting
+    field, *_ = field.split("^")
+    # Remove ".keyword"
+    exact = field.lower().endswith(".keyword")
+    if exact:
+        field = field[: -len(".keyword")]
+    return tuple(field.split(".")), exact
+
+
+def resolve_path(source, path):
+    """Walk a dotted path through a document source, MISSING if absent"""
+    value = source
+    for key in path:
+        if isinstance(value, dict):
+            value = value.get(key, MISSING)
+            if value is MISSING:
+                return MISSING
+        elif value is not None and hasattr(value, key):
+            value = getattr(value, key)
+        else:
+            return MISSING
+    return value
+
+
+def term_key(value, ignore_case):
+    """The postings key of a stored value, as compared by exact term queries"""
+    if isinstance(value, (int, float, complex)):
+        return value
+    value = str(value)
+    return value.lower() if ignore_case else value
+
+
+def _value_matcher(values, exact, ignore_case) -> Callable[[Any], bool]:
+    """
+    Build the comparison for one stored value. Without ``.keyword`` string
+    queries are split in words that may appear anywhere in the stored value.
+    """
+    terms = []
+    for value in values:
+        if ignore_case and isinstance(value, str):
+            value = value.lower()
+        if not exact and isinstance(value, str):
+            terms.extend(value.split())
+        else:
+            terms.append(value)
+    term_strings = [str(term) for term in terms]
+
+    def matcher(val):
+        if isinstance(val, (int, float, complex)):
+            return val in terms
+        val = str(val)
+        if ignore_case:
+            val = val.lower()
+        if exact:
+            return val in terms
+        for term in term_strings:
+            if term in val:
+                return True
+        return False
+
+    return matcher
+
+
+class QueryNode:
+    """A compiled query clause"""
+
+    __slots__ = ()
+
+    # Relative cost of checking one document with ``matches``
+    scan_cost = 1
+    # How ``docs`` answers the clause, for plans
+    index_strategy = "index"
+
+    def matches(self, document) -> bool:
+        """Whether a stored document satisfies the clause"""
+        raise NotImplementedError
+
+    def docs(self, store):
+        """
+        Bitset of the slots of ``store`` matching the clause, answered from its
+        indexes, or None when the clause needs a scan
+        """
+        return NEEDS_SCAN
+
+    def estimate(self, store) -> Optional[int]:
+        """
+        Upper bound of the number of slots ``docs`` returns, from the index
+        statistics of ``store``; None when the clause needs a scan
+        """
+        return NEEDS_SCAN
+
+    def count(self, store) -> Optional[int]:
+        """
+        Number of live documents of ``store`` matching the clause, from its
+        indexes; None when the clause needs a scan
+        """
+        bits = self.docs(store)
+        return NEEDS_SCAN if bits is NEEDS_SCAN else count(bits)
+
+    def cost(self, store) -> int:
+        """Estimated work to build the bitset of the clause over ``store``"""
+        estimate = self.estimate(store)
+        if estimate is NEEDS_SCAN:
+            return len(store) * self.scan_cost * CHECK_COST
+        return estimate + 1
+
+    def describe(self) -> str:
+        """The clause in a few words"""
+        return type(self).__name__
+
+    def explain(self, store) -> dict[str, Any]:
+        """How the clause runs against ``store``"""
+        estimate = self.estimate(store)
+        return {
+            "type": type(self).__name__,
+            "description": self.describe(),
+            "strategy": "scan" if estimate is NEEDS_SCAN else self.index_strategy,
+            "estimated_hits": len(store) if estimate is NEEDS_SCAN else estimate,
+            "scan_cost": self.scan_cost,
+        }
+
+
+class MatchAll(QueryNode):
+    __slots__ = ()
+
+    scan_cost = 0
+    index_strategy = "all"
+
+    def matches(self, document):
+        return True
+
+    def docs(self, store):
+        return store.live()
+
+    def estimate(self, store):
+        return len(store)
+
+    def count(self, store):
+        return len(store)
+
+    def describe(self):
+        return "*:*"
+
+
+class MatchNone(QueryNode):
+    __slots__ = ()
+
+    scan_cost = 0
+    index_strategy = "none"
+
+    def matches(self, document):
+        return False
+
+    def docs(self, store):
+        return 0
+
+    def estimate(self, store):
+        return 0
+
+    def count(self, store):
+        return 0
+
+    def describe(self):
+        return "-*:*"
+
+
+MATCH_ALL = MatchAll()
+MATCH_NONE = MatchNone()
+
+
+class FieldMatch(QueryNode):
+    """match, term, terms and multi_match: any of the values in any of the fields"""
+
+    __slots__ = ("fields", "values", "ignore_case", "scan_cost", "_matchers", "_keys")
+
+    index_strategy = "postings"
+
+    def __init__(self, fields, values, ignore_case):
+        self.fields = [parse_field(field) for field in fields]
+        self.values = list(values)
+        self.ignore_case = ignore_case
+        # Analysed fields split and substring-search every value
+        self.scan_cost = sum(1 if exact else 4 for _, exact in self.fields) * max(
+            1, len(self.values)
+        )
+        self._matchers = [
+            (path, _value_matcher(self.values, exact, ignore_case))
+            for path, exact in self.fields
+        ]
+        # Only str and numbers can ever equal a stored term
+        self._keys = [
+            term_key(value, ignore_case)
+            for value in self.values
+            if isinstance(value, (str, int, float, complex))
+        ]
+
+    def matches(self, document):
+        source = document["_source"]
+        for path, matcher in self._matchers:
+            value = resolve_path(source, path)
+            if value is MISSING:
+                continue
+            if isinstance(value, list):
+                for item in value:
+                    if matcher(item):
+                        return True
+            elif matcher(value):
+                return True
+        return False
+
+    def docs(self, store):
+        # Without .keyword, term and terms too match words anywhere in the
+        # stored value, which postings of whole values can't answer
+        if not all(exact for _, exact in self.fields):
+            return None
+        postings = [
+            store.term_index(path, self.ignore_case).postings for path, _ in self.fields
+        ]
+        return store.bitset(
+            slot
+            for field_postings in postings
+            for key in self._keys
+            for slot in field_postings.get(key, ())
+        )
+
+    def estimate(self, store):
+        if not all(exact for _, exact in self.fields):
+            return None
+        hits = 0
+        for path, _ in self.fields:
+            postings = store.term_index(path, self.ignore_case).postings
+            hits += sum(len(postings.get(key, ())) for key in self._keys)
+        return min(hits, len(store))
+
+    def count(self, store):
+        # A single posting list holds no duplicates, its length is the count
+        if len(self.fields) == 1 and len(set(self._keys)) <= 1 and self.fields[0][1]:
+            path, _ = self.fields[0]
+            postings = store.term_index(path, self.ignore_case).postings
+            return len(postings.get(self._keys[0], ())) if self._keys else 0
+        return super().count(store)
+
+    def describe(self):
+        fields = ",".join(
+            ".".join(path) + (".keyword" if exact else "")
+            for path, exact in self.fields
+        )
+        return f"{fields}:{','.join(str(value) for value in self.values)}"
+
+
+class RangeMatch(QueryNode):
+    """range on a single field, for point values and range-valued fields"""
+
+    __slots__ = ("path", "comparisons", "_bounds", "_date_bounds", "_query_range")
+
+    scan_cost = 2
+    index_strategy = "doc_values"
+
+    def __init__(self, field, comparisons):
+        self.path = tuple(field.split("."))
+        self.comparisons = comparisons
+        self._bounds = []
+        for sign, bound in comparisons.items():
+            if sign in RANGE_OPTIONS:
+                continue
+            if sign not in RANGE_OPERATORS:
+                raise ValueError(f"Invalid comparison type {sign}")
+            self._bounds.append((RANGE_OPERATORS[sign], bound))
+        self._date_bounds = None
+        self._query_range = None
+
+    def matches(self, document):
+        value = resolve_path(document["_source"], self.path)
+        if value is MISSING or value is None or isinstance(value, list):
+            return False
+        if isinstance(value, dict):
+            return self._matches_range(value)
+        bounds = self._bounds
+        if isinstance(value, datetime.datetime):
+            bounds = self._get_date_bounds()
+        try:
+            for compare, bound in bounds:
+                if not compare(value, bound):
+                    return False
+        except TypeError:
+            return False
+        return True
+
+    def docs(self, store):
+        # Point values come from the field's sorted column, range-valued
+        # fields (objects) still go through ``matches``
+        doc_values = store.doc_values(self.path)
+        slots = doc_values.range_slots(self._bounds, dateutil.parser.isoparse)
+        for slot in doc_values.unordered:
+            if self.matches(store.document(slot)):
+                slots.add(slot)
+        return store.bitset(slots)
+
+    def estimate(self, store):
+        doc_values = store.doc_values(self.path)
+        hits = doc_values.range_count(self._bounds, dateutil.parser.isoparse)
+        return min(hits + len(doc_values.unordered), len(store))
+
+    def describe(self):
+        bounds = " ".join(
+            f"{sign} {bound}"
+            for sign, bound in self.comparisons.items()
+            if sign not in RANGE_OPTIONS
+        )
+        return f"{'.'.join(self.path)}:[{bounds}]"
+
+    def _get_date_bounds(self):
+        # Bounds are parsed on first use only, never per document
+        if self._date_bounds is None:
+            self._date_bounds = [
+                (
+                    compare,
+                    (
+                        dateutil.parser.isoparse(bound)
+                        if isinstance(bound, str)
+                        else bound
+                    ),
+                )
+                for compare, bound in self._bounds
+            ]
+        return self._date_bounds
+
+    def _matches_range(self, value):
+        document_range = _create_range(value)
+        if self._query_range is None:
+            self._query_range = _create_range(self.comparisons)
+        relation = self.comparisons.get("relation", "intersects")
+        if relation == "within":
+            return document_range in self._query_range
+        if relation == "contains":
+            return self._query_range in document_range
+        return document_range.intersection(self._query_range) is not None
+
+
+class Exists(QueryNode):
+    """exists: the field is present with a non-null value"""
+
+    __slots__ = ("path",)
+
+    def __init__(self, field):
+        self.path, _ = parse_field(field)
+
+    def matches(self, document):
+        value = resolve_path(document["_source"], self.path)
+        if isinstance(value, list):
+            return any(item is not None for item in value)
+        return value is not MISSING and value is not None
+
+    index_strategy = "postings"
+
+    def docs(self, store):
+        return store.bitset(store.term_index(self.path, False).present)
+
+    def estimate(self, store):
+        return len(store.term_index(self.path, False).present)
+
+    def count(self, store):
+        return len(store.term_index(self.path, False).present)
+
+    def describe(self):
+        return f"exists:{'.'.join(self.path)}"
+
+
+class Ids(QueryNode):
+    __slots__ = ("values",)
+
+    def __init__(self, values):
+        self.values = set(values)
+
+    def matches(self, document):
+        return document["_id"] in self.values
+
+    index_strategy = "ids"
+
+    def docs(self, store):
+        return store.bitset(store.id_slots(self.values))
+
+    def estimate(self, store):
+        return min(len(self.values), len(store))
+
+    def count(self, store):
+        return len(store.id_slots(self.values))
+
+    def describe(self):
+        return f"_id:[{len(self.values)} ids]"
+
+
+def _union_with_scan(store, clauses, bitsets):
+    """
+    Slots matching any of ``clauses``: the union of their ``bitsets``, plus one
+    scan for the clauses without one (None) over the slots not matched yet
+    """
+    union = 0
+    scanned = []
+    for clause, bits in zip(clauses, bitsets):
+        if bits is None:
+            scanned.append(clause)
+        else:
+            union |= bits
+    if scanned:
+        (bits,) = store.scan([AnyOf(scanned).matches], store.live() & ~union)
+        union |= bits
+    return union
+
+
+class _Compound(QueryNode, ABC):
+    """A clause made of other clauses, combined as each subclass says"""
+
+    __slots__ = ("clauses", "scan_cost", "_predicates")
+
+    index_strategy = "bitsets"
+
+    def __init__(self, clauses):
+        self.clauses = list(clauses)
+        self.scan_cost = sum(clause.scan_cost for clause in self.clauses)
+        # Cheap checks first, so expensive ones see fewer documents
+        self._predicates = [
+            clause.matches
+            for clause in sorted(self.clauses, key=lambda clause: clause.scan_cost)
+        ]
+
+    @abstractmethod
+    def matches(self, document):
+        """Whether a stored document satisfies the clauses, combined"""
+
+    def cost(self, store):
+        return sum(clause.cost(store) for clause in self.clauses)
+
+    def describe(self):
+        return f"{type(self).__name__}[{len(self.clauses)} clauses]"
+
+    def explain(self, store):
+        plan = super().explain(store)
+        plan["children"] = [clause.explain(store) for clause in self.clauses]
+        return plan
+
+
+class AllOf(_Compound):
+    """must / filter: every clause matches"""
+
+    __slots__ = ()
+
+    def matches(self, document):
+        for predicate in self._predicates:
+            if not predicate(document):
+                return False
+        return True
+
+    def plan(self, store) -> list[tuple[QueryNode, str, Optional[int]]]:
+        """
+        ``(clause, step, estimated hits)`` in execution order. Clauses are
+        intersected from the most selective up, as long as building their
+        bitset costs less than checking the candidates left; the others are
+        checked on those candidates, cheapest first.
+        """
+        steps, checks = [], []
+        candidates = len(store)
+        estimated = [(clause, clause.estimate(store)) for clause in self.clauses]
+        estimated.sort(key=lambda item: len(store) if item[1] is None else item[1])
+        for clause, estimate in estimated:
+            check_cost = candidates * clause.scan_cost * CHECK_COST
+            if estimate is not None and clause.cost(store) < check_cost:
+                steps.append((clause, "intersect", estimate))
+                candidates = min(candidates, estimate)
+            else:
+                checks.append((clause, "check", estimate))
+        checks.sort(key=lambda step: step[0].scan_cost)
+        return steps + checks
+
+    def docs(self, store):
+        bits = None
+        checks = []
+        for clause, step, _ in self.plan(store):
+            clause_bits = None if step == "check" else clause.docs(store)
+            if clause_bits is None:
+                checks.append(clause.matches)
+                continue
+            bits = clause_bits if bits is None else bits & clause_bits
+            if not bits:
+                return 0
+        if checks:
+            (bits,) = store.scan([_all_predicate(checks)], bits)
+        return bits
+
+    def estimate(self, store):
+        estimates = [clause.estimate(store) for clause in self.clauses]
+        estimates = [estimate for estimate in estimates if estimate is not None]
+        return min(estimates) if estimates else None
+
+    def cost(self, store):
+        cost = 0
+        candidates = len(store)
+        for clause, step, estimate in self.plan(store):
+            if step == "intersect":
+                cost += clause.cost(store)
+                candidates = min(candidates, estimate)
+            else:
+                cost += candidates * clause.scan_cost * CHECK_COST
+        return cost
+
+    def explain(self, store):
+        plan = QueryNode.explain(self, store)
+        plan["children"] = []
+        for clause, step, _ in self.plan(store):
+            child = clause.explain(store)
+            child["step"] = step
+            plan["children"].append(child)
+        return plan
+
+
+def _all_predicate(predicates):
+    def predicate(document):
+        for check in predicates:
+            if not check(document):
+                return False
+        return True
+
+    return predicate
+
+
+class AnyOf(_Compound):
+    """should: at least ``minimum`` clauses match"""
+
+    __slots__ = ("minimum",)
+
+    def __init__(self, clauses, minimum=1):
+        super().__init__(clauses)
+        self.minimum = minimum
+
+    def matches(self, document):
+        needed = self.minimum
+        if needed <= 0:
+            return True
+        for predicate in self._predicates:
+            if predicate(document):
+                needed -= 1
+                if not needed:
+                    return True
+        return False
+
+    def docs(self, store):
+        if self.minimum <= 0:
+            return store.live()
+        bitsets = [clause.docs(store) for clause in self.clauses]
+        scanned = [index for index, bits in enumerate(bitsets) if bits is None]
+        if self.minimum == 1:
+            # A plain scan is as good as a bitset when no clause has an index
+            if len(scanned) == len(bitsets):
+                return None
+            return _union_with_scan(store, self.clauses, bitsets)
+        if scanned:
+            # Each clause needs its own bitset to count matches, still one pass
+            scan = store.scan([self.clauses[index].matches for index in scanned])
+            for index, bits in zip(scanned, scan):
+                bitsets[index] = bits
+        return at_least(bitsets, self.minimum)
+
+    def estimate(self, store):
+        if self.minimum <= 0:
+            return len(store)
+        estimates = [clause.estimate(store) for clause in self.clauses]
+        if self.minimum == 1 and all(estimate is None for estimate in estimates):
+            return None
+        hits = sum(
+            len(store) if estimate is None else estimate for estimate in estimates
+        )
+        return min(hits // self.minimum, len(store))
+
+    def explain(self, store):
+        plan = super().explain(store)
+        plan["minimum_should_match"] = self.minimum
+        return plan
+
+
+class NoneOf(_Compound):
+    """must_not: no clause matches"""
+
+    __slots__ = ()
+
+    def matches(self, document):
+        for predicate in self._predicates:
+            if predicate(document):
+                return False
+        return True
+
+    def docs(self, store):
+        bitsets = [clause.docs(store) for clause in self.clauses]
+        return store.live() & ~_union_with_scan(store, self.clauses, bitsets)
+
+    def estimate(self, store):
+        return len(store)
+
+
+class CachedFilter(QueryNode):
+    """A clause in filter context, answered through the index's filter cache"""
+
+    __slots__ = ("clause", "key", "_memo")
+
+    index_strategy = "filter_cache"
+
+    def __init__(self, clause, key):
+        self.clause = clause
+        self.key = key
+        # The bitset of the last store, so a search looks the cache up once
+        self._memo = None
+
+    @property
+    def scan_cost(self):
+        return self.clause.scan_cost
+
+    def matches(self, document):
+        return self.clause.matches(document)
+
+    def docs(self, store):
+        if not store.filter_cache_enabled:
+            return self.clause.docs(store)
+        return self._bits(store)
+
+    def estimate(self, store):
+        if not store.filter_cache_enabled:
+            return self.clause.estimate(store)
+        # The whole index bitset is built and cached on first use, like
+        # OpenSearch's query cache does for a segment
+        return count(self._bits(store))
+
+    def count(self, store):
+        if not store.filter_cache_enabled:
+            return self.clause.count(store)
+        return count(self._bits(store))
+
+    def cost(self, store):
+        if not store.filter_cache_enabled:
+            return self.clause.cost(store)
+        return 1
+
+    def describe(self):
+        return self.clause.describe()
+
+    def explain(self, store):
+        plan = super().explain(store)
+        plan["children"] = [self.clause.explain(store)]
+        return plan
+
+    def _bits(self, store):
+        memo = self._memo
+        if memo is not None and memo[0] is store and memo[1] == store.generation:
+            return memo[2]
+        bits = store.filter_bits(self.key, self.clause)
+        self._memo = (store, store.generation, bits)
+        return bits
+
+
+# Clauses cheaper to answer than to cache
+_UNCACHED = (MatchAll, MatchNone, Ids)
+
+
+def _single_or(node_class, clauses):
+    if len(clauses) == 1:
+        return clauses[0]
+    return node_class(clauses)
+
+
+def _unwrap(value, key):
+    """Accept both ``{"field": value}`` and ``{"field": {key: value, ...}}``"""
+    if isinstance(value, dict) and key in value:
+        return value[key], value
+    return value, {}
+
+
+def _clause_items(condition):
+    if isinstance(condition, dict):
+        return list(condition.items())
+    return [item for sub_condition in condition or [] for item in sub_condition.items()]
+
+
+def _compile_clause_list(condition):
+    return [compile_clause(key, value) for key, value in _clause_items(condition)]
+
+
+def _compile_filter_list(condition):
+    """Clauses in filter context, their bitsets go through the filter cache"""
+    clauses = []
+    for key, value in _clause_items(condition):
+        clause = compile_clause(key, value)
+        if not isinstance(clause, _UNCACHED):
+            cache_key = json.dumps({key: value}, sort_keys=True, default=str)
+            clause = CachedFilter(clause, cache_key)
+        clauses.append(clause)
+    return clauses
+
+
+def _compile_field_query(condition, ignore_case, value_key):
+    clauses = []
+    for field, value in condition.items():
+        value, options = _unwrap(value, value_key)
+        clauses.append(
+            FieldMatch(
+                [field], [value], ignore_case or options.get("case_insensitive", False)
+            )
+        )
+    return _single_or(AnyOf, clauses) if clauses else MATCH_NONE
+
+
+def _compile_match(condition):
+    return _compile_field_query(condition, True, "query")
+
+
+def _compile_term(condition):
+    return _compile_field_query(condition, False, "value")
+
+
+def _compile_terms(condition):
+    clauses = []
+    for field, values in condition.items():
+        if field == "boost":
+            continue
+        if not isinstance(values, list):
+            raise NotImplementedError("terms lookup is not implemented")
+        clauses.append(FieldMatch([field], values, False))
+    return _single_or(AnyOf, clauses) if clauses else MATCH_NONE
+
+
+def _compile_multi_match(condition):
+    value = condition.get("query")
+    if not value:
+        return MATCH_NONE
+    return FieldMatch(condition.get("fields", []), [value], True)
+
+
+def _compile_range(condition):
+    clauses = [
+        RangeMatch(field, comparisons) for field, comparisons in condition.items()
+    ]
+    return _single_or(AllOf, clauses) if clauses else MATCH_ALL
+
+
+def minimum_should_match(spec, optional_clauses, default):
+    """
+    Number of ``should`` clauses a document needs, from an integer, a negative
+    integer, a (negative) percentage or conditional ``"3<90%"`` specs. Like
+    OpenSearch, the result is capped to the number of optional clauses.
+    """
+    if spec is None:
+        return default
+    spec = str(spec).strip()
+    if "<" in spec:
+        # Below every threshold all clauses are required
+        chosen = None
+        for part in spec.split():
+            threshold, part_spec = part.split("<", 1)
+            if optional_clauses > int(threshold):
+                chosen = part_spec
+        if chosen is None:
+            return optional_clauses
+        spec = chosen
+    if spec.endswith("%"):
+        result = int(optional_clauses * float(spec[:-1]) / 100)
+    else:
+        result = int(spec)
+    if result < 0 or spec.startswith("-"):
+        result = optional_clauses + result
+    return min(max(result, 0), optional_clauses)
+
+
+def _compile_bool(condition):
+    required = []
+    should = []
+    has_required = False
+    for key, value in condition.items():
+        if key in ("must", "filter"):
+            if key == "filter":
+                clauses = _compile_filter_list(value)
+            else:
+                clauses = _compile_clause_list(value)
+            has_required = has_required or bool(clauses)
+            required.extend(clauses)
+        elif key == "should":
+            should = _compile_clause_list(value)
+        elif key == "must_not":
+            must_not = _compile_filter_list(value)
+            if must_not:
+                required.append(NoneOf(must_not))
+        elif key == "minimum_should_match" or key in BOOL_OPTIONS:
+            continue
+        else:
+            raise NotImplementedError(f"type {key} is not implemented for QueryType")
+    if should:
+        # ``should`` only scores alongside ``must`` / ``filter`` unless asked
+        minimum = minimum_should_match(
+            condition.get("minimum_should_match"),
+            len(should),
+            0 if has_required else 1,
+        )
+        if not has_required:
+            # Without them one should clause has to match, whatever is asked
+            minimum = max(minimum, 1)
+        if minimum == 1 and len(should) == 1:
+            required.append(should[0])
+        elif minimum:
+            required.append(AnyOf(should, minimum))
+    if not required:
+        return MATCH_ALL
+    return _single_or(AllOf, required)
+
+
+_COMPILERS = {
+    "bool": _compile_bool,
+    "must": lambda condition: AllOf(_compile_clause_list(condition)),
+    "filter": lambda condition: AllOf(_compile_filter_list(condition)),
+    "should": lambda condition: AnyOf(_compile_clause_list(condition)),
+    "must_not": lambda condition: NoneOf(_compile_filter_list(condition)),
+    "minimum_should_match": lambda condition: MATCH_ALL,
+    "match": _compile_match,
+    "match_all": lambda condition: MATCH_ALL,
+    "match_none": lambda condition: MATCH_NONE,
+    "term": _compile_term,
+    "terms": _compile_terms,
+    "multi_match": _compile_multi_match,
+    "range": _compile_range,
+    "exists": lambda condition: Exists(condition.get("field")),
+    "ids": lambda condition: Ids(condition.get("values", [])),
+}
+
+
+def compile_clause(query_type, condition) -> QueryNode:
+    """Compile one ``{query_type: condition}`` clause"""
+    compiler = _COMPILERS.get(query_type)
+    if compiler is None:
+        raise NotImplementedError(f"type {query_type} is not implemented for QueryType")
+    return compiler(condition)
+
+
+def compile_query(query) -> QueryNode:
+    """
+    Compile a search ``query`` object. Several top level clauses match a
+    document when any of them does.
+    """
+    if not query:
+        return MATCH_ALL
+    clauses = [compile_clause(key, value) for key, value in query.items()]
+    return _single_or(AnyOf, clauses)
+
+
+def compile_sort(sort) -> list[tuple[tuple, bool]]:
+    """
+    Normalize a ``sort`` request into ``(path, descending)`` pairs, primary key
+    first. ``_score`` and ``_doc`` are dropped: every hit scores the same and
+    index order is the default.
+    """
+    if sort is None:
+        return []
+    if not isinstance(sort, list):
+        sort = [sort]
+    keys = []
+    for spec in sort:
+        if isinstance(spec, str):
+            specs = [tuple(spec.split(":", 1)) if ":" in spec else (spec, "asc")]
+        else:
+            specs = list(spec.items())
+        for field, options in specs:
+            order = (
+                options.get("order", "asc") if isinstance(options, dict) else options
+            )
+            if field in ("_score", "_doc"):
+                continue
+            path, _ = parse_field(field)
+            keys.append((path, str(order).lower() == "desc"))
+    return keys
+
+
+def profile_query(
+    query: QueryNode, stores: dict[tuple[str, int], Any]
+) -> dict[str, Any]:
+    """
+    The ``profile`` section of a search response: the plan chosen for the
+    query on every searched shard, keyed by index name and shard number
+    """
+    return {
+        "shards": [
+            {
+                "id": f"[openmock][{index}][{number}]",
+                "searches": [
+                    {
+                        "query": [query.explain(store)],
+                        "rewrite_time": 0,
+                        "collector": [],
+                    }
+                ],
+                "aggregations": [],
+            }
+            for (index, number), store in stores.items()
+        ]
+    }
@@ -0,0 +1,194 @@
+"""
+Search contexts kept between requests: scrolls, frozen search results handed
+out page by page, and points in time, frozen views of indices
+"""
+
+import re
+import threading
+import time
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from opensearchpy.exceptions import NotFoundError
+
+_TIME_UNITS = {
+    "nanos": 1e-9,
+    "micros": 1e-6,
+    "ms": 1e-3,
+    "s": 1,
+    "m": 60,
+    "h": 3600,
+    "d": 86400,
+}
+_TIME_VALUE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([a-z]+)?\s*$")
+
+DEFAULT_SCROLL_SIZE = 10
+# Used when create_pit gets no keep_alive, which OpenSearch requires
+DEFAULT_PIT_KEEP_ALIVE = "1m"
+
+
+def parse_time_value(value) -> float:
+    """Seconds in an OpenSearch time value such as ``"1m"`` or ``"500ms"``"""
+    if isinstance(value, (int, float)):
+        return value / 1000
+    if isinstance(value, bytes):
+        value = value.decode()
+    match = _TIME_VALUE.match(str(value).lower())
+    if match is None or (match.group(2) or "ms") not in _TIME_UNITS:
+        raise ValueError(f"failed to parse time value [{value}]")
+    return float(match.group(1)) * _TIME_UNITS[match.group(2) or "ms"]
+
+
+class SearchContext:
+    """A context released once ``keep_alive`` seconds pass without use"""
+
+    __slots__ = ("keep_alive", "expires_at")
+
+    def __init__(self, keep_alive: float):
+        self.keep_alive = keep_alive
+        self.expires_at = time.monotonic() + keep_alive
+
+    def touch(self, keep_alive=None) -> None:
+        """Extend the life of the context, with a new keep alive if given"""
+        if keep_alive is not None:
+            self.keep_alive = parse_time_value(keep_alive)
+        self.expires_at = time.monotonic() + self.keep_alive
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+class ScrollContext(SearchContext):
+    """
+    The ordered hits of a scrolled search, captured once. Stored documents are
+    replaced rather than changed by writes, so holding on to them keeps the
+    sources as they were when the search ran.
+    """
+
+    __slots__ = ("hits", "position", "size", "response", "sort_keys")
+
+    def __init__(
+        self,
+        hits: list[dict[str, Any]],
+        size: int,
+        keep_alive: float,
+        response: dict[str, Any],
+        position: int = 0,
+        sort_keys: Sequence[tuple[tuple, bool]] = (),
+    ):
+        super().__init__(keep_alive)
+        self.hits = hits
+        self.position = position
+        self.size = size
+        # Everything but the hits, repeated on every page
+        self.response = response
+        # The hits of every page carry their values for these keys
+        self.sort_keys = sort_keys
+
+    def next_page(self) -> list[dict[str, Any]]:
+        """The next ``size`` hits, advancing the cursor"""
+        page = self.hits[self.position : self.position + self.size]
+        self.position += len(page)
+        return page
+
+
+class PointInTime(SearchContext):
+    """
+    Snapshots of the indices of a point in time, by name, which searches
+    naming the point in time read instead of the live indices
+    """
+
+    __slots__ = ("stores", "creation_time")
+
+    def __init__(self, stores: dict[str, Any], keep_alive: float):
+        super().__init__(keep_alive)
+        self.stores = stores
+        self.creation_time = int(time.time() * 1000)
+
+
+class SearchContexts:
+    """Open search contexts of one kind, by id"""
+
+    def __init__(self, new_id: Callable[[], str]):
+        self._new_id = new_id
+        self._contexts: dict[str, Any] = {}
+        self._mutex = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._contexts)
+
+    def items(self) -> list[tuple[str, Any]]:
+        """Live contexts with their ids"""
+        with self._mutex:
+            self.reclaim()
+            return list(self._contexts.items())
+
+    def open(self, context: SearchContext) -> str:
+        """Register a context and return its id"""
+        with self._mutex:
+            self.reclaim()
+            context_id = self._new_id()
+            self._contexts[context_id] = context
+            return context_id
+
+    def get(self, context_id: str) -> Any:
+        """A live context, NotFoundError if it expired or never existed"""
+        with self._mutex:
+            self.reclaim()
+            context = self._contexts.get(context_id)
+        if context is None:
+            raise NotFoundError(
+                404,
+                "search_context_missing_exception",
+                f"No search context found for id [{context_id}]",
+            )
+        return context
+
+    def close(self, context_ids: Optional[Iterable[str]] = None) -> int:
+        """Free the given contexts, or all of them; returns how many were freed"""
+        with self._mutex:
+            if context_ids is None:
+                freed = len(self._contexts)
+                self._contexts.clear()
+                return freed
+            freed = 0
+            for context_id in context_ids:
+                if self._contexts.pop(context_id, None) is not None:
+                    freed += 1
+            return freed
+
+    def reclaim(self) -> None:
+        """Drop the contexts whose keep alive ran out"""
+        with self._mutex:
+            expired = [
+                context_id
+                for context_id, context in self._contexts.items()
+                if context.expired
+            ]
+            for context_id in expired:
+                del self._contexts[context_id]
+
+
+def pit_ids(body) -> list[str]:
+    """Point in time ids named by a ``delete_pit`` body"""
+    pit_id = (body or {}).get("pit_id", [])
+    if isinstance(pit_id, str):
+        return [pit_id]
+    return list(pit_id)
+
+
+def scroll_ids(body=None, scroll_id=None) -> Optional[list[str]]:
+    """
+    Scroll ids named by a ``clear_scroll`` request, None for all of them.
+    Ids may come as a list or comma separated, in the body or the url.
+    """
+    if scroll_id is None and body:
+        scroll_id = body.get("scroll_id")
+    if scroll_id is None:
+        return None
+    if isinstance(scroll_id, str):
+        scroll_id = scroll_id.split(",")
+    scroll_id = [str(context_id).strip() for context_id in scroll_id]
+    if "_all" in scroll_id:
+        return None
+    return scroll_id
@@ -0,0 +1,201 @@
+"""
+The shards of an index and the routing of documents to them, computed the way
+OpenSearch does, so a document lands in the same shard number as on a real
+cluster
+"""
+
+import struct
+from itertools import chain
+from typing import Any, Iterator, Optional, Sequence
+
+from opensearchpy.exceptions import RequestError
+
+from openmock.document_store import DocumentStore
+from openmock.utilities import get_index_setting
+
+# Shard count an index is split to at most, which sets its routing shards
+_LOG2_MAX_SHARDS = 10
+# Preferences that choose between copies of a shard, which a single node
+# without replicas has no choice between
+_COPY_PREFERENCES = ("_local", "_only_local", "_prefer_nodes:", "_only_nodes:")
+
+_MASK = 0xFFFFFFFF
+
+
+def _rotl(value: int, bits: int) -> int:
+    return ((value << bits) | (value >> (32 - bits))) & _MASK
+
+
+def murmur3_32(data: bytes, seed: int = 0) -> int:
+    """MurmurHash3 x86 32 bit of ``data``, as a signed int like Java's"""
+    c1, c2 = 0xCC9E2D51, 0x1B873593
+    h = seed & _MASK
+    end = len(data) - len(data) % 4
+    for (k,) in struct.iter_unpack("<I", data[:end]):
+        k = _rotl(k * c1 & _MASK, 15) * c2 & _MASK
+        h = _rotl(h ^ k, 13)
+        h = (h * 5 + 0xE6546B64) & _MASK
+    tail = data[end:]
+    if tail:
+        k = int.from_bytes(tail, "little")
+        h ^= _rotl(k * c1 & _MASK, 15) * c2 & _MASK
+    h ^= len(data)
+    h ^= h >> 16
+    h = h * 0x85EBCA6B & _MASK
+    h ^= h >> 13
+    h = h * 0xC2B2AE35 & _MASK
+    h ^= h >> 16
+    return h - (1 << 32) if h & 0x80000000 else h
+
+
+def routing_hash(routing: Any) -> int:
+    """Hash of a routing value: murmur3 of the UTF-16 code units of the string"""
+    return murmur3_32(str(routing).encode("utf-16-le", "surrogatepass"))
+
+
+def default_routing_num_shards(number_of_shards: int) -> int:
+    """
+    Routing shards of an index created with ``number_of_shards`` shards: the
+    most it can be split to, by powers of two, without exceeding 1024
+    """
+    splits = max(1, _LOG2_MAX_SHARDS - (number_of_shards - 1).bit_length())
+    return number_of_shards << splits
+
+
+def _invalid_setting(message: str) -> RequestError:
+    return RequestError(400, "illegal_argument_exception", message)
+
+
+class ShardedIndex:
+    """
+    Documents of one index, split in shards. Every shard is a
+    :class:`DocumentStore` of its own, with its own lock, postings and
+    caches; a document lives in the shard its ``routing``, its ``_id`` when
+    not given, hashes to.
+
+    Reads of the whole index go through the shards; the index reads like
+    one store for ``len``, iteration, ``get`` and ``deleted``.
+    """
+
+    def __init__(
+        self,
+        shards: Optional[list[DocumentStore]] = None,
+        routing_num_shards: Optional[int] = None,
+    ):
+        self.shards = shards or [DocumentStore()]
+        if routing_num_shards is None:
+            routing_num_shards = default_routing_num_shards(len(self.shards))
+        self.routing_num_shards = routing_num_shards
+        self.routing_factor = routing_num_shards // len(self.shards)
+
+    @classmethod
+    def from_settings(cls, settings: Optional[dict[str, Any]]) -> "ShardedIndex":
+        """Create an index with the shards an index settings body asks for"""
+        number_of_shards = int(get_index_setting(settings, "number_of_shards", 1))
+        if number_of_shards < 1:
+            raise _invalid_setting(
+                f"Failed to parse value [{number_of_shards}] for setting "
+                "[index.number_of_shards] must be >= 1"
+            )
+        routing_num_shards = get_index_setting(settings, "number_of_routing_shards")
+        if routing_num_shards is not None:
+            routing_num_shards = int(routing_num_shards)
+            if routing_num_shards % number_of_shards:
+                raise _invalid_setting(
+                    f"the number of source shards [{number_of_shards}] must be a "
+                    f"factor of [{routing_num_shards}]"
+                )
+        shards = [
+            DocumentStore.from_settings(settings) for _ in range(number_of_shards)
+        ]
+        return cls(shards, routing_num_shards)
+
+    @property
+    def number_of_shards(self) -> int:
+        return len(self.shards)
+
+    def shard_id(self, doc_id: Any, routing: Any = None) -> int:
+        """Number of the shard a document with this id and routing lives in"""
+        if len(self.shards) == 1:
+            return 0
+        value = doc_id if routing is None else routing
+        return routing_hash(value) % self.routing_num_shards // self.routing_factor
+
+    def shard(self, doc_id: Any, routing: Any = None) -> DocumentStore:
+        """The shard a document with this id and routing lives in"""
+        return self.shards[self.shard_id(doc_id, routing)]
+
+    def get(self, doc_id: Any, routing: Any = None) -> Optional[dict[str, Any]]:
+        """Return the stored document with this id and routing, or None"""
+        return self.shard(doc_id, routing).get(doc_id)
+
+    def searched_shards(
+        self, routing: Any = None, preference: Optional[str] = None
+    ) -> list[int]:
+        """
+        Numbers of the shards a search with ``routing`` and ``preference``
+        reads: the shards the routing values hash to, or all of them, kept to
+        those a ``_shards:`` preference names
+        """
+        numbers: Sequence[int] = range(len(self.shards))
+        if routing not in (None, ""):
+            values = routing.split(",") if isinstance(routing, str) else routing
+            numbers = sorted({self.shard_id(None, value) for value in values})
+        if preference:
+            named = parse_preference(preference)
+            if named is not None:
+                numbers = [number for number in numbers if number in named]
+        return list(numbers)
+
+    def configure(self, settings: Optional[dict[str, Any]]) -> None:
+        """Apply the index settings the shards understand"""
+        for shard in self.shards:
+            shard.configure(settings)
+
+    def compact(self) -> None:
+        """Drop the tombstones of every shard"""
+        for shard in self.shards:
+            shard.compact()
+
+    def snapshot(self) -> "ShardedIndex":
+        """A frozen view of the index as it is now, shard by shard"""
+        shards = [shard.snapshot() for shard in self.shards]
+        return ShardedIndex(shards, self.routing_num_shards)
+
+    def stats(self) -> dict[str, Any]:
+        """The stats sections of the shards, summed"""
+        totals: dict[str, dict[str, Any]] = {}
+        for shard in self.shards:
+            for section, values in shard.stats().items():
+                section_totals = totals.setdefault(section, {})
+                for key, value in values.items():
+                    section_totals[key] = section_totals.get(key, 0) + value
+        return totals
+
+    @property
+    def deleted(self) -> int:
+        return sum(shard.deleted for shard in self.shards)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return chain.from_iterable(self.shards)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+
+def parse_preference(preference: str) -> Optional[set[int]]:
+    """
+    Shard numbers a search ``preference`` keeps the search to, None for all
+    of them. Preferences choosing between copies of a shard are accepted and
+    change nothing; custom strings only make OpenSearch pick the same copies
+    every time, which a single copy always is.
+    """
+    named = None
+    if preference.startswith("_shards:"):
+        shards, _, preference = preference[len("_shards:") :].partition("|")
+        named = {int(number) for number in shards.split(",")}
+        if not preference:
+            return named
+    if preference.startswith("_") and not preference.startswith(_COPY_PREFERENCES):
+        raise _invalid_setting(f"no Preference for [{preference}]")
+    return named
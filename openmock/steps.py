@@ -0,0 +1,31 @@
+"""
+Operations run in steps: generators that pause between batches of work and
+return the response, so an event loop can run other tasks in between
+"""
+
+import asyncio
+from collections.abc import Generator
+from typing import Any
+
+
+def run_steps(steps: Generator[None, None, Any]) -> Any:
+    """Run a stepped operation to the end and return its response"""
+    try:
+        while True:
+            next(steps)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def run_steps_async(steps: Generator[None, None, Any]) -> Any:
+    """Run a stepped operation, yielding to the event loop after every step"""
+    try:
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+            await asyncio.sleep(0)
+    finally:
+        # A cancelled task mustn't leave the operation paused halfway
+        steps.close()
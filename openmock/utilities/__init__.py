@@ -26,3 +26,58 @@ def extract_ignore_as_iterable(params):
     if isinstance(ignore, int):
         ignore = (ignore,)
     return ignore
+
+
+def get_index_setting(settings, name, default=None):
+    """
+    Read an index setting given either flat (``index.a.b``, ``a.b``) or nested
+    (``{"index": {"a": {"b": ...}}}``) in a settings body
+    """
+    if not settings:
+        return default
+    for flat_name in (f"index.{name}", name):
+        if flat_name in settings:
+            return settings[flat_name]
+    if "index" in settings and isinstance(settings["index"], dict):
+        value = get_index_setting(settings["index"], name)
+        if value is not None:
+            return value
+    head, _, rest = name.partition(".")
+    if rest and isinstance(settings.get(head), dict):
+        return get_index_setting(settings[head], rest, default)
+    return default
+
+
+def decode_param(value):
+    """A url parameter as given, ``str`` where opensearch-py encoded it to bytes"""
+    if isinstance(value, bytes):
+        return value.decode()
+    return value
+
+
+def get_search_option(body, params, name, default=None):
+    """
+    A search option given either as a url parameter or in the body, the
+    parameter winning
+    """
+    value = params.get(name) if params else None
+    if value is None and body:
+        value = body.get(name)
+    value = decode_param(value)
+    return default if value is None else value
+
+
+def parse_track_total_hits(value):
+    """
+    The number of hits ``track_total_hits`` asks to count accurately: None
+    for all of them, 0 when the total isn't wanted
+    """
+    if isinstance(value, str):
+        lowered = value.lower()
+        value = lowered == "true" if lowered in ("true", "false") else int(value)
+    if value is True:
+        return None
+    if value is False:
+        return 0
+    value = int(value)
+    return None if value < 0 else value
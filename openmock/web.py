@@ -76,7 +76,7 @@ def website() -> None:
             for index_name, docs in docs_dict.items():
                 with st.expander(f"Index: {index_name} ({len(docs)} documents)"):
                     st.write("Documents:")
-                    st.json(docs)
+                    st.json([dict(doc) for doc in docs])
 
         st.divider()
         st.subheader("Create Index / Add Document")
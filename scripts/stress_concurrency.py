@@ -0,0 +1,120 @@
+"""
+Stress the fake from many threads: reader threads search one index while a
+writer thread keeps indexing into it. Reports the search and write throughput
+for each number of readers, then checks that no write was lost and that every
+sequence number was handed out once.
+
+Searches share the read lock of the index, so they never wait for each other,
+only for the writer. With a GIL, threads still take turns on one core and
+added readers share its time with the writer; on a free-threaded build they
+run in parallel. ``--exclusive`` makes searches lock each other out too, for
+comparison.
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+from openmock import FakeOpenSearch
+from openmock.locking import ReadWriteLock
+
+INDEX = "stress"
+DEFAULT_DOCUMENTS = 20_000
+DEFAULT_SECONDS = 2.0
+DEFAULT_READERS = "1,2,4,8"
+
+
+def populate(es, documents):
+    body = []
+    for i in range(documents):
+        body.append({"index": {"_index": INDEX, "_id": str(i)}})
+        body.append({"n": i, "group": f"g{i % 100}"})
+    es.bulk(body=body)
+
+
+def run(readers, seconds, documents):
+    es = FakeOpenSearch()
+    populate(es, documents)
+    stop = threading.Event()
+    searches = [0] * readers
+    writes = [0]
+
+    def read(slot):
+        i = 0
+        while not stop.is_set():
+            es.search(
+                index=INDEX,
+                body={"query": {"term": {"group.keyword": f"g{i % 100}"}}, "size": 10},
+            )
+            searches[slot] += 1
+            i += 1
+
+    def write():
+        i = 0
+        while not stop.is_set():
+            es.index(index=INDEX, id=f"w{i}", body={"n": i, "group": "written"})
+            writes[0] += 1
+            i += 1
+
+    threads = [threading.Thread(target=read, args=(slot,)) for slot in range(readers)]
+    threads.append(threading.Thread(target=write))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    count = es.count(index=INDEX)["count"]
+    if count != documents + writes[0]:
+        raise RuntimeError(f"lost writes: {documents + writes[0] - count}")
+    hits = es.search(
+        index=INDEX,
+        body={"size": count, "query": {"term": {"group.keyword": "written"}}},
+    )["hits"]["hits"]
+    seq_nos = [hit["_seq_no"] for hit in hits]
+    if len(set(seq_nos)) != len(seq_nos):
+        raise RuntimeError("duplicate sequence numbers")
+    return sum(searches) / seconds, writes[0] / seconds
+
+
+def exclusive_reads():
+    """Make searches take the write lock, as a single mutex would"""
+    ReadWriteLock.acquire_read = ReadWriteLock.acquire_write
+    ReadWriteLock.release_read = ReadWriteLock.release_write
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Measure search and write throughput of the fake under threads."
+    )
+    parser.add_argument("--readers", default=DEFAULT_READERS)
+    parser.add_argument("--seconds", type=float, default=DEFAULT_SECONDS)
+    parser.add_argument("--documents", type=int, default=DEFAULT_DOCUMENTS)
+    parser.add_argument(
+        "--exclusive",
+        action="store_true",
+        help="Lock searches out of each other too, for comparison.",
+    )
+    return parser
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+    if args.exclusive:
+        exclusive_reads()
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"GIL {'enabled' if gil else 'disabled'}, {args.documents} documents")
+    print(f"{'readers':>8} {'searches/s':>12} {'per reader':>12} {'writes/s':>10}")
+    for readers in (int(value) for value in args.readers.split(",")):
+        searches, writes = run(readers, args.seconds, args.documents)
+        print(
+            f"{readers:>8} {searches:>12.0f} {searches / readers:>12.0f}"
+            f" {writes:>10.0f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
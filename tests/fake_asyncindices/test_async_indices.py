@@ -26,3 +26,26 @@ async def test_stats():
     response = await client.indices.stats(index="test-index")
     assert "_shards" in response
     assert "test-index" in response["indices"]
+
+
+@pytest.mark.asyncio
+async def test_mappings_and_settings():
+    client = AsyncFakeOpenSearch()
+    await client.indices.create(
+        index="test-index",
+        body={
+            "settings": {"number_of_shards": 2},
+            "mappings": {"properties": {"title": {"type": "text"}}},
+        },
+    )
+    await client.indices.put_mapping(
+        index="test-index", body={"properties": {"tag": {"type": "keyword"}}}
+    )
+
+    mapping = await client.indices.get_mapping(index="test-index")
+    assert mapping["test-index"]["mappings"]["properties"] == {
+        "title": {"type": "text"},
+        "tag": {"type": "keyword"},
+    }
+    settings = await client.indices.get_settings(index="test-index")
+    assert settings["test-index"]["settings"]["index"]["number_of_shards"] == "2"
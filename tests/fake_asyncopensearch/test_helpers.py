@@ -0,0 +1,33 @@
+import opensearchpy
+from opensearchpy.helpers import async_bulk, async_streaming_bulk
+
+from tests import INDEX_NAME, Testasyncopenmock
+from tests.backend import get_test_hosts, openmock
+
+
+def _actions(count):
+    return ({"_index": INDEX_NAME, "_id": str(i), "n": i} for i in range(count))
+
+
+class TestHelpers(Testasyncopenmock):
+    @openmock
+    async def test_should_bulk_index_actions(self):
+        es = opensearchpy.AsyncOpenSearch(hosts=get_test_hosts())
+
+        success, errors = await async_bulk(es, _actions(5), refresh=True)
+
+        self.assertEqual((5, []), (success, errors))
+        document = await es.get(index=INDEX_NAME, id="3")
+        self.assertEqual({"n": 3}, document["_source"])
+
+    @openmock
+    async def test_should_stream_bulk_results_per_action(self):
+        es = opensearchpy.AsyncOpenSearch(hosts=get_test_hosts())
+
+        results = [
+            result
+            async for result in async_streaming_bulk(es, _actions(3), chunk_size=2)
+        ]
+
+        self.assertEqual(3, len(results))
+        self.assertTrue(all(ok for ok, _ in results))
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from openmock import AsyncFakeOpenSearch
+
+INDEX_NAME = "test_index"
+
+
+def bulk_body(count):
+    body = []
+    for i in range(count):
+        body.append({"index": {"_index": INDEX_NAME, "_id": str(i)}})
+        body.append({"n": i, "status": "open"})
+    return body
+
+
+async def ticks_during(operation):
+    """Times another task got to run while the operation was running"""
+    ticks = 0
+    done = False
+
+    async def ticker():
+        nonlocal ticks
+        while not done:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    ticks = 0
+    try:
+        result = await operation
+    finally:
+        done = True
+        await task
+    return ticks, result
+
+
+@pytest.mark.asyncio
+async def test_operations_run_to_the_end_by_default():
+    es = AsyncFakeOpenSearch()
+
+    ticks, result = await ticks_during(es.bulk(body=bulk_body(500)))
+
+    assert ticks == 0
+    assert len(result["items"]) == 500
+
+
+@pytest.mark.asyncio
+async def test_bulk_yields_every_so_many_documents():
+    es = AsyncFakeOpenSearch(yield_every=100)
+
+    ticks, result = await ticks_during(es.bulk(body=bulk_body(500)))
+
+    assert ticks >= 5
+    assert not result["errors"]
+    assert [item["index"]["_id"] for item in result["items"]] == [
+        str(i) for i in range(500)
+    ]
+    assert (await es.count(index=INDEX_NAME))["count"] == 500
+
+
+@pytest.mark.asyncio
+async def test_by_query_operations_yield_every_so_many_documents():
+    es = AsyncFakeOpenSearch(yield_every=10)
+    await es.bulk(body=bulk_body(50))
+
+    ticks, result = await ticks_during(
+        es.update_by_query(
+            index=INDEX_NAME,
+            body={
+                "query": {"match_all": {}},
+                "script": {
+                    "source": "ctx._source.status = params.status",
+                    "params": {"status": "closed"},
+                },
+            },
+        )
+    )
+    assert ticks >= 5
+    assert result["updated"] == 50
+
+    ticks, result = await ticks_during(
+        es.delete_by_query(
+            index=INDEX_NAME,
+            body={"query": {"term": {"status.keyword": "closed"}}},
+        )
+    )
+    assert ticks >= 5
+    assert result["deleted"] == 50
+    assert (await es.count(index=INDEX_NAME))["count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_tasks_interleave_their_requests():
+    es = AsyncFakeOpenSearch(yield_every=1000)
+    order = []
+
+    async def write(name):
+        for i in range(3):
+            await es.index(index=INDEX_NAME, id=f"{name}{i}", body={"n": i})
+            order.append(name)
+
+    await asyncio.gather(write("a"), write("b"))
+
+    assert order == ["a", "b", "a", "b", "a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_operations_run_in_the_executor():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        es = AsyncFakeOpenSearch(executor=executor)
+        threads = set()
+        search = es.engine.search
+
+        def recording_search(*args):
+            threads.add(threading.get_ident())
+            return search(*args)
+
+        es.engine.search = recording_search
+        await es.bulk(body=bulk_body(100))
+
+        response = await es.search(
+            index=INDEX_NAME, body={"query": {"range": {"n": {"gte": 90}}}}
+        )
+
+    assert response["hits"]["total"]["value"] == 10
+    assert threads and threading.get_ident() not in threads
+
+
+@pytest.mark.asyncio
+async def test_default_executor_of_the_loop():
+    es = AsyncFakeOpenSearch(executor=True)
+
+    await es.indices.create(index=INDEX_NAME)
+    await es.index(index=INDEX_NAME, id="1", body={"n": 1})
+
+    assert (await es.get(index=INDEX_NAME, id="1"))["_source"] == {"n": 1}
+
+
+def test_executor_and_yield_every_are_exclusive():
+    with pytest.raises(ValueError):
+        AsyncFakeOpenSearch(executor=True, yield_every=100)
@@ -0,0 +1,23 @@
+from tests import INDEX_NAME, Testasyncopenmock
+
+
+class TestSearchAfter(Testasyncopenmock):
+    async def test_search_after_pages_through_a_point_in_time(self):
+        for i in range(10):
+            await self.es.index(index=INDEX_NAME, id=str(i), body={"n": i // 2})
+        pit_id = (await self.es.create_pit(index=INDEX_NAME, keep_alive="1m"))["pit_id"]
+        await self.es.index(index=INDEX_NAME, id="new", body={"n": 0})
+
+        body = {"pit": {"id": pit_id}, "sort": [{"n": "desc"}], "size": 3}
+        seen = []
+        while True:
+            result = await self.es.search(body=body)
+            hits = result["hits"]["hits"]
+            if not hits:
+                break
+            seen.extend(hit["_id"] for hit in hits)
+            body["search_after"] = hits[-1]["sort"]
+
+        self.assertEqual(["8", "9", "6", "7", "4", "5", "2", "3", "0", "1"], seen)
+        result = await self.es.delete_pit(body={"pit_id": pit_id})
+        self.assertTrue(result["pits"][0]["successful"])
@@ -34,3 +34,122 @@ def test_normalize_index_to_list():
     res = client.indices.get_alias(index=["idx1"])
     assert "idx1" in res
     assert "idx2" not in res
+
+
+def test_forcemerge_drops_deleted_documents():
+    client = FakeOpenSearch()
+    client.indices.create(
+        index="test-index",
+        body={"settings": {"index.merge.policy.deletes_pct_allowed": 100}},
+    )
+    for i in range(4):
+        client.index(index="test-index", id=str(i), body={"n": i})
+    client.delete(index="test-index", id="1")
+
+    store = client._FakeIndicesClient__documents_dict["test-index"]
+    assert store.deleted == 1
+
+    response = client.indices.forcemerge(index="test-index")
+
+    assert response["_shards"]["successful"] == 1
+    assert store.deleted == 0
+    assert client.count(index="test-index")["count"] == 3
+
+
+def test_stats_report_filter_cache():
+    client = FakeOpenSearch()
+    client.indices.create(index="test-index")
+    for status in ["open", "closed", "open"]:
+        client.index(index="test-index", body={"status": status}, refresh=True)
+    body = {"query": {"bool": {"filter": [{"term": {"status.keyword": "open"}}]}}}
+
+    for _ in range(3):
+        assert (
+            client.search(index="test-index", body=body)["hits"]["total"]["value"] == 2
+        )
+
+    stats = client.indices.stats(index="test-index", metric="query_cache")
+    query_cache = stats["indices"]["test-index"]["total"]["query_cache"]
+    assert query_cache["miss_count"] == 1
+    assert query_cache["hit_count"] == 2
+    assert query_cache["cache_size"] == 1
+    assert "docs" not in stats["indices"]["test-index"]["total"]
+
+    # A write invalidates the cached bitsets
+    client.index(index="test-index", body={"status": "open"}, refresh=True)
+    assert client.search(index="test-index", body=body)["hits"]["total"]["value"] == 3
+    stats = client.indices.stats(index="test-index")
+    assert stats["_all"]["total"]["query_cache"]["miss_count"] == 2
+    assert stats["_all"]["total"]["docs"] == {"count": 4, "deleted": 0}
+
+
+def test_filter_cache_can_be_disabled():
+    client = FakeOpenSearch()
+    client.indices.create(
+        index="test-index", body={"settings": {"index.queries.cache.enabled": False}}
+    )
+    client.index(index="test-index", body={"status": "open"})
+    body = {"query": {"bool": {"filter": {"term": {"status.keyword": "open"}}}}}
+
+    assert client.search(index="test-index", body=body)["hits"]["total"]["value"] == 1
+    stats = client.indices.stats(index="test-index")
+    assert stats["indices"]["test-index"]["total"]["query_cache"]["total_count"] == 0
+
+
+def test_request_cache_answers_repeated_aggregations():
+    client = FakeOpenSearch()
+    client.indices.create(index="test-index")
+    for genre in ["rock", "jazz", "rock"]:
+        client.index(index="test-index", body={"genre": genre})
+    body = {"size": 0, "aggs": {"genres": {"terms": {"field": "genre"}}}}
+
+    first = client.search(index="test-index", body=body)
+    first["aggregations"]["genres"]["buckets"].clear()
+    second = client.search(index="test-index", body=body)
+    client.search(index="test-index", body=body, request_cache=False)
+    client.search(index="test-index", body={**body, "size": 1})
+
+    assert second["aggregations"]["genres"]["buckets"] == [
+        {"key": "rock", "doc_count": 2},
+        {"key": "jazz", "doc_count": 1},
+    ]
+    request_cache = client.indices.stats(index="test-index")["_all"]["total"][
+        "request_cache"
+    ]
+    assert request_cache["miss_count"] == 1
+    assert request_cache["hit_count"] == 1
+    assert request_cache["memory_size_in_bytes"] > 0
+
+    client.index(index="test-index", body={"genre": "jazz"})
+    third = client.search(index="test-index", body=body)
+    assert third["hits"]["total"]["value"] == 4
+
+
+def test_string_interning_setting_and_stats():
+    client = FakeOpenSearch()
+    client.indices.create(
+        index="test-index", body={"settings": {"openmock.interning.enabled": True}}
+    )
+    client.bulk(
+        body="".join(
+            f'{{"index": {{"_index": "test-index", "_id": "{i}"}}}}\n'
+            f'{{"region": "eu-west", "status": "active"}}\n'
+            for i in range(3)
+        )
+    )
+
+    stats = client.indices.stats(index="test-index")
+    interning = stats["indices"]["test-index"]["total"]["string_interning"]
+    assert interning["entries"] == 4
+    assert interning["interned_count"] == 8
+    assert interning["saved_in_bytes"] > 0
+    assert client.get(index="test-index", id="2")["_source"] == {
+        "region": "eu-west",
+        "status": "active",
+    }
+
+    client.indices.put_settings(
+        index="test-index", body={"openmock.interning.enabled": False}
+    )
+    stats = client.indices.stats(index="test-index")
+    assert "string_interning" not in stats["indices"]["test-index"]["total"]
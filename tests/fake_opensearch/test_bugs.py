@@ -87,6 +87,41 @@ class TestSortOnMissingField(Testopenmock):
                 f"Sorting on a field absent in some documents raised KeyError: {exc}"
             )
 
+    def test_sort_puts_missing_field_last(self):
+        self.es.index(index=INDEX_NAME, body={"score": 10, "name": "alice"})
+        self.es.index(index=INDEX_NAME, body={"name": "bob"})
+        self.es.index(index=INDEX_NAME, body={"score": 5, "name": "carol"})
+
+        for order, expected in [
+            ("desc", ["alice", "carol", "bob"]),
+            ("asc", ["carol", "alice", "bob"]),
+        ]:
+            result = self.es.search(
+                index=INDEX_NAME, body={"sort": [{"score": {"order": order}}]}
+            )
+            names = [hit["_source"]["name"] for hit in result["hits"]["hits"]]
+            self.assertEqual(expected, names)
+
+    def test_sort_on_several_keys_pages_by_primary_key(self):
+        for name, team, score in [
+            ("alice", "b", 1),
+            ("bob", "a", 1),
+            ("carol", "a", 3),
+            ("dave", "b", 2),
+        ]:
+            self.es.index(
+                index=INDEX_NAME, body={"name": name, "team": team, "score": score}
+            )
+        sort = [{"team": {"order": "asc"}}, {"score": {"order": "desc"}}]
+
+        result = self.es.search(
+            index=INDEX_NAME, body={"sort": sort, "from": 1, "size": 2}
+        )
+
+        names = [hit["_source"]["name"] for hit in result["hits"]["hits"]]
+        self.assertEqual(["bob", "dave"], names)
+        self.assertEqual(4, result["hits"]["total"]["value"])
+
 
 class TestUpdateNoop(Testopenmock):
     """
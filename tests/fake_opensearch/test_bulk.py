@@ -1,5 +1,7 @@
 import json
 
+from opensearchpy.exceptions import RequestError
+
 from tests import BODY, DOC_ID, DOC_TYPE, INDEX_NAME, Testopenmock
 from tests.backend import mock_only
 
@@ -129,6 +131,19 @@ class TestBulk(Testopenmock):
             self.assertEqual("noop", index.get("result"))
             self.assertEqual(200, index.get("status"))
 
+    @mock_only("Hits of unsorted searches come in the fake's storage order.")
+    def test_should_keep_the_position_of_bulk_updated_documents(self):
+        for doc_id in "abc":
+            self.es.index(index=INDEX_NAME, id=doc_id, body={"n": 0})
+        self.es.update(index=INDEX_NAME, id="a", body={"doc": {"n": 1}})
+        self.es.bulk(
+            body=[{"update": {"_index": INDEX_NAME, "_id": "b"}}, {"doc": {"n": 1}}]
+        )
+
+        hits = self.es.search(index=INDEX_NAME)["hits"]["hits"]
+        self.assertEqual(["a", "b", "c"], [hit["_id"] for hit in hits])
+        self.assertEqual([1, 1, 0], [hit["_source"]["n"] for hit in hits])
+
     def test_should_bulk_index_documents_delete_deletes(self):
         delete_action = {
             "delete": {"_index": INDEX_NAME, "_id": DOC_ID, "_type": DOC_TYPE}
@@ -294,3 +309,73 @@ class TestBulk(Testopenmock):
 
         self.assertTrue(data.get("errors"))
         self.assertEqual(actual, expected)
+
+    @mock_only("The real client serializes bulk bodies before sending them.")
+    def test_should_bulk_index_from_a_generator(self):
+        def actions():
+            for i in range(5):
+                yield {"index": {"_index": INDEX_NAME, "_id": str(i)}}
+                yield json.dumps({"n": i})
+
+        data = self.es.bulk(body=actions())
+
+        self.assertFalse(data["errors"])
+        self.assertEqual(5, len(data["items"]))
+        self.assertEqual(5, self.es.count(index=INDEX_NAME)["count"])
+
+    @mock_only("The real client serializes bulk bodies before sending them.")
+    def test_should_bulk_index_from_a_memoryview(self):
+        body = "".join(
+            f'{{"index": {{"_index": "{INDEX_NAME}", "_id": "{i}"}}}}\n{{"n": {i}}}\n'
+            for i in range(3)
+        )
+
+        data = self.es.bulk(body=memoryview(body.encode()))
+
+        self.assertFalse(data["errors"])
+        self.assertEqual({"n": 2}, self.es.get(index=INDEX_NAME, id="2")["_source"])
+
+    def test_should_bulk_assign_consecutive_seq_nos(self):
+        body = [
+            {"index": {"_index": INDEX_NAME, "_id": "1"}},
+            {"n": 1},
+            {"index": {"_index": INDEX_NAME, "_id": "2"}},
+            {"n": 2},
+            {"update": {"_index": INDEX_NAME, "_id": "1"}},
+            {"doc": {"n": 3}},
+        ]
+
+        self.es.bulk(body=body, refresh=True)
+        indexed = self.es.index(index=INDEX_NAME, id="3", body={"n": 4})
+
+        self.assertEqual(2, self.es.get(index=INDEX_NAME, id="1")["_seq_no"])
+        self.assertEqual(1, self.es.get(index=INDEX_NAME, id="2")["_seq_no"])
+        self.assertEqual(3, indexed["_seq_no"])
+
+    @mock_only("The real client rejects a bulk body without its last source.")
+    def test_should_keep_seq_nos_of_a_bulk_that_fails_midway(self):
+        body = [
+            {"index": {"_index": INDEX_NAME, "_id": "1"}},
+            {"n": 1},
+            {"index": {"_index": INDEX_NAME, "_id": "2"}},
+        ]
+
+        with self.assertRaises(RequestError):
+            self.es.bulk(body=body)
+        indexed = self.es.index(index=INDEX_NAME, id="3", body={"n": 3})
+
+        self.assertEqual(0, self.es.get(index=INDEX_NAME, id="1")["_seq_no"])
+        self.assertEqual(1, indexed["_seq_no"])
+
+    def test_should_keep_bulk_sources_apart_from_the_callers(self):
+        source = {"status": "open"}
+        query = {"query": {"term": {"status.keyword": "open"}}}
+        self.es.bulk(
+            body=[{"index": {"_index": INDEX_NAME, "_id": "1"}}, source], refresh=True
+        )
+        self.es.search(index=INDEX_NAME, body=query)
+
+        source["status"] = "closed"
+        hits = self.es.search(index=INDEX_NAME, body=query)["hits"]["hits"]
+
+        self.assertEqual([{"status": "open"}], [hit["_source"] for hit in hits])
@@ -0,0 +1,54 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from tests import INDEX_NAME, Testopenmock
+from tests.backend import mock_only
+
+THREADS = 8
+WRITES = 200
+
+
+class TestConcurrency(Testopenmock):
+    def setUp(self):
+        super().setUp()
+        # Switch threads often enough for unguarded writes to interleave
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switch_interval)
+        super().tearDown()
+
+    @mock_only("Asserts the gap-free sequence numbers of the fake's single shard.")
+    def test_should_not_lose_writes_from_many_threads(self):
+        def index(thread):
+            for i in range(WRITES):
+                self.es.index(index=INDEX_NAME, id=f"{thread}-{i}", body={"n": i})
+
+        def bulk(thread):
+            body = []
+            for i in range(WRITES):
+                body.append({"index": {"_index": INDEX_NAME, "_id": f"b{thread}-{i}"}})
+                body.append({"n": i})
+            self.es.bulk(body=body)
+
+        def search(_):
+            for _ in range(20):
+                self.es.search(index=INDEX_NAME, body={"query": {"term": {"n": 1}}})
+
+        with ThreadPoolExecutor(THREADS * 3) as pool:
+            futures = [
+                pool.submit(task, thread)
+                for thread in range(THREADS)
+                for task in (index, bulk, search)
+            ]
+            for future in futures:
+                future.result()
+
+        hits = self.es.search(
+            index=INDEX_NAME,
+            body={"size": 2 * THREADS * WRITES, "seq_no_primary_term": True},
+        )["hits"]["hits"]
+        self.assertEqual(2 * THREADS * WRITES, len(hits))
+        seq_nos = sorted(hit["_seq_no"] for hit in hits)
+        self.assertEqual(list(range(2 * THREADS * WRITES)), seq_nos)
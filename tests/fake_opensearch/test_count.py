@@ -60,3 +60,30 @@ class TestCount(Testopenmock):
         )
         # well not anymore, doc_type is deprecated I think
         self.assertEqual(2, count.get("count"))
+
+    def test_should_count_every_match_without_building_hits(self):
+        for i in range(15):
+            self.es.index(index="index", id=str(i), body={"n": i % 3, "tag": "x"})
+        self.es.delete(index="index", id="0")
+        self.assertEqual(14, self.es.count(index="index")["count"])
+        stored = self.es._FakeIndicesClient__documents_dict["index"].get("5")
+        self.assertNotIn("_score", stored)
+
+        queries = [
+            {"match_all": {}},
+            {"term": {"n": 1}},
+            {"terms": {"n": [0, 1]}},
+            {"exists": {"field": "tag"}},
+            {"ids": {"values": ["1", "2", "missing"]}},
+            {"match": {"tag": "x"}},
+            {
+                "bool": {
+                    "filter": [{"term": {"n": 2}}],
+                    "must_not": {"ids": {"values": ["2"]}},
+                }
+            },
+        ]
+        for query in queries:
+            expected = self.es.search(index="index", body={"query": query})
+            result = self.es.count(index="index", body={"query": query, "size": 1})
+            self.assertEqual(expected["hits"]["total"]["value"], result["count"], query)
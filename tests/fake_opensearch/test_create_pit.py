@@ -1,6 +1,7 @@
 import time
 
 from opensearchpy.client.utils import SKIP_IN_PATH
+from opensearchpy.exceptions import NotFoundError
 
 from tests import INDEX_NAME, Testopenmock
 
@@ -74,3 +75,30 @@ class TestCreatePit(Testopenmock):
             self.assertIn("_shards", result)
             self.assertIn("creation_time", result)
             self.assertEqual(len(result["pit_id"]), 168)
+
+    def test_should_delete_pit(self):
+        pit_id = self.es.create_pit(index=INDEX_NAME, keep_alive="1m")["pit_id"]
+        other = self.es.create_pit(index=INDEX_NAME, keep_alive="1m")["pit_id"]
+
+        result = self.es.delete_pit(body={"pit_id": [pit_id, "unknown"]})
+        self.assertEqual(
+            [
+                {"pit_id": pit_id, "successful": True},
+                {"pit_id": "unknown", "successful": False},
+            ],
+            result["pits"],
+        )
+        with self.assertRaises(NotFoundError):
+            self.es.search(body={"pit": {"id": pit_id}})
+        self.assertEqual(
+            [other], [pit["pit_id"] for pit in self.es.get_all_pits()["pits"]]
+        )
+
+        self.es.delete_all_pits()
+        self.assertEqual([], self.es.get_all_pits()["pits"])
+
+    def test_should_release_expired_pit(self):
+        pit_id = self.es.create_pit(index=INDEX_NAME, keep_alive="1ms")["pit_id"]
+        time.sleep(0.01)
+        with self.assertRaises(NotFoundError):
+            self.es.search(body={"pit": {"id": pit_id}})
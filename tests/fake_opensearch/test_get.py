@@ -67,3 +67,15 @@ class TestGet(Testopenmock):
             index=INDEX_NAME, body={"docs": [{"_id": id} for id in ids]}
         )
         self.assertEqual(len(results["docs"]), 10)
+
+    def test_should_not_share_document_with_caller(self):
+        self.es.index(index=INDEX_NAME, id="1", body={"data": {"tags": ["a"]}})
+
+        target_doc = self.es.get(index=INDEX_NAME, id="1")
+        target_doc["_source"]["data"]["tags"].append("b")
+        target_doc["_version"] = 10
+
+        stored = self.es._FakeIndicesClient__documents_dict[INDEX_NAME].get("1")
+        self.assertNotIn("found", stored)
+        self.assertEqual(1, stored["_version"])
+        self.assertEqual({"data": {"tags": ["a"]}}, stored["_source"])
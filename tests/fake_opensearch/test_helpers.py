@@ -0,0 +1,119 @@
+import datetime
+from unittest.mock import patch
+
+import opensearchpy
+from opensearchpy import helpers
+from opensearchpy.helpers import BulkIndexError
+
+from tests import INDEX_NAME, Testopenmock
+from tests.backend import get_test_hosts, mock_only, openmock
+
+
+def _actions(count, **extra):
+    return (
+        {"_index": INDEX_NAME, "_id": str(i), "n": i, **extra} for i in range(count)
+    )
+
+
+class TestHelpers(Testopenmock):
+    @openmock
+    def test_should_bulk_index_actions(self):
+        es = opensearchpy.OpenSearch(hosts=get_test_hosts())
+
+        success, errors = helpers.bulk(es, _actions(5), refresh=True)
+
+        self.assertEqual((5, []), (success, errors))
+        self.assertEqual({"n": 3}, es.get(index=INDEX_NAME, id="3")["_source"])
+
+    @openmock
+    def test_should_stream_bulk_results_per_action(self):
+        es = opensearchpy.OpenSearch(hosts=get_test_hosts())
+        helpers.bulk(es, _actions(1))
+
+        results = list(
+            helpers.streaming_bulk(
+                es,
+                [
+                    {"_op_type": "create", "_index": INDEX_NAME, "_id": "0", "n": 0},
+                    {"_op_type": "delete", "_index": INDEX_NAME, "_id": "0"},
+                    {"_index": INDEX_NAME, "_id": "1", "n": 1},
+                ],
+                raise_on_error=False,
+            )
+        )
+
+        self.assertEqual([False, True, True], [ok for ok, _ in results])
+        self.assertEqual(409, results[0][1]["create"]["status"])
+        self.assertEqual("deleted", results[1][1]["delete"]["result"])
+        self.assertEqual("created", results[2][1]["index"]["result"])
+
+    @openmock
+    def test_should_raise_bulk_index_error(self):
+        es = opensearchpy.OpenSearch(hosts=get_test_hosts())
+
+        with self.assertRaises(BulkIndexError) as context:
+            helpers.bulk(
+                es,
+                [{"_op_type": "update", "_index": INDEX_NAME, "_id": "1", "doc": {}}],
+            )
+
+        self.assertEqual(404, context.exception.errors[0]["update"]["status"])
+
+    @openmock
+    def test_should_parallel_bulk_index_actions(self):
+        es = opensearchpy.OpenSearch(hosts=get_test_hosts())
+
+        results = list(
+            helpers.parallel_bulk(es, _actions(20), thread_count=2, chunk_size=5)
+        )
+
+        self.assertEqual(20, len(results))
+        self.assertTrue(all(ok for ok, _ in results))
+        es.indices.refresh(index=INDEX_NAME)
+        self.assertEqual(20, es.count(index=INDEX_NAME)["count"])
+
+    @openmock
+    def test_should_copy_reused_sources(self):
+        es = opensearchpy.OpenSearch(hosts=get_test_hosts())
+        source = {}
+
+        def actions():
+            for i in range(3):
+                source["n"] = i
+                source["at"] = datetime.datetime(2024, 1, i + 1)
+                yield {"_index": INDEX_NAME, "_id": str(i), "_source": source}
+
+        helpers.bulk(es, actions(), refresh=True)
+        source["n"] = 99
+
+        self.assertEqual(
+            [{"n": i, "at": f"2024-01-0{i + 1}T00:00:00"} for i in range(3)],
+            [es.get(index=INDEX_NAME, id=str(i))["_source"] for i in range(3)],
+        )
+        query = {"query": {"term": {"n": 1}}}
+        self.assertEqual(
+            1, es.search(index=INDEX_NAME, body=query)["hits"]["total"]["value"]
+        )
+
+    @mock_only("The real client sends serialized bodies.")
+    @openmock
+    def test_should_send_actions_as_objects_in_chunks(self):
+        es = opensearchpy.OpenSearch(hosts=get_test_hosts())
+
+        with patch.object(es, "bulk", wraps=es.bulk) as bulk:
+            helpers.bulk(es, _actions(5), chunk_size=2)
+
+        bodies = [call.kwargs["body"] for call in bulk.call_args_list]
+        self.assertEqual([4, 4, 2], [len(body) for body in bodies])
+        self.assertEqual({"index": {"_index": INDEX_NAME, "_id": "4"}}, bodies[2][0])
+        self.assertEqual({"n": 4}, bodies[2][1])
+
+    @mock_only("The real client sends serialized bodies.")
+    @openmock
+    def test_should_chunk_by_size_when_max_chunk_bytes_is_lowered(self):
+        es = opensearchpy.OpenSearch(hosts=get_test_hosts())
+
+        with patch.object(es, "bulk", wraps=es.bulk) as bulk:
+            helpers.bulk(es, _actions(4, text="x" * 100), max_chunk_bytes=350)
+
+        self.assertEqual(2, bulk.call_count)
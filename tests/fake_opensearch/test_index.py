@@ -1,3 +1,5 @@
+from opensearchpy.exceptions import NotFoundError
+
 from tests import BODY, DOC_TYPE, INDEX_NAME, Testopenmock
 
 UPDATED_BODY = {"author": "vrcmarcos", "text": "Updated Text"}
@@ -37,6 +39,18 @@ class TestIndex(Testopenmock):
     #         count_per_doc_type * 2, result.get("hits").get("total").get("value")
     #     )
 
+    def test_should_keep_indexed_sources_apart_from_the_callers(self):
+        body = {"n": 5, "tags": ["a"]}
+        query = {"query": {"range": {"n": {"gte": 3, "lte": 10}}}}
+        self.es.index(index=INDEX_NAME, id="1", body=body, refresh=True)
+        self.es.search(index=INDEX_NAME, body=query)
+
+        body["n"] = 100
+        body["tags"].append("b")
+        hits = self.es.search(index=INDEX_NAME, body=query)["hits"]["hits"]
+
+        self.assertEqual([{"n": 5, "tags": ["a"]}], [hit["_source"] for hit in hits])
+
     def test_update_existing_doc(self):
         data = self.es.index(index=INDEX_NAME, doc_type=DOC_TYPE, body=BODY)
         document_id = data.get("_id")
@@ -69,3 +83,32 @@ class TestIndex(Testopenmock):
         )
         target_doc = self.es.get(index=INDEX_NAME, id=document_id)
         self.assertEqual(target_doc["_source"]["author"], new_author)
+
+    def test_update_by_query_on_a_missing_index(self):
+        body = {
+            "query": {"match_all": {}},
+            "script": {"source": "ctx._source.author = 'x'", "params": {}},
+        }
+
+        with self.assertRaises(NotFoundError):
+            self.es.update_by_query(index="missing-index", body=body)
+        self.assertFalse(self.es.indices.exists(index="missing-index"))
+
+    def test_update_by_query_through_an_alias(self):
+        data = self.es.index(index=INDEX_NAME, body=BODY, refresh=True)
+        self.es.indices.put_alias(index=INDEX_NAME, name="alias-name")
+
+        self.es.update_by_query(
+            index="alias-name",
+            body={
+                "query": {"match_all": {}},
+                "script": {
+                    "source": "ctx._source.author = params.author",
+                    "params": {"author": "kimchy2"},
+                },
+            },
+        )
+
+        target_doc = self.es.get(index=INDEX_NAME, id=data["_id"])
+        self.assertEqual("kimchy2", target_doc["_source"]["author"])
+        self.assertEqual([INDEX_NAME], list(self.es.indices.stats()["indices"]))
@@ -0,0 +1,145 @@
+import pytest
+from opensearchpy.exceptions import RequestError
+
+from openmock import FakeOpenSearch
+
+INDEX = "sharded"
+
+
+@pytest.fixture(name="client")
+def fixture_client():
+    client = FakeOpenSearch()
+    client.indices.create(index=INDEX, body={"settings": {"number_of_shards": 3}})
+    body = []
+    for i in range(30):
+        body += [{"index": {"_index": INDEX, "_id": str(i)}}, {"n": i}]
+    client.bulk(body=body)
+    return client
+
+
+def shards_of(client):
+    return client.engine.documents[INDEX].shards
+
+
+def test_documents_are_spread_over_shards(client):
+    shards = shards_of(client)
+
+    assert len(shards) == 3
+    assert sum(len(shard) for shard in shards) == 30
+    assert all(shard for shard in shards)
+    assert client.count(index=INDEX)["_shards"]["total"] == 3
+    # Sequence numbers are counted per shard
+    for shard in shards:
+        assert sorted(doc["_seq_no"] for doc in shard) == list(range(len(shard)))
+
+
+def test_searches_merge_every_shard(client):
+    response = client.search(
+        index=INDEX, body={"sort": [{"n": "desc"}], "size": 5, "from": 2}
+    )
+
+    assert response["_shards"]["total"] == 3
+    assert [hit["_source"]["n"] for hit in response["hits"]["hits"]] == [
+        27,
+        26,
+        25,
+        24,
+        23,
+    ]
+    assert response["hits"]["total"]["value"] == 30
+
+
+def test_custom_routing(client):
+    client.index(index=INDEX, id="routed", body={"n": 100}, routing="hello")
+
+    assert shards_of(client)[2].get("routed") is not None
+    assert client.get(index=INDEX, id="routed", routing="hello")["_routing"] == "hello"
+    assert client.exists(index=INDEX, id="routed", routing="hello")
+    assert not client.exists(index=INDEX, id="routed", routing="hell")
+
+    response = client.search(
+        index=INDEX, routing="hello", body={"query": {"term": {"n": 100}}}
+    )
+    assert response["_shards"]["total"] == 1
+    assert response["hits"]["hits"][0]["_routing"] == "hello"
+
+    client.delete(index=INDEX, id="routed", routing="hello")
+    assert not client.exists(index=INDEX, id="routed", routing="hello")
+
+
+def test_searches_with_routing_touch_only_its_shard(client):
+    shards = shards_of(client)
+    for number, shard in enumerate(shards):
+        if number != 2:
+            shard.select = shard.count = None
+
+    response = client.search(index=INDEX, routing="hello", body={"size": 50})
+
+    assert response["_shards"] == {
+        "total": 1,
+        "successful": 1,
+        "skipped": 0,
+        "failed": 0,
+    }
+    assert response["hits"]["total"]["value"] == len(shards[2])
+    assert client.count(index=INDEX, routing="hello")["count"] == len(shards[2])
+
+
+def test_bulk_items_with_routing(client):
+    client.bulk(
+        body=[
+            {"index": {"_index": INDEX, "_id": "a", "routing": "hello"}},
+            {"n": 1},
+            {"update": {"_index": INDEX, "_id": "a", "routing": "hello"}},
+            {"doc": {"n": 2}},
+        ]
+    )
+
+    assert shards_of(client)[2].get("a")["_source"] == {"n": 2}
+    response = client.mget(
+        body={"docs": [{"_id": "a", "routing": "hello"}]}, index=INDEX
+    )
+    assert response["docs"][0]["found"]
+
+
+def test_preference_picks_shards(client):
+    shards = shards_of(client)
+
+    response = client.search(index=INDEX, preference="_shards:0,1")
+    assert response["_shards"]["total"] == 2
+    assert response["hits"]["total"]["value"] == len(shards[0]) + len(shards[1])
+
+    response = client.search(index=INDEX, preference="session-1")
+    assert response["hits"]["total"]["value"] == 30
+
+    with pytest.raises(RequestError):
+        client.search(index=INDEX, preference="_unknown")
+
+
+def test_point_in_time_pages_across_shards(client):
+    pit = client.create_pit(index=INDEX, keep_alive="1m")
+    assert pit["_shards"]["total"] == 3
+
+    seen = []
+    search_after = None
+    while True:
+        body = {"pit": {"id": pit["pit_id"]}, "size": 7, "sort": [{"n": "asc"}]}
+        if search_after:
+            body["search_after"] = search_after
+        hits = client.search(body=body)["hits"]["hits"]
+        if not hits:
+            break
+        seen += [hit["_source"]["n"] for hit in hits]
+        search_after = hits[-1]["sort"]
+
+    assert seen == list(range(30))
+
+
+def test_shards_are_kept_after_settings_change(client):
+    client.indices.put_settings(index=INDEX, body={"number_of_shards": 5})
+
+    assert len(shards_of(client)) == 3
+
+    stats = client.indices.stats(index=INDEX)
+    assert stats["_shards"]["total"] == 3
+    assert stats["indices"][INDEX]["primaries"]["docs"]["count"] == 30
@@ -1,3 +1,7 @@
+import time
+
+from opensearchpy.exceptions import NotFoundError
+
 from tests import BODY, DOC_TYPE, INDEX_NAME, Testopenmock
 
 
@@ -22,3 +26,63 @@ class TestScroll(Testopenmock):
         self.assertNotEqual(None, result.get("_scroll_id", None))
         self.assertEqual(expected_scroll_hits, len(hits.get("hits")))
         self.assertEqual(100, hits.get("total").get("value"))
+
+    def test_scroll_is_a_snapshot(self):
+        for i in range(5):
+            self.es.index(index=INDEX_NAME, id=str(i), body={"n": i})
+
+        result = self.es.search(index=INDEX_NAME, params={"scroll": "1m", "size": 2})
+        for i in range(5, 10):
+            self.es.index(index=INDEX_NAME, id=str(i), body={"n": i})
+        self.es.index(index=INDEX_NAME, id="4", body={"n": 40})
+
+        seen = [hit["_source"]["n"] for hit in result["hits"]["hits"]]
+        while True:
+            result = self.es.scroll(scroll_id=result["_scroll_id"], scroll="1m")
+            if not result["hits"]["hits"]:
+                break
+            seen.extend(hit["_source"]["n"] for hit in result["hits"]["hits"])
+        self.assertEqual([0, 1, 2, 3, 4], seen)
+        self.assertEqual(5, result["hits"]["total"]["value"])
+
+    def test_scroll_pages_do_not_share_aggregations(self):
+        self.es.indices.create(
+            index=INDEX_NAME,
+            body={"mappings": {"properties": {"tag": {"type": "keyword"}}}},
+        )
+        for i in range(4):
+            self.es.index(index=INDEX_NAME, body={"tag": f"t{i % 2}"}, refresh=True)
+        aggs = {"tags": {"terms": {"field": "tag"}}}
+
+        first = self.es.search(
+            index=INDEX_NAME, params={"scroll": "1m", "size": 2}, body={"aggs": aggs}
+        )
+        first["aggregations"]["tags"]["buckets"].clear()
+        second = self.es.scroll(scroll_id=first["_scroll_id"], scroll="1m")
+        second["aggregations"]["tags"]["buckets"].clear()
+        third = self.es.scroll(scroll_id=first["_scroll_id"], scroll="1m")
+
+        self.assertEqual(2, len(second["hits"]["hits"]))
+        self.assertEqual(2, len(third["aggregations"]["tags"]["buckets"]))
+
+    def test_clear_scroll(self):
+        for _ in range(3):
+            self.es.index(index=INDEX_NAME, body=BODY)
+        first = self.es.search(index=INDEX_NAME, params={"scroll": "1m", "size": 1})
+        second = self.es.search(index=INDEX_NAME, params={"scroll": "1m", "size": 1})
+
+        result = self.es.clear_scroll(scroll_id=first["_scroll_id"])
+        self.assertEqual({"succeeded": True, "num_freed": 1}, result)
+        with self.assertRaises(NotFoundError):
+            self.es.scroll(scroll_id=first["_scroll_id"], scroll="1m")
+        self.es.scroll(scroll_id=second["_scroll_id"], scroll="1m")
+
+        result = self.es.clear_scroll(body={"scroll_id": "_all"})
+        self.assertEqual(1, result["num_freed"])
+
+    def test_expired_scroll_is_released(self):
+        self.es.index(index=INDEX_NAME, body=BODY)
+        result = self.es.search(index=INDEX_NAME, params={"scroll": "1ms", "size": 1})
+        time.sleep(0.01)
+        with self.assertRaises(NotFoundError):
+            self.es.scroll(scroll_id=result["_scroll_id"], scroll="1m")
@@ -297,6 +297,37 @@ class TestSearch(Testopenmock):
         hits = response["hits"]["hits"]
         self.assertEqual(len(hits), 10)
 
+    def test_search_profile_reports_plan(self):
+        for i in range(0, 10):
+            self.es.index(
+                index="index_for_search",
+                body={"data": f"test_{i}", "number": i},
+            )
+
+        response = self.es.search(
+            index="index_for_search",
+            body={
+                "profile": True,
+                "query": {
+                    "bool": {
+                        "must": [
+                            {"match": {"data": "test"}},
+                            {"range": {"number": {"lt": 3}}},
+                        ]
+                    }
+                },
+            },
+        )
+
+        self.assertEqual(response["hits"]["total"]["value"], 3)
+        (shard,) = response["profile"]["shards"]
+        (plan,) = shard["searches"][0]["query"]
+        self.assertEqual(plan["type"], "AllOf")
+        self.assertEqual(
+            [(child["strategy"], child["step"]) for child in plan["children"]],
+            [("doc_values", "intersect"), ("scan", "check")],
+        )
+
     def test_search_bool_should_match_query(self):
         for i in range(0, 10):
             self.es.index(
@@ -613,3 +644,108 @@ class TestSearch(Testopenmock):
         )
         self.assertEqual(6, response["hits"]["total"]["value"])
         self.assertEqual(6, len(response["hits"]["hits"]))
+
+    def test_search_terminate_after(self):
+        for i in range(10):
+            self.es.index(index=INDEX_NAME, id=str(i), body={"n": i, "text": "a b"})
+
+        response = self.es.search(
+            index=INDEX_NAME,
+            body={"query": {"match": {"text": "b"}}, "size": 0},
+            params={"terminate_after": 1},
+        )
+        self.assertTrue(response["terminated_early"])
+        self.assertEqual({"value": 1, "relation": "eq"}, response["hits"]["total"])
+
+        # Collection stops in index order, the collected documents are sorted
+        response = self.es.search(
+            index=INDEX_NAME,
+            body={"sort": [{"n": "desc"}], "terminate_after": 4, "size": 2},
+        )
+        self.assertEqual(["3", "2"], [hit["_id"] for hit in response["hits"]["hits"]])
+        self.assertEqual(4, response["hits"]["total"]["value"])
+
+        response = self.es.search(index=INDEX_NAME, params={"terminate_after": 20})
+        self.assertFalse(response["terminated_early"])
+        self.assertEqual(10, len(response["hits"]["hits"]))
+        self.assertEqual(
+            2, self.es.count(index=INDEX_NAME, params={"terminate_after": 2})["count"]
+        )
+
+    def test_search_track_total_hits(self):
+        for i in range(10):
+            self.es.index(index=INDEX_NAME, id=str(i), body={"n": i})
+
+        response = self.es.search(
+            index=INDEX_NAME, body={"size": 3, "track_total_hits": 5}
+        )
+        self.assertEqual({"value": 5, "relation": "gte"}, response["hits"]["total"])
+        self.assertEqual(3, len(response["hits"]["hits"]))
+
+        response = self.es.search(
+            index=INDEX_NAME,
+            body={"sort": ["n"], "size": 3},
+            params={"track_total_hits": "20"},
+        )
+        self.assertEqual({"value": 10, "relation": "eq"}, response["hits"]["total"])
+
+        response = self.es.search(
+            index=INDEX_NAME, body={"size": 1}, params={"track_total_hits": False}
+        )
+        self.assertNotIn("total", response["hits"])
+        self.assertEqual(1, len(response["hits"]["hits"]))
+
+    def test_search_track_total_hits_does_not_cap_the_page(self):
+        for i in range(10):
+            self.es.index(index=INDEX_NAME, id=str(i), body={"n": i})
+
+        response = self.es.search(
+            index=INDEX_NAME, body={"size": 10, "track_total_hits": 3}
+        )
+        self.assertEqual({"value": 3, "relation": "gte"}, response["hits"]["total"])
+        self.assertEqual(10, len(response["hits"]["hits"]))
+
+        response = self.es.search(
+            index=INDEX_NAME, body={"size": 10}, params={"track_total_hits": False}
+        )
+        self.assertNotIn("total", response["hits"])
+        self.assertEqual(10, len(response["hits"]["hits"]))
+
+        response = self.es.search(
+            index=INDEX_NAME, body={"size": 10, "track_total_hits": 3, "from": 8}
+        )
+        self.assertEqual(2, len(response["hits"]["hits"]))
+
+    def test_search_terminated_early_past_the_total_hits_bound(self):
+        for i in range(12):
+            self.es.index(index=INDEX_NAME, id=str(i), body={"n": i}, refresh=True)
+
+        response = self.es.search(
+            index=INDEX_NAME,
+            body={"size": 5, "track_total_hits": 3, "terminate_after": 8},
+        )
+        self.assertTrue(response["terminated_early"])
+        self.assertEqual({"value": 3, "relation": "gte"}, response["hits"]["total"])
+        self.assertEqual(5, len(response["hits"]["hits"]))
+
+        response = self.es.search(
+            index=INDEX_NAME,
+            body={"size": 5, "track_total_hits": 3, "terminate_after": 20},
+        )
+        self.assertFalse(response["terminated_early"])
+
+    def test_search_does_not_write_to_stored_documents(self):
+        timestamp = datetime.datetime(2020, 1, 2, 3, 4, 5)
+        self.es.index(
+            index=INDEX_NAME, id="1", body={"at": {"time": timestamp}, "tags": ["a"]}
+        )
+
+        response = self.es.search(index=INDEX_NAME, body={"aggs": {}})
+        hit = response["hits"]["hits"][0]
+        self.assertEqual(timestamp.isoformat(), hit["_source"]["at"]["time"])
+        self.assertEqual(1.0, hit["_score"])
+        hit["_source"]["tags"].append("b")
+
+        stored = self.es._FakeIndicesClient__documents_dict[INDEX_NAME].get("1")
+        self.assertNotIn("_score", stored)
+        self.assertEqual({"at": {"time": timestamp}, "tags": ["a"]}, stored["_source"])
@@ -0,0 +1,77 @@
+from opensearchpy.exceptions import RequestError
+
+from tests import INDEX_NAME, Testopenmock
+
+
+class TestSearchAfter(Testopenmock):
+    def setUp(self):
+        super().setUp()
+        for i in range(20):
+            # Every value appears twice, to exercise ties
+            self.es.index(index=INDEX_NAME, id=str(i), body={"n": i // 2, "i": i})
+
+    def _page_through(self, body, size=3):
+        seen = []
+        body = dict(body, size=size)
+        while True:
+            result = self.es.search(body=body)
+            hits = result["hits"]["hits"]
+            if not hits:
+                return seen
+            self.assertEqual(20, result["hits"]["total"]["value"])
+            seen.extend(hit["_source"]["i"] for hit in hits)
+            body["search_after"] = hits[-1]["sort"]
+
+    def test_hits_carry_sort_values(self):
+        result = self.es.search(
+            index=INDEX_NAME, body={"sort": [{"n": "desc"}, "i"], "size": 2}
+        )
+        self.assertEqual(
+            [[9, 18], [9, 19]], [hit["sort"] for hit in result["hits"]["hits"]]
+        )
+
+    def test_search_after_without_tiebreaker_skips_ties(self):
+        result = self.es.search(
+            index=INDEX_NAME,
+            body={"sort": [{"n": "asc"}], "search_after": [3], "size": 4},
+        )
+        self.assertEqual(
+            ["8", "9", "10", "11"], [hit["_id"] for hit in result["hits"]["hits"]]
+        )
+
+    def test_search_after_pages_through_a_point_in_time(self):
+        pit_id = self.es.create_pit(index=INDEX_NAME, keep_alive="1m")["pit_id"]
+        for direction in ("asc", "desc"):
+            seen = self._page_through(
+                {"pit": {"id": pit_id}, "sort": [{"n": direction}]}
+            )
+            expected = sorted(range(20), key=lambda i: i // 2)
+            if direction == "desc":
+                expected = sorted(range(20), key=lambda i: -(i // 2))
+            self.assertEqual(expected, seen)
+
+    def test_search_after_with_several_sort_keys(self):
+        pit_id = self.es.create_pit(index=INDEX_NAME, keep_alive="1m")["pit_id"]
+        seen = self._page_through(
+            {"pit": {"id": pit_id}, "sort": [{"n": "desc"}, {"i": "asc"}]}
+        )
+        self.assertEqual(sorted(range(20), key=lambda i: (-(i // 2), i)), seen)
+
+    def test_point_in_time_is_frozen(self):
+        pit_id = self.es.create_pit(index=INDEX_NAME, keep_alive="1m")["pit_id"]
+        self.es.delete(index=INDEX_NAME, id="0")
+        self.es.index(index=INDEX_NAME, id="1", body={"n": 100, "i": 100})
+        self.es.index(index=INDEX_NAME, id="new", body={"n": -1, "i": -1})
+
+        seen = self._page_through({"pit": {"id": pit_id}, "sort": [{"n": "asc"}]})
+        self.assertEqual(list(range(20)), seen)
+        live = self.es.search(index=INDEX_NAME, body={"size": 0})
+        self.assertEqual(20, live["hits"]["total"]["value"])
+
+    def test_search_after_requires_sort(self):
+        with self.assertRaises(RequestError):
+            self.es.search(index=INDEX_NAME, body={"search_after": [1]})
+        with self.assertRaises(RequestError):
+            self.es.search(
+                index=INDEX_NAME, body={"sort": ["n"], "search_after": [1, 2]}
+            )
@@ -0,0 +1,33 @@
+import random
+
+from openmock.bitset import at_least, count, from_slots, full, iter_slots
+
+
+def test_round_trip():
+    slots = [0, 7, 8, 63, 64, 1000]
+    bits = from_slots(slots, 1001)
+
+    assert list(iter_slots(bits)) == slots
+    assert count(bits) == 6
+    assert list(iter_slots(full(10))) == list(range(10))
+    assert list(iter_slots(0)) == []
+
+
+def test_at_least_counts_every_slot():
+    rng = random.Random(5)
+    for _ in range(200):
+        size = rng.randint(1, 100)
+        sets = [
+            {slot for slot in range(size) if rng.random() < 0.4}
+            for _ in range(rng.randint(1, 9))
+        ]
+        minimum = rng.randint(1, len(sets) + 1)
+
+        bits = at_least([from_slots(slots, size) for slots in sets], minimum)
+
+        expected = [
+            slot
+            for slot in range(size)
+            if sum(slot in slots for slots in sets) >= minimum
+        ]
+        assert list(iter_slots(bits)) == expected
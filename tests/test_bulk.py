@@ -0,0 +1,84 @@
+import json
+
+import pytest
+from opensearchpy.exceptions import RequestError
+
+from openmock import bulk
+from openmock.bulk import execute_bulk_steps, iter_bulk_items
+from openmock.shards import ShardedIndex
+
+ITEMS = [{"index": {"_id": "1"}}, {"n": 1}, {"delete": {"_id": "2"}}]
+NDJSON = "".join(json.dumps(item) + "\n" for item in ITEMS)
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        NDJSON,
+        NDJSON.rstrip("\n"),
+        NDJSON.replace("\n", "\r\n"),
+        "\n" + NDJSON.replace("\n", "\n  \n"),
+        NDJSON.encode(),
+        bytearray(NDJSON.encode()),
+        memoryview(NDJSON.encode()),
+        NDJSON.splitlines(),
+        [NDJSON[:20] + NDJSON[20:].split("\n", 1)[0], NDJSON.split("\n", 1)[1]],
+        ITEMS,
+        (item for item in ITEMS),
+        iter([json.dumps(ITEMS[0]).encode(), ITEMS[1], json.dumps(ITEMS[2])]),
+    ],
+)
+def test_every_body_form_yields_the_same_items(body):
+    assert list(iter_bulk_items(body)) == ITEMS
+
+
+def test_memoryview_lines_span_chunks(monkeypatch):
+    monkeypatch.setattr(bulk, "_CHUNK_SIZE", 7)
+    long_source = {"text": "x" * 50}
+    body = NDJSON + json.dumps(long_source) + "\n" + NDJSON
+
+    assert list(iter_bulk_items(memoryview(body.encode()))) == [
+        *ITEMS,
+        long_source,
+        *ITEMS,
+    ]
+
+
+def test_items_are_decoded_lazily():
+    lines = iter_bulk_items(NDJSON + "not json\n")
+    assert next(lines) == ITEMS[0]
+    with pytest.raises(json.JSONDecodeError):
+        list(lines)
+
+
+@pytest.mark.parametrize("body", [None, 1, {"index": {}}, [1]])
+def test_rejects_other_bodies(body):
+    with pytest.raises(TypeError):
+        list(iter_bulk_items(body))
+
+
+def test_steps_pause_between_batches_without_holding_locks():
+    indices = {"idx": ShardedIndex()}
+    body = []
+    for i in range(5):
+        body += [{"index": {"_index": "idx", "_id": str(i)}}, {"n": i}]
+    steps = execute_bulk_steps(body, indices, step=2)
+
+    next(steps)
+    assert len(indices["idx"]) == 2
+    # Another writer can get in between steps
+    with indices["idx"].shards[0].lock.write():
+        pass
+    next(steps)
+    assert len(indices["idx"]) == 4
+    with pytest.raises(StopIteration) as stop:
+        next(steps)
+    assert len(stop.value.value["items"]) == 5
+
+
+def test_items_without_an_index_are_rejected():
+    indices = {}
+
+    with pytest.raises(RequestError):
+        bulk.execute_bulk(ITEMS, indices)
+    assert not indices
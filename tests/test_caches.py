@@ -0,0 +1,30 @@
+from openmock.caches import FilterCache, GenerationCache
+
+
+def test_lru_eviction_by_count_and_memory():
+    cache = GenerationCache(max_entries=2, max_bytes=100)
+    cache.put("a", 0, 1, 10)
+    cache.put("b", 0, 2, 10)
+    assert cache.get("a", 0) == 1
+    cache.put("c", 0, 3, 10)
+
+    assert cache.get("b", 0) is None
+    assert cache.get("a", 0) == 1
+    assert cache.evictions == 1
+
+    cache.put("big", 0, 4, 95)
+    assert len(cache) == 1
+    assert cache.memory_size == 95
+    cache.put("too big", 0, 5, 101)
+    assert cache.get("too big", 0) is None
+
+
+def test_new_generation_drops_entries():
+    cache = FilterCache()
+    cache.put_bits("a", 0, 0b101)
+
+    assert cache.get("a", 0) == 0b101
+    assert cache.get("a", 1) is None
+    assert cache.stats()["cache_size"] == 0
+    assert cache.stats()["hit_count"] == 1
+    assert cache.stats()["miss_count"] == 1
@@ -0,0 +1,49 @@
+import operator
+import random
+
+from openmock.doc_values import DocValues, sort_documents
+
+
+def _doc(doc_id, **source):
+    return {"_id": doc_id, "_source": source}
+
+
+def test_multi_key_sort_uses_first_key_as_primary():
+    docs = [
+        _doc("a", group=2, n=1),
+        _doc("b", group=1, n=1),
+        _doc("c", group=1, n=3),
+        _doc("d", n=5),
+        _doc("e", group=2, n=2),
+    ]
+
+    ordered = sort_documents(docs, [(("group",), False), (("n",), True)])
+
+    assert [doc["_id"] for doc in ordered] == ["c", "b", "e", "a", "d"]
+
+
+def test_limited_sort_matches_full_sort():
+    rng = random.Random(3)
+    docs = [
+        _doc(str(i), a=rng.randint(0, 5), b=rng.choice([None, 1, 2, 3]))
+        for i in range(300)
+    ]
+    keys = [(("a",), True), (("b",), False)]
+
+    full = sort_documents(docs, keys)
+
+    for limit in (0, 1, 10, 299, 300, 500):
+        assert sort_documents(docs, keys, limit) == full[:limit]
+
+
+def test_merge_leaves_the_state_readers_hold_untouched():
+    doc_values = DocValues(("n",), [(0, _doc("a", n=0))])
+    for slot in range(1, 200):
+        doc_values.add(slot, _doc(str(slot), n=slot))
+    doc_values.discard(0)
+    columns, pending, dead = held = doc_values._state
+
+    assert doc_values.range_slots([(operator.ge, 100)], None) == set(range(100, 200))
+
+    assert doc_values._state is not held
+    assert len(pending) == 199 and dead == {0} and list(columns) == ["number"]
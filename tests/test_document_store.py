@@ -0,0 +1,312 @@
+import datetime
+import sys
+
+import pytest
+
+from openmock.bitset import iter_slots
+from openmock.document_store import DocumentRecord, DocumentStore
+from openmock.query_compiler import compile_query
+
+
+def _doc(doc_id, **source):
+    return {"_id": doc_id, "_source": source, "_version": 1}
+
+
+def test_get_by_id():
+    store = DocumentStore()
+    store.append(_doc("a", n=1))
+    store.append(_doc("b", n=2))
+
+    assert store.get("b")["_source"] == {"n": 2}
+    assert store.get("missing") is None
+    assert len(store) == 2
+
+
+def test_remove_keeps_insertion_order():
+    store = DocumentStore()
+    for doc_id in "abcd":
+        store.append(_doc(doc_id))
+
+    removed = store.remove("b")
+
+    assert removed["_id"] == "b"
+    assert store.remove("b") is None
+    assert store.get("b") is None
+    assert [doc["_id"] for doc in store] == ["a", "c", "d"]
+
+
+def test_deletes_leave_tombstones_until_compaction():
+    store = DocumentStore(deletes_pct_allowed=50)
+    for doc_id in "abcd":
+        store.append(_doc(doc_id))
+
+    store.remove("a")
+    store.append(_doc("c", n=2))
+
+    assert store.deleted == 2
+    assert len(store) == 3
+    assert [doc["_id"] for doc in store] == ["b", "d", "c"]
+
+    store.remove("b")
+
+    assert store.deleted == 0
+    assert [doc["_id"] for doc in store] == ["d", "c"]
+    assert store.get("c")["_source"] == {"n": 2}
+
+
+def test_configure_from_index_settings():
+    store = DocumentStore.from_settings(
+        {"index": {"merge": {"policy": {"deletes_pct_allowed": 20}}}}
+    )
+    assert store.deletes_pct_allowed == 20
+
+    store.configure({"index.merge.policy.deletes_pct_allowed": "40"})
+    assert store.deletes_pct_allowed == 40
+
+
+def test_term_postings_follow_writes():
+    store = DocumentStore(deletes_pct_allowed=100)
+    store.append(_doc("a", status="open", tags=["x", "y"]))
+    store.append(_doc("b", status="closed"))
+    query = compile_query({"term": {"status.keyword": "open"}})
+
+    assert [doc["_id"] for doc in store.select(query)] == ["a"]
+    assert store.term_index(("status",), False).postings == {
+        "open": {0},
+        "closed": {1},
+    }
+
+    store.append(_doc("c", status="open"))
+    store.replace(_doc("a", status="closed"))
+    store.remove("b")
+    assert [doc["_id"] for doc in store.select(query)] == ["c"]
+
+    store.compact()
+    assert [doc["_id"] for doc in store.select(query)] == ["c"]
+
+
+def test_select_mixes_postings_and_scans():
+    store = DocumentStore()
+    for i in range(6):
+        store.append(_doc(str(i), status="open" if i % 2 else "closed", n=i))
+
+    query = compile_query(
+        {
+            "bool": {
+                "filter": [
+                    {"terms": {"status.keyword": ["open"]}},
+                    {"range": {"n": {"gte": 2}}},
+                ],
+                "must": [{"exists": {"field": "n"}}],
+            }
+        }
+    )
+    assert list(iter_slots(query.docs(store))) == [3, 5]
+    assert [doc["_id"] for doc in store.select(query)] == ["3", "5"]
+    ids = compile_query({"ids": {"values": ["4", "1", "9"]}})
+    assert list(iter_slots(ids.docs(store))) == [1, 4]
+    assert compile_query({"match": {"status": "open"}}).docs(store) is None
+
+
+def test_range_uses_sorted_column():
+    store = DocumentStore(deletes_pct_allowed=100)
+    for i in range(10):
+        store.append(_doc(str(i), n=i, ts=datetime.datetime(2020, 1, i + 1)))
+    store.append(_doc("obj", n={"gte": 4, "lte": 6}))
+    store.append(_doc("text", n="5"))
+    query = compile_query({"range": {"n": {"gt": 3, "lte": 6}}})
+
+    assert [doc["_id"] for doc in store.select(query)] == ["4", "5", "6", "obj"]
+
+    store.remove("5")
+    store.append(_doc("late", n=3.5))
+    store.replace(_doc("4", n=40))
+    assert [doc["_id"] for doc in store.select(query)] == ["6", "obj", "late"]
+
+    dates = compile_query({"range": {"ts": {"gte": "2020-01-08T00:00:00"}}})
+    assert [doc["_id"] for doc in store.select(dates)] == ["7", "8", "9"]
+
+
+def test_select_orders_by_column_with_missing_last():
+    store = DocumentStore()
+    for doc_id, n in [("a", 2), ("b", None), ("c", 1), ("d", 2), ("e", 3)]:
+        store.append(_doc(doc_id, n=n))
+    query = compile_query({})
+
+    ascending = store.select(query, order_by=(("n",), False))
+    descending = store.select(query, order_by=(("n",), True))
+
+    assert [doc["_id"] for doc in ascending] == ["c", "a", "d", "e", "b"]
+    assert [doc["_id"] for doc in descending] == ["e", "a", "d", "c", "b"]
+
+    store.append(_doc("f", n="text"))
+    mixed = store.select(
+        compile_query({"ids": {"values": ["a", "b", "c"]}}), (("n",), False)
+    )
+    assert [doc["_id"] for doc in mixed] == ["c", "a", "b"]
+
+
+def test_scan_fills_one_bitset_per_predicate():
+    store = DocumentStore()
+    for i in range(20):
+        store.append(_doc(str(i), n=i))
+    store.remove("0")
+
+    even, big = store.scan(
+        [
+            lambda doc: doc["_source"]["n"] % 2 == 0,
+            lambda doc: doc["_source"]["n"] > 15,
+        ]
+    )
+
+    assert list(iter_slots(even)) == list(range(2, 20, 2))
+    assert list(iter_slots(big)) == [16, 17, 18, 19]
+    assert list(iter_slots(store.live())) == list(range(1, 20))
+
+
+def test_bitset_combination_agrees_with_matches():
+    store = DocumentStore(deletes_pct_allowed=100)
+    for i in range(30):
+        store.append(_doc(str(i), n=i, kind=f"k{i % 3}", text=f"word{i % 4}"))
+    store.remove("7")
+    queries = [
+        {
+            "bool": {
+                "should": [
+                    {"term": {"kind.keyword": "k1"}},
+                    {"match": {"text": "word2"}},
+                    {"range": {"n": {"lt": 10}}},
+                ],
+                "minimum_should_match": 2,
+            }
+        },
+        {
+            "bool": {
+                "must": {"match": {"text": "word1"}},
+                "must_not": [
+                    {"term": {"kind.keyword": "k0"}},
+                    {"match": {"text": "x"}},
+                ],
+            }
+        },
+        {
+            "bool": {
+                "should": [{"match": {"text": "word3"}}, {"ids": {"values": ["2"]}}]
+            }
+        },
+    ]
+    for body in queries:
+        query = compile_query(body)
+        expected = [doc["_id"] for doc in store if query.matches(doc)]
+        assert query.docs(store) is not None
+        assert [doc["_id"] for doc in store.select(query)] == expected
+
+
+def test_all_of_plan_runs_selective_clauses_first():
+    store = DocumentStore()
+    for i in range(200):
+        store.append(
+            _doc(str(i), n=i, msg=f"hello {i}", status="open" if i % 50 else "x")
+        )
+    query = compile_query(
+        {
+            "bool": {
+                "must": [
+                    {"match": {"msg": "hello"}},
+                    {"range": {"n": {"gte": 10}}},
+                    {"term": {"status.keyword": "x"}},
+                ]
+            }
+        }
+    )
+
+    plan = [(clause.describe(), step) for clause, step, _ in query.plan(store)]
+
+    assert plan == [
+        ("status.keyword:x", "intersect"),
+        ("n:[gte 10]", "check"),
+        ("msg:hello", "check"),
+    ]
+    assert [doc["_id"] for doc in store.select(query)] == ["50", "100", "150"]
+
+
+def test_snapshot_is_copy_on_write():
+    store = DocumentStore()
+    for i in range(6):
+        store.append(_doc(str(i), n=i % 3))
+    query = compile_query({"term": {"n": 1}})
+    assert [doc["_id"] for doc in store.select(query)] == ["1", "4"]
+
+    snapshot = store.snapshot()
+    assert snapshot._slots is store._slots
+    store.append(_doc("6", n=1))
+    store.remove("1")
+    store.replace(_doc("4", n=2))
+    store.compact()
+
+    assert [doc["_id"] for doc in snapshot.select(query)] == ["1", "4"]
+    assert snapshot.get("1")["_source"] == {"n": 1}
+    assert [doc["_id"] for doc in store.select(query)] == ["6"]
+
+
+def test_top_seeks_after_a_position():
+    store = DocumentStore()
+    for i in range(10):
+        store.append(_doc(str(i), n=i // 2))
+    store.append(_doc("none"))
+    query = compile_query({"match_all": {}})
+
+    total, page = store.top(query, (("n",), False), limit=3, after=(2, 4))
+    assert total == 11
+    assert [doc["_id"] for doc in page] == ["5", "6", "7"]
+
+    _, page = store.top(query, (("n",), True), limit=3, after=(2, None))
+    assert [doc["_id"] for doc in page] == ["2", "3", "0"]
+
+    _, page = store.top(query, (("n",), True), after=(0, 0))
+    assert [doc["_id"] for doc in page] == ["1", "none"]
+
+
+def test_count_answers_from_indexes_or_scans():
+    store = DocumentStore()
+    for i in range(10):
+        store.append(_doc(str(i), n=i % 2, text=f"word {i}"))
+    store.remove("3")
+
+    match_all = compile_query({"match_all": {}})
+    assert match_all.count(store) == 9
+    assert store._live is None  # no bitset was built
+    assert store.count(compile_query({"term": {"n": 1}})) == 4
+    scanned = compile_query({"match": {"text": "word"}})
+    assert scanned.count(store) is None
+    assert store.count(scanned) == 9
+
+
+def test_documents_are_stored_as_read_only_records():
+    store = DocumentStore()
+    document = {
+        "_type": "_doc",
+        "_id": "a",
+        "_source": {"n": 1},
+        "_index": "".join(["in", "dex"]),
+        "_version": 1,
+        "_seq_no": 0,
+        "_primary_term": 1,
+    }
+    store.append(dict(document))
+
+    record = store.get("a")
+    assert isinstance(record, DocumentRecord)
+    assert record == document
+    assert list(record) == list(document)
+    assert {**record, "_score": 1.0}["_primary_term"] == 1
+    assert record["_index"] is sys.intern("index")
+    assert "_score" not in record
+    with pytest.raises(TypeError):
+        record["_version"] = 2
+    with pytest.raises(AttributeError):
+        record._version = 2
+
+    # Documents a record can't hold are kept as they are
+    store.append({"_id": "b", "_source": {}, "_ignored": ["x"]})
+    assert store.get("b") == {"_id": "b", "_source": {}, "_ignored": ["x"]}
@@ -0,0 +1,188 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import opensearchpy
+import pytest
+
+from openmock import AsyncFakeOpenSearch, Engine, FakeOpenSearch, openmock
+
+
+@pytest.mark.asyncio
+async def test_clients_of_one_engine_share_indices():
+    engine = Engine()
+    sync_client = FakeOpenSearch(engine=engine)
+    async_client = AsyncFakeOpenSearch(engine=engine)
+
+    sync_client.indices.create(index="test-index")
+    await async_client.index(index="test-index", id="1", body={"status": "open"})
+    sync_client.index(index="test-index", id="2", body={"status": "open"})
+
+    response = await async_client.search(
+        index="test-index", body={"query": {"term": {"status.keyword": "open"}}}
+    )
+    assert response["hits"]["total"]["value"] == 2
+    assert sync_client.get(index="test-index", id="1")["_seq_no"] == 0
+    assert (await async_client.get(index="test-index", id="2"))["_seq_no"] == 1
+    assert await async_client.indices.exists(index="test-index")
+
+
+def test_clients_have_their_own_engine_by_default():
+    first = FakeOpenSearch()
+    second = AsyncFakeOpenSearch()
+
+    first.indices.create(index="test-index")
+
+    assert first.engine is not second.engine
+    assert "test-index" not in second.engine.documents
+
+
+@pytest.mark.asyncio
+@openmock
+async def test_mocked_clients_of_one_host_share_indices():
+    sync_client = opensearchpy.OpenSearch(hosts=[{"host": "localhost", "port": 9200}])
+    async_client = opensearchpy.AsyncOpenSearch(
+        hosts=[{"host": "localhost", "port": 9200}]
+    )
+    other_host = opensearchpy.AsyncOpenSearch(
+        hosts=[{"host": "localhost", "port": 9201}]
+    )
+
+    await async_client.index(index="test-index", id="1", body={"n": 1})
+
+    assert sync_client.get(index="test-index", id="1")["_source"] == {"n": 1}
+    assert not await other_host.indices.exists(index="test-index")
+
+
+def daily_indices(es):
+    for day in range(6):
+        body = []
+        for i in range(40):
+            body.append({"index": {"_index": f"logs-{day}", "_id": f"{day}-{i}"}})
+            body.append({"n": (i * 7 + day) % 50, "level": ["info", "warn"][i % 2]})
+        es.bulk(body=body)
+
+
+SEARCHES = [
+    {"query": {"range": {"n": {"gte": 10}}}, "size": 15, "sort": [{"n": "desc"}]},
+    {"query": {"term": {"level.keyword": "warn"}}, "size": 5},
+    {"size": 3, "aggs": {"levels": {"terms": {"field": "level"}}}},
+    {
+        "size": 0,
+        "aggs": {
+            "pairs": {
+                "composite": {
+                    "sources": [{"level": {"terms": {"field": "level"}}}],
+                },
+                "aggs": {"values": {"cardinality": {"field": "n"}}},
+            }
+        },
+    },
+    {"sort": [{"n": "asc"}], "search_after": [45], "size": 100},
+]
+
+
+@pytest.mark.parametrize("body", SEARCHES)
+def test_parallel_searches_answer_as_serial_ones(body):
+    serial = FakeOpenSearch()
+    daily_indices(serial)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        parallel = FakeOpenSearch(engine=Engine(search_executor=executor))
+        daily_indices(parallel)
+
+        assert parallel.search(index="logs-*", body=body) == serial.search(
+            index="logs-*", body=body
+        )
+        assert parallel.count(index="_all") == serial.count(index="_all")
+
+
+def test_parallel_searches_run_in_the_executor():
+    threads = set()
+
+    class RecordingExecutor(ThreadPoolExecutor):
+        def submit(self, fn, /, *args, **kwargs):
+            def recorded(*args, **kwargs):
+                threads.add(threading.get_ident())
+                return fn(*args, **kwargs)
+
+            return super().submit(recorded, *args, **kwargs)
+
+    with RecordingExecutor(max_workers=2) as executor:
+        es = FakeOpenSearch(engine=Engine(search_executor=executor))
+        daily_indices(es)
+        response = es.search(index="_all", body={"query": {"match_all": {}}})
+
+    assert response["_shards"] == {
+        "total": 6,
+        "successful": 6,
+        "skipped": 0,
+        "failed": 0,
+    }
+    assert threads and threading.get_ident() not in threads
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_failing_index_is_reported_as_a_shard_failure(parallel):
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        engine = Engine(search_executor=executor if parallel else None)
+        es = FakeOpenSearch(engine=engine)
+        daily_indices(es)
+
+        def broken(*args, **kwargs):
+            raise opensearchpy.TransportError(500, "io_exception", "disk on fire")
+
+        engine.documents["logs-3"].shards[0].select = broken
+        engine.documents["logs-3"].shards[0].count = broken
+        response = es.search(index="logs-*", body={"sort": [{"n": "asc"}]})
+        count = es.count(index="logs-*")
+
+    assert response["hits"]["total"]["value"] == 200
+    assert response["_shards"]["successful"] == 5
+    assert response["_shards"]["failed"] == 1
+    assert response["_shards"]["failures"] == [
+        {
+            "shard": 0,
+            "index": "logs-3",
+            "reason": {"type": "io_exception", "reason": "disk on fire"},
+        }
+    ]
+    assert count["count"] == 200
+    assert count["_shards"]["failed"] == 1
+    with pytest.raises(opensearchpy.TransportError):
+        es.search(index="logs-3")
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_errors_other_than_opensearch_ones_propagate(parallel):
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        engine = Engine(search_executor=executor if parallel else None)
+        es = FakeOpenSearch(engine=engine)
+        daily_indices(es)
+
+        def broken(*args, **kwargs):
+            raise RuntimeError("bug in the mock")
+
+        engine.documents["logs-3"].shards[0].select = broken
+        engine.documents["logs-3"].shards[0].count = broken
+        with pytest.raises(RuntimeError):
+            es.search(index="logs-*", body={"sort": [{"n": "asc"}]})
+        with pytest.raises(RuntimeError):
+            es.count(index="logs-*")
+
+
+@pytest.mark.parametrize("client_class", [FakeOpenSearch, AsyncFakeOpenSearch])
+def test_clients_keep_the_bucket_helpers(client_class):
+    documents = [{"_source": {"tag": tag}} for tag in ("a", "b", "a")]
+    client = client_class()
+
+    assert client.make_aggregation_buckets({"terms": {"field": "tag"}}, documents) == [
+        {"key": "a", "doc_count": 2},
+        {"key": "b", "doc_count": 1},
+    ]
+    composite = client.make_composite_aggregation_buckets(
+        {"composite": {"sources": [{"tag": {"terms": {"field": "tag"}}}]}},
+        documents,
+    )
+    assert [bucket["key"] for bucket in composite] == [
+        {"tag": "a"},
+        {"tag": "b"},
+    ]
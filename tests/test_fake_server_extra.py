@@ -218,3 +218,18 @@ def test_extra_server_methods():
     assert _delete_field(doc, "") is False
     assert _delete_field(doc, "b") is False
     assert _delete_field(doc, "a.b") is False
+
+
+def test_cat_indices_reports_deleted_documents():
+    server = FakeOpenSearchServer()
+    server.es.indices.create(
+        index="idx", body={"settings": {"merge.policy.deletes_pct_allowed": 100}}
+    )
+    server.create_document("idx", {"f": "v"}, "id1")
+    server.create_document("idx", {"f": "w"}, "id2")
+    server.es.delete(index="idx", id="id1")
+
+    rows = server.cat_indices(format_type="json")
+
+    assert rows[0]["docs.count"] == "1"
+    assert rows[0]["docs.deleted"] == "1"
@@ -0,0 +1,48 @@
+import enum
+import json
+
+from openmock.interning import StringInterner
+
+
+def test_normalize_shares_keys_and_values():
+    interner = StringInterner()
+    first = interner.normalize(
+        json.loads('{"status": "open", "tags": ["a", {"k": "open"}]}')
+    )
+    second = interner.normalize(json.loads('{"status": "open", "n": 1}'))
+
+    assert first == {"status": "open", "tags": ["a", {"k": "open"}]}
+    assert second == {"status": "open", "n": 1}
+    (first_key,) = [key for key in first if key == "status"]
+    (second_key,) = [key for key in second if key == "status"]
+    assert first_key is second_key
+    assert first["status"] is second["status"] is first["tags"][1]["k"]
+    assert interner.interned == 3
+    assert interner.stats()["saved_in_bytes"] > 0
+
+
+def test_table_is_bounded():
+    interner = StringInterner(max_entries=1, max_length=5)
+    interner.normalize(["short", "other", "far too long"])
+
+    assert len(interner) == 1
+    copy = "".join(["oth", "er"])
+    assert interner.intern(copy) is copy
+
+
+def test_memory_size_counts_the_strings():
+    interner = StringInterner()
+    empty = interner.stats()["memory_size_in_bytes"]
+    interner.normalize({"message": "x" * 200})
+
+    assert interner.stats()["memory_size_in_bytes"] > empty + 200
+
+
+def test_table_holds_plain_strings():
+    class Status(str, enum.Enum):
+        OPEN = "open"
+
+    interner = StringInterner()
+    interner.normalize({"status": Status.OPEN})
+
+    assert type(interner.intern("".join(["op", "en"]))) is str
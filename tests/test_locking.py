@@ -0,0 +1,115 @@
+import sys
+import threading
+import time
+
+import pytest
+
+from openmock import FakeOpenSearch
+from openmock.document_store import DocumentStore
+from openmock.locking import ReadWriteLock, locked
+
+
+def _started(target):
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    inside = threading.Barrier(3, timeout=5)
+
+    def read():
+        with lock.read():
+            inside.wait()
+
+    threads = [_started(read) for _ in range(2)]
+    inside.wait()
+    for thread in threads:
+        thread.join()
+
+
+def test_writer_waits_for_readers_and_blocks_new_ones():
+    lock = ReadWriteLock()
+    events = []
+    lock.acquire_read()
+    writer = _started(lambda: (lock.acquire_write(), events.append("write")))
+    while not lock._waiting_writers:
+        time.sleep(0.001)
+    reader = _started(lambda: (lock.acquire_read(), events.append("read")))
+    time.sleep(0.05)
+    assert events == []
+
+    lock.release_read()
+    writer.join(5)
+    assert events == ["write"]
+    lock.release_write()
+    reader.join(5)
+    assert events == ["write", "read"]
+
+
+def test_holders_can_take_the_lock_again():
+    lock = ReadWriteLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+        assert lock._writer == threading.get_ident()
+    with lock.read():
+        with lock.read():
+            pass
+    assert lock._writer is None and lock._readers == 0
+
+
+def test_read_lock_cannot_be_upgraded():
+    lock = ReadWriteLock()
+    with lock.read():
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+
+
+def test_locked_holds_every_store_once():
+    store = DocumentStore()
+    other = DocumentStore()
+    with locked([store, other, store], write=True):
+        assert store.lock._writer == threading.get_ident()
+        assert other.lock._write_depth == 1
+    assert store.lock._writer is None and other.lock._writer is None
+
+
+@pytest.mark.parametrize("point_in_time", [False, True])
+def test_concurrent_searches_merge_buffered_writes_safely(point_in_time):
+    client = FakeOpenSearch()
+    client.index(index="idx", id="seed", body={"n": -1})
+    # Build the column, then leave thousands of writes buffered in it
+    client.search(index="idx", body={"query": {"range": {"n": {"gte": 0}}}})
+    body = []
+    for i in range(3000):
+        body += [{"index": {"_index": "idx", "_id": str(i)}}, {"n": i}]
+    client.bulk(body=body)
+    search = {"query": {"range": {"n": {"gte": 10, "lt": 2000}}}}
+    if point_in_time:
+        search["pit"] = {"id": client.create_pit(index="idx")["pit_id"]}
+    barrier = threading.Barrier(8)
+    totals, errors = [], []
+
+    def run():
+        barrier.wait()
+        try:
+            response = client.search(
+                body=search, index=None if point_in_time else "idx"
+            )
+            totals.append(response["hits"]["total"]["value"])
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            errors.append(error)
+
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in [_started(run) for _ in range(8)]:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert not errors
+    assert totals == [1990] * 8
@@ -0,0 +1,140 @@
+import datetime
+
+import pytest
+
+from openmock.fake_opensearch import FakeQueryCondition, QueryType
+from openmock.query_compiler import compile_query, compile_sort, minimum_should_match
+
+
+def _doc(doc_id, **source):
+    return {"_id": doc_id, "_source": source}
+
+
+DOCS = [
+    _doc("1", status="active", tenant="Acme", count=1, tags=["a", "b"]),
+    _doc("2", status="inactive", tenant="acme", count=2, tags=["b"]),
+    _doc("3", status="active", tenant="Other", count=3, nested={"x": None}),
+]
+
+
+def _ids(query):
+    compiled = compile_query(query)
+    return [doc["_id"] for doc in DOCS if compiled.matches(doc)]
+
+
+def test_term_keyword_is_exact_and_case_sensitive():
+    assert _ids({"term": {"tenant.keyword": "Acme"}}) == ["1"]
+    assert _ids({"term": {"tenant.keyword": {"value": "acme"}}}) == ["2"]
+    assert _ids(
+        {"term": {"tenant.keyword": {"value": "acme", "case_insensitive": True}}}
+    ) == ["1", "2"]
+
+
+def test_match_is_case_insensitive_substring():
+    assert _ids({"match": {"status": "ACTIVE"}}) == ["1", "2", "3"]
+    assert _ids({"match": {"status.keyword": "ACTIVE"}}) == ["1", "3"]
+
+
+def test_terms_on_list_field():
+    assert _ids({"terms": {"tags": ["a"], "boost": 1.0}}) == ["1"]
+
+
+def test_bool_combination():
+    query = {
+        "bool": {
+            "filter": [{"term": {"status.keyword": "active"}}],
+            "must_not": {"term": {"count": 3}},
+            "should": [],
+        }
+    }
+    assert _ids(query) == ["1"]
+
+
+def test_empty_bool_matches_everything():
+    assert _ids({"bool": {}}) == ["1", "2", "3"]
+    assert _ids({}) == ["1", "2", "3"]
+
+
+def test_exists_ignores_null_values():
+    assert _ids({"exists": {"field": "nested.x"}}) == []
+    assert _ids({"exists": {"field": "tags"}}) == ["1", "2"]
+
+
+def test_ids_and_range():
+    assert _ids({"ids": {"values": ["2", "3", "9"]}}) == ["2", "3"]
+    assert _ids({"range": {"count": {"gt": 1, "lte": 3, "relation": "within"}}}) == [
+        "2",
+        "3",
+    ]
+
+
+def test_range_parses_date_bounds():
+    doc = _doc("d", ts=datetime.datetime(2020, 1, 2))
+    compiled = compile_query({"range": {"ts": {"gte": "2020-01-01T00:00:00"}}})
+    assert compiled.matches(doc)
+
+
+def test_unknown_query_type():
+    with pytest.raises(NotImplementedError):
+        compile_query({"percolate": {}})
+
+
+def test_fake_query_condition_uses_compiler():
+    condition = FakeQueryCondition(QueryType.TERM, {"status.keyword": "inactive"})
+    assert [doc["_id"] for doc in DOCS if condition.evaluate(doc)] == ["2"]
+
+
+def test_compile_sort_normalizes_specs():
+    assert compile_sort(
+        [{"count": {"order": "desc"}}, "name.keyword", {"_score": "desc"}, "n:desc"]
+    ) == [(("count",), True), (("name",), False), (("n",), True)]
+    assert compile_sort({"a.b": "asc"}) == [(("a", "b"), False)]
+
+
+@pytest.mark.parametrize(
+    "spec, expected",
+    [(None, 1), (2, 2), ("-1", 3), ("50%", 2), ("-25%", 3), ("3<75%", 3), (9, 4)],
+)
+def test_minimum_should_match_spec(spec, expected):
+    assert minimum_should_match(spec, 4, 1) == expected
+    assert minimum_should_match("2<50%", 2, 1) == 2
+
+
+def test_bool_minimum_should_match():
+    should = [
+        {"term": {"status.keyword": "active"}},
+        {"term": {"tenant.keyword": "Acme"}},
+        {"range": {"count": {"gte": 2}}},
+    ]
+    assert _ids({"bool": {"should": should}}) == ["1", "2", "3"]
+    assert _ids({"bool": {"should": should, "minimum_should_match": 2}}) == [
+        "1",
+        "3",
+    ]
+    assert _ids({"bool": {"should": should, "minimum_should_match": "100%"}}) == []
+    # Alongside a filter, should clauses are optional unless asked for
+    with_filter = {"filter": {"exists": {"field": "tags"}}, "should": should[:1]}
+    assert _ids({"bool": with_filter}) == ["1", "2"]
+    assert _ids({"bool": {**with_filter, "minimum_should_match": 1}}) == ["1"]
+
+
+@pytest.mark.parametrize("spec", [0, "25%"])
+def test_bool_of_should_clauses_needs_one_match(spec):
+    should = [
+        {"term": {"status.keyword": "active"}},
+        {"term": {"tenant.keyword": "Other"}},
+        {"term": {"tenant.keyword": "Nobody"}},
+    ]
+    assert _ids({"bool": {"should": should, "minimum_should_match": spec}}) == [
+        "1",
+        "3",
+    ]
+    assert _ids(
+        {
+            "bool": {
+                "should": should[1:],
+                "must_not": {"term": {"tenant.keyword": "Acme"}},
+                "minimum_should_match": spec,
+            }
+        }
+    ) == ["3"]
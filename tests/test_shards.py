@@ -0,0 +1,88 @@
+import pytest
+from opensearchpy.exceptions import RequestError
+
+from openmock.shards import (
+    ShardedIndex,
+    default_routing_num_shards,
+    murmur3_32,
+    parse_preference,
+    routing_hash,
+)
+
+
+def test_murmur3_matches_reference_values():
+    assert murmur3_32(b"") == 0
+    assert murmur3_32(b"hello") & 0xFFFFFFFF == 0x248BFA47
+    assert (
+        murmur3_32(b"The quick brown fox jumps over the lazy dog") & 0xFFFFFFFF
+        == 0x2E4FF723
+    )
+
+
+@pytest.mark.parametrize(
+    "routing,expected",
+    [
+        # The values OpenSearch's own Murmur3HashFunction tests check
+        ("hell", 0x5A0CB7C3),
+        ("hello", 0xD7C31989),
+        ("hello w", 0x22AB2984),
+        ("hello wo", 0xDF0CA123),
+        ("hello wor", 0xE7744D61),
+        ("The quick brown fox jumps over the lazy dog", 0xE07DB09C),
+        ("The quick brown fox jumps over the lazy cog", 0x4E63D2AD),
+    ],
+)
+def test_routing_hash_matches_opensearch(routing, expected):
+    assert routing_hash(routing) & 0xFFFFFFFF == expected
+    assert -(2**31) <= routing_hash(routing) < 2**31
+
+
+@pytest.mark.parametrize(
+    "shards,routing_shards", [(1, 1024), (2, 1024), (3, 768), (5, 640), (1024, 2048)]
+)
+def test_default_routing_num_shards(shards, routing_shards):
+    assert default_routing_num_shards(shards) == routing_shards
+
+
+def test_documents_go_to_the_shard_their_routing_hashes_to():
+    index = ShardedIndex.from_settings({"index": {"number_of_shards": 3}})
+
+    assert index.number_of_shards == 3
+    assert [index.shard_id(str(i)) for i in range(6)] == [1, 2, 1, 1, 1, 0]
+    # A routing value overrides the id
+    assert index.shard_id("0", routing="hello") == index.shard_id("hello") == 2
+    assert ShardedIndex().shard_id("0") == 0
+
+
+def test_number_of_routing_shards_changes_placement():
+    index = ShardedIndex.from_settings(
+        {"number_of_shards": 2, "number_of_routing_shards": 2}
+    )
+
+    assert index.routing_num_shards == 2
+    assert index.routing_factor == 1
+    with pytest.raises(RequestError):
+        ShardedIndex.from_settings(
+            {"number_of_shards": 3, "number_of_routing_shards": 4}
+        )
+    with pytest.raises(RequestError):
+        ShardedIndex.from_settings({"number_of_shards": 0})
+
+
+def test_searched_shards():
+    index = ShardedIndex.from_settings({"number_of_shards": 5})
+
+    assert index.searched_shards() == [0, 1, 2, 3, 4]
+    assert index.searched_shards(routing="hello") == [4]
+    assert index.searched_shards(routing="hell,hello") == [1, 4]
+    assert index.searched_shards(preference="_shards:0,3") == [0, 3]
+    assert index.searched_shards(routing="hello", preference="_shards:0") == []
+    assert index.searched_shards(preference="_shards:1|_local") == [1]
+    assert index.searched_shards(preference="my-session") == [0, 1, 2, 3, 4]
+
+
+def test_unknown_preferences_are_rejected():
+    assert parse_preference("_local") is None
+    assert parse_preference("_only_nodes:node-1") is None
+    with pytest.raises(RequestError):
+        parse_preference("_nowhere")